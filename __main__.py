@@ -16,10 +16,15 @@ In addition, you should have the following subfolders
     Sounds        (sound effects for the game)
     Images        (image files to use in the game)
 
-Moving any of these folders or files will prevent the game from working properly"""
+Moving any of these folders or files will prevent the game from working properly
+
+To record the session's input for replay.py, set the environment variable
+BREAKOUT_RECORD to the name of the log file to write."""
+import os
 from constants import *
 from breakout import *
 
 # Application code
 if __name__ == '__main__':
-    Breakout(width=GAME_WIDTH,height=GAME_HEIGHT).run()
+    Breakout(width=GAME_WIDTH,height=GAME_HEIGHT,
+             record=os.environ.get('BREAKOUT_RECORD')).run()
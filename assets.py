@@ -0,0 +1,158 @@
+# assets.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""Asset packs for Breakout
+
+The fonts and images of the game ship as the archives Fonts.zip and Images.zip.
+This module reads them in place, so they never have to be extracted.
+
+An AssetPack memory-maps its archive and reads the table of contents once, when
+it is mounted.  Nothing else is read until an asset is asked for; then only that
+entry is decompressed.  The archives were made on a Mac, so they also hold
+__MACOSX folders of resource forks (files named ._Arial.ttf and so on); these
+are not assets, and are left out of the index.
+
+Kivy can decode an image from memory, but it can only load a font from a file.
+So extract() writes a single asset to a cache folder (in the temporary folder,
+once per version of the archive) and returns its path.  game2d uses read() for
+images and extract() for fonts.
+
+This module only uses the standard library, so mounting a pack is cheap."""
+import mmap
+import os
+import os.path
+import tempfile
+import zipfile
+
+
+class _MappedFile(object):
+    """A read-only file over an mmap, for zipfile.
+
+    A Python 2 mmap has seek, tell and read, but its read needs a size,
+    and zipfile sometimes reads to the end of the file."""
+
+    def __init__(self, data):
+        """Initializes a file reading the mmap data from the start"""
+        self._data = data
+
+    def seek(self, offset, whence=0):
+        """Moves to offset, from the start (whence 0), here (1) or the end (2)"""
+        self._data.seek(offset, whence)
+
+    def tell(self):
+        """Returns the current position"""
+        return self._data.tell()
+
+    def read(self, size=-1):
+        """Returns the next size bytes, or the rest of the file if size < 0"""
+        if size < 0:
+            size = len(self._data) - self._data.tell()
+        return self._data.read(size)
+
+    def close(self):
+        """Does nothing; the pack closes the mmap"""
+        pass
+
+
+class AssetPack(object):
+    """An instance is a zip archive of assets, mounted for reading.
+
+    Assets are named by their path inside the archive's top folder, so the
+    asset Fonts/Arial.ttf in Fonts.zip is named 'Arial.ttf' (just as it would
+    be in the Fonts folder).
+
+    INSTANCE ATTRIBUTES (Hidden):
+        filename [str]: the archive file
+        file [file]: the open archive file
+        map [mmap.mmap]: the archive, mapped into memory
+        zip [zipfile.ZipFile]: the archive, read through map
+        index [dict]: maps each asset name to its zipfile.ZipInfo
+        cache [str, or None if nothing was extracted]: the folder for extracted assets
+    """
+
+    def __init__(self, filename):
+        """**Constructor**: Mounts the archive and indexes its assets.
+
+            :param filename: The zip archive
+            **Precondition**:: filename is a string naming a zip file.
+        """
+        self._filename = filename
+        self._file = open(filename, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._zip = zipfile.ZipFile(_MappedFile(self._map))
+        self._index = {}
+        self._cache = None
+        for info in self._zip.infolist():
+            name = info.filename
+            if name.endswith('/') or name.startswith('__MACOSX/'):
+                continue
+            if os.path.basename(name).startswith('._'):
+                continue
+            if '/' in name:
+                name = name.split('/', 1)[1]
+            self._index[name] = info
+
+    def __contains__(self, name):
+        """**Returns**: True if name is an asset in this pack.
+
+            :param name: The asset name
+            **Precondition**:: name is a string.
+        """
+        return name in self._index
+
+    def __len__(self):
+        """**Returns**: The number of assets in this pack."""
+        return len(self._index)
+
+    def names(self):
+        """**Returns**: A sorted list of the names of the assets in this pack."""
+        return sorted(self._index)
+
+    def size(self, name):
+        """**Returns**: The size in bytes of the asset, once decompressed.
+
+            :param name: The asset name
+            **Precondition**:: name is an asset in this pack.
+        """
+        return self._index[name].file_size
+
+    def read(self, name):
+        """**Returns**: The contents of the asset, decompressed, as a string.
+
+            :param name: The asset name
+            **Precondition**:: name is an asset in this pack.
+        """
+        return self._zip.read(self._index[name])
+
+    def extract(self, name):
+        """**Returns**: The path of a file holding the asset, writing it if needed.
+
+        The file is in a cache folder for this version of the archive, so
+        the asset is only written the first time it is used.
+
+            :param name: The asset name
+            **Precondition**:: name is an asset in this pack.
+        """
+        info = self._index[name]
+        if self._cache is None:
+            stat = os.stat(self._filename)
+            tag = '%s-%d-%d' % (os.path.splitext(os.path.basename(self._filename))[0],
+                                stat.st_size, int(stat.st_mtime))
+            self._cache = os.path.join(tempfile.gettempdir(), 'game2d-'+tag)
+        path = os.path.join(self._cache, *name.split('/'))
+        if not os.path.exists(path) or os.path.getsize(path) != info.file_size:
+            folder = os.path.dirname(path)
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+            # Write to a temporary name first, so a reader never sees half a file
+            temp = '%s.%d.tmp' % (path, os.getpid())
+            with open(temp, 'wb') as data:
+                data.write(self.read(name))
+            os.rename(temp, path)
+        return path
+
+    def close(self):
+        """Unmounts the archive."""
+        self._zip.close()
+        self._map.close()
+        self._file.close()
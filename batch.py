@@ -0,0 +1,320 @@
+# batch.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""Batch simulator for Breakout
+
+This module contains the class GameBatch, which plays many independent games of
+Breakout at once.  It is meant for tuning paddle controllers and for balance
+testing, where we need millions of games and never draw any of them.
+
+A Gameplay keeps its Balls, one Paddle and one BrickWall, each a Python object with
+its own attributes, so looping over thousands of Gameplay objects spends nearly all
+of its time in the interpreter.  A GameBatch instead keeps every game in a handful
+of numpy arrays (one entry per game for the ball, the paddle and the tries, and an
+N x rows x cols array of booleans for the bricks), and steps all of the games with
+a fixed number of array operations per frame, however many games there are.
+
+The rules are the discrete rules of models.py: Ball.move, then
+Ball.detectWallCollision, Ball.detectPaddleCollision and BrickWall.brickCollision,
+with the same random ranges for every bounce.  The bricks sit on the same lattice
+as in BrickWall, so the bricks that can touch a ball are found with a little
+arithmetic, exactly as BrickWall.getBricksIn does.  The only difference is that
+the random numbers come from one numpy stream for the whole batch, so a game in a
+batch does not play out like a Gameplay with the same seed.
+
+Like gameplay.py and models.py, this module never imports game2d, so it runs
+without Kivy or pygame."""
+import math
+import random
+import numpy
+from constants import *
+
+
+class GameBatch(object):
+    """An instance is a batch of independent games of Breakout.
+
+    Every game has its own ball, paddle, bricks and tries, but they are all
+    stepped together.  Games that are won or lost stop changing, and step
+    reports which games are still in progress.  Call reset to start new games
+    in place of finished ones.
+
+    Each ball moves by its velocity once per frame, as in Ball.move.  If
+    substeps is more than 1, the frame is split into that many equal moves,
+    with the collision tests after each one.  This costs more, but a fast ball
+    is then much less likely to pass through a brick or the paddle.
+
+    INSTANCE ATTRIBUTES:
+        _size     [int > 0]: the number of games in the batch
+        _rows     [int > 0]: the number of rows of bricks in each game
+        _cols     [int > 0]: the number of bricks in each row
+        _substeps [int > 0]: the number of moves per frame
+        _pitch_x  [float > 0]: the horizontal distance between brick columns
+        _pitch_y  [float > 0]: the vertical distance between brick rows
+        _brick_x  [float array, length _cols]: the left side of each brick column
+        _brick_y  [float array, length _rows]: the bottom of each brick row
+        _window   [(int, int)]: the most rows and columns a ball can overlap
+        _rng      [numpy.random.RandomState]: the random stream for every game
+        _x, _y    [float arrays, length _size]: the bottom left of each ball
+        _vx, _vy  [float arrays, length _size]: the velocity of each ball
+        _paddle   [float array, length _size]: the left side of each paddle
+        _bricks   [bool array, _size x _rows x _cols]:
+            True where a game still has the brick in row i, column j
+        _count    [int array, length _size]: the bricks left in each game
+        _tries    [int array, length _size]: the tries left in each game
+        _frames   [int array, length _size]: the frames played by each game
+    """
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def getSize(self):
+        """Returns the number of games in the batch"""
+        return self._size
+
+    def getBalls(self):
+        """Returns the arrays (x, y, vx, vy) of the bottom left corners and the
+        velocities of the balls.  They are the batch's own arrays, not copies."""
+        return (self._x, self._y, self._vx, self._vy)
+
+    def getPaddles(self):
+        """Returns the array of the left sides of the paddles"""
+        return self._paddle
+
+    def getBricks(self):
+        """Returns the _size x _rows x _cols array of the bricks still standing"""
+        return self._bricks
+
+    def getBrickCounts(self):
+        """Returns the array of the number of bricks left in each game"""
+        return self._count
+
+    def getTries(self):
+        """Returns the array of the number of tries left in each game"""
+        return self._tries
+
+    def getFrames(self):
+        """Returns the array of the number of frames played by each game"""
+        return self._frames
+
+
+    # INITIALIZER
+    def __init__(self, size, rows=BRICK_ROWS, cols=BRICKS_IN_ROW, seed=None, substeps=1):
+        """Initializes a batch of new games
+
+            Parameter size: the number of games
+            Precondition: size is an int > 0
+
+            Parameters rows, cols: the size of the brick wall in each game
+            Precondition: rows and cols are ints > 0, with GAME_WIDTH/cols > BRICK_SEP_H
+            (as for BrickWall)
+
+            Parameter seed: the seed for the random stream, or None to pick one
+            Precondition: seed is None or an int in 0..2**32-1
+
+            Parameter substeps: the number of moves per frame
+            Precondition: substeps is an int > 0"""
+        assert GAME_WIDTH/cols > BRICK_SEP_H, `cols`+' columns leave no room for the bricks'
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)
+        self._size = size
+        self._rows = rows
+        self._cols = cols
+        self._substeps = substeps
+        self._rng = numpy.random.RandomState(seed)
+
+        self._pitch_x = float(GAME_WIDTH/cols)
+        self._pitch_y = float(BRICK_SEP_V + BRICK_HEIGHT)
+        self._brick_x = BRICK_SEP_H/2 + numpy.arange(cols)*self._pitch_x
+        self._brick_y = GAME_WIDTH - BRICK_Y_OFFSET - numpy.arange(rows)*self._pitch_y
+        self._window = (int(math.ceil(BALL_DIAMETER/self._pitch_y))+1,
+                        int(math.ceil(BALL_DIAMETER/self._pitch_x))+1)
+
+        self._x = numpy.zeros(size)
+        self._y = numpy.zeros(size)
+        self._vx = numpy.zeros(size)
+        self._vy = numpy.zeros(size)
+        self._paddle = numpy.zeros(size)
+        self._bricks = numpy.zeros((size, rows, cols), dtype=bool)
+        self._count = numpy.zeros(size, dtype=int)
+        self._tries = numpy.zeros(size, dtype=int)
+        self._frames = numpy.zeros(size, dtype=int)
+        self.reset()
+
+    def reset(self, games=None):
+        """Starts new games in place of the given games
+
+            Parameter games: the games to restart, or None for all of them
+            Precondition: games is None, a bool array of length _size, or an
+            array of game indices"""
+        if games is None:
+            games = slice(None)
+        self._paddle[games] = GAME_WIDTH/2
+        self._bricks[games] = True
+        self._count[games] = self._rows*self._cols
+        self._tries[games] = NUMBER_TURNS
+        self._frames[games] = 0
+        self._newBalls(games)
+
+    def _newBalls(self, games):
+        """Puts a new ball (as made by Ball()) in each of the given games"""
+        self._x[games] = GAME_WIDTH/2 - BALL_DIAMETER/2.0
+        self._y[games] = GAME_HEIGHT/3 - BALL_DIAMETER/2.0
+        self._vx[games] = 0.0
+        self._vy[games] = -3.0
+
+
+    # UPDATE METHODS
+    def movePaddles(self, dx):
+        """Moves each paddle horizontally, keeping it on the screen
+
+        This is Gameplay.movePaddle for every game at once.  Paddles in
+        finished games do not move.
+
+            Parameter dx: the distance to move each paddle (negative is left)
+            Precondition: dx is a number or a float array of length _size"""
+        live = self.inProgress()
+        moved = numpy.clip(self._paddle + dx, 0, GAME_WIDTH - PADDLE_WIDTH)
+        self._paddle[live] = moved[live]
+
+    def step(self):
+        """Simulates one frame of every game still in progress
+
+        This is Gameplay.step for every game at once: a game whose ball has
+        fallen off the bottom loses a try and gets a new ball, and every other
+        game moves its ball and bounces it off the walls, the paddle and the
+        bricks.  Finished games are left alone.
+
+        Returns the bool array of the games still in progress"""
+        live = self.inProgress()
+        failed = live & (self._y <= 0)
+        if failed.any():
+            self._tries[failed] -= 1
+            self._newBalls(failed)
+
+        moving = numpy.flatnonzero(live & ~failed)
+        for sub in range(self._substeps):
+            if len(moving) == 0:
+                break
+            self._x[moving] += self._vx[moving]/self._substeps
+            self._y[moving] += self._vy[moving]/self._substeps
+            self._wallCollision(moving)
+            self._paddleCollision(moving)
+            self._brickCollision(moving)
+
+        self._frames[live] += 1
+        return self.inProgress()
+
+    def run(self, controller=None, frames=None):
+        """Steps the batch until every game is over, and returns the frames played
+
+            Parameter controller: a function that takes this batch and returns
+            the paddle moves for the next frame (as for movePaddles), or None to
+            leave the paddles where they are
+            Precondition: controller is None or a function as described
+
+            Parameter frames: the most frames to play, or None for no limit
+            Precondition: frames is None or an int >= 0"""
+        played = 0
+        while self.inProgress().any() and (frames is None or played < frames):
+            if not controller is None:
+                self.movePaddles(controller(self))
+            self.step()
+            played += 1
+        return played
+
+
+    # HELPER METHODS FOR COLLISION DETECTION
+    def _verticalBounce(self, games):
+        """Bounces the balls in games vertically, as Ball.verticalBounce does"""
+        self._vy[games] *= self._rng.uniform(-1.1, -.9, len(games))
+
+    def _wallCollision(self, games):
+        """Bounces the balls in games off the sides and the top of the screen,
+        as Ball.detectWallCollision does"""
+        x = self._x[games]
+        side = games[(x + BALL_DIAMETER >= GAME_WIDTH) | (x <= 0)]
+        self._vx[side] *= -1.0
+        top = games[self._y[games] + BALL_DIAMETER >= GAME_HEIGHT]
+        self._vy[top] *= -1.0
+
+    def _paddleCollision(self, games):
+        """Bounces the falling balls in games off their paddles, as
+        Ball.detectPaddleCollision does
+
+        The corners of the ball are tried in the same order, and the first
+        corner inside the paddle picks the range of the new _vx."""
+        games = games[self._vy[games] < 0]
+        left = self._x[games]
+        right = left + BALL_DIAMETER
+        bottom = self._y[games]
+        top = bottom + BALL_DIAMETER
+        paddle = self._paddle[games]
+
+        inx = lambda x: (paddle <= x) & (x <= paddle + PADDLE_WIDTH)
+        iny = lambda y: (PADDLE_OFFSET <= y) & (y <= PADDLE_OFFSET + PADDLE_HEIGHT)
+        corners = [(inx(left)  & iny(top),    5.0,  15.0),
+                   (inx(left)  & iny(bottom), 5.0,  13.0),
+                   (inx(right) & iny(top),    5.0,  13.0),
+                   (inx(right) & iny(bottom), -15.0, -5.0)]
+        done = numpy.zeros(len(games), dtype=bool)
+        for hit, low, high in corners:
+            hit = hit & ~done
+            done |= hit
+            bounced = games[hit]
+            self._verticalBounce(bounced)
+            self._vx[bounced] = self._rng.uniform(low, high, len(bounced))
+
+    def _brickCollision(self, games):
+        """Removes the bricks overlapping the balls in games, bouncing each ball
+        vertically once for every brick it breaks, as BrickWall.brickCollision does
+
+        Only the lattice cells under each ball are examined (at most _window
+        of them), so the cost does not depend on the size of the wall."""
+        left = self._x[games]
+        right = left + BALL_DIAMETER
+        bottom = self._y[games]
+        top = bottom + BALL_DIAMETER
+
+        # As BrickWall._row and BrickWall._column
+        height = GAME_WIDTH - BRICK_Y_OFFSET + BRICK_HEIGHT
+        imin = numpy.floor((height - top)/self._pitch_y).astype(int)
+        imax = numpy.floor((height - bottom)/self._pitch_y).astype(int)
+        jmin = numpy.floor((left - BRICK_SEP_H/2)/self._pitch_x).astype(int)
+        jmax = numpy.floor((right - BRICK_SEP_H/2)/self._pitch_x).astype(int)
+        near = (imax >= 0) & (imin < self._rows) & (jmax >= 0) & (jmin < self._cols)
+        if not near.any():
+            return
+
+        games, left, right, bottom, top = (games[near], left[near], right[near],
+                                           bottom[near], top[near])
+        imin, imax, jmin, jmax = imin[near], imax[near], jmin[near], jmax[near]
+        for di in range(self._window[0]):
+            i = imin + di
+            rows = (i <= imax) & (i >= 0) & (i < self._rows)
+            i = numpy.clip(i, 0, self._rows-1)
+            brick_y = self._brick_y[i]
+            rows &= (brick_y <= top) & (bottom <= brick_y + BRICK_HEIGHT)
+            for dj in range(self._window[1]):
+                j = jmin + dj
+                cells = rows & (j <= jmax) & (j >= 0) & (j < self._cols)
+                j = numpy.clip(j, 0, self._cols-1)
+                brick_x = self._brick_x[j]
+                cells &= (brick_x <= right) & (left <= brick_x + self._pitch_x - BRICK_SEP_H)
+                cells &= self._bricks[games, i, j]
+                if cells.any():
+                    hit = games[cells]
+                    self._bricks[hit, i[cells], j[cells]] = False
+                    self._count[hit] -= 1
+                    self._verticalBounce(hit)
+
+
+    # STATUS METHODS
+    def isWon(self):
+        """Returns the bool array of the games with every brick cleared"""
+        return self._count == 0
+
+    def isLost(self):
+        """Returns the bool array of the games with no tries left"""
+        return self._tries <= 0
+
+    def inProgress(self):
+        """Returns the bool array of the games that are neither won nor lost"""
+        return (self._count > 0) & (self._tries > 0)
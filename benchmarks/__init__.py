@@ -0,0 +1,208 @@
+# benchmarks/__init__.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""Headless benchmarks for Breakout
+
+This package times the hot paths of the game: the physics and collisions of the
+models, the containment tests of the game2d shapes, and drawing the wall into a
+GView.  Nothing opens a window.  The shape and drawing benchmarks need Kivy (to
+make the shapes); if it cannot be imported they are skipped, and the physics
+benchmarks still run.  Run them from the game folder as
+
+    python -m benchmarks --output results.json --baseline benchmarks/baseline.json
+
+The results are saved as JSON.  Every benchmark is compared to the same benchmark
+in the baseline file (benchmarks/baseline.json unless --baseline says otherwise),
+and the run fails (exit status 1) if any is slower by more than the tolerance
+(10% by default).  If there is no baseline file the run fails at once, rather
+than passing without comparing anything; use --no-compare to only time the
+benchmarks.  Make or refresh the baseline with --save-baseline, on the machine
+that will run the comparison, since the times only mean something on one
+machine, so no baseline is kept with the code.
+
+A benchmark is a function registered with the decorator `benchmark`.  It takes
+the parameters of one case as keywords and returns the function to time (called
+with no arguments).  It is called again before every repeat, so it can make
+fresh state for each one.  Times are reported per call of the timed function;
+the `unit` of a benchmark says what one call does (e.g. 'frame of 10 balls').
+
+The benchmarks themselves are in the modules physics, shapes and render."""
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+
+#: the benchmarks, in the order they were registered (see benchmark)
+BENCHMARKS = []
+
+#: the default file for the stored baseline
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+#: the modules that hold the benchmarks
+MODULES = ('physics', 'shapes', 'render')
+
+
+def benchmark(group, cases=({},), unit='call'):
+    """Returns a decorator that registers a benchmark function
+
+    The benchmark is named group.function, and each of its cases is named by
+    its parameters, e.g. physics.brickCollision[balls=10,cols=50,rows=50].
+
+        Parameter group: the group of the benchmark (usually its module)
+        Precondition: group is a string
+
+        Parameter cases: the parameters of each case
+        Precondition: cases is a sequence of dicts mapping strings to ints
+
+        Parameter unit: what one call of the timed function does
+        Precondition: unit is a string"""
+    def register(function):
+        for params in cases:
+            BENCHMARKS.append((caseName(group+'.'+function.__name__, params),
+                               function, dict(params), unit))
+        return function
+    return register
+
+
+def caseName(name, params):
+    """Returns the name of the case of benchmark name with the dict params"""
+    if not params:
+        return name
+    return name+'['+','.join('%s=%s' % (key, params[key]) for key in sorted(params))+']'
+
+
+def load():
+    """Imports the benchmark modules (registering their benchmarks), and returns
+    a dict mapping the name of every module that could not be imported to the
+    reason why"""
+    skipped = {}
+    for name in MODULES:
+        try:
+            __import__(__name__+'.'+name)
+        except ImportError, e:
+            skipped[name] = str(e)
+    return skipped
+
+
+def measure(function, params, repeat=5, target=0.1):
+    """Returns a dict with the time per call (best and median over the repeats)
+    of the benchmark function for the case params
+
+    The number of calls per repeat is chosen so that a repeat takes about target
+    seconds.  The garbage collector is off while a repeat runs.
+
+        Parameter function: the benchmark, as registered with benchmark
+        Precondition: function is a function taking the keywords params
+
+        Parameter params: the parameters of the case
+        Precondition: params is a dict
+
+        Parameter repeat: the number of repeats
+        Precondition: repeat is an int > 0
+
+        Parameter target: the seconds each repeat should take
+        Precondition: target is a number > 0"""
+    number = 1
+    while True:
+        seconds = _time(function(**params), number)
+        if seconds >= target/10.0 or number >= 1000000:
+            break
+        number *= 10
+    number = max(1, int(number*target/max(seconds, 1e-9)))
+
+    times = []
+    for k in range(repeat):
+        times.append(_time(function(**params), number)/number)
+    times.sort()
+    return {'best': times[0], 'median': times[len(times)//2], 'number': number,
+            'repeat': repeat}
+
+
+def _time(timed, number):
+    """Returns the seconds taken by number calls of the function timed"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.time()
+        for k in xrange(number):
+            timed()
+        return time.time()-start
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def run(pattern=None, repeat=5, target=0.1, progress=None):
+    """Runs the benchmarks and returns the results, as a dict ready to save as JSON
+
+    The dict has the keys 'machine' (a description of this machine and Python),
+    'time' (when the run started), 'results' (mapping each case name to its unit
+    and times, as returned by measure) and 'skipped' (mapping each case or
+    module that could not run to the reason).
+
+        Parameter pattern: run only the cases with this in their name, or None for all
+        Precondition: pattern is None or a string
+
+        Parameters repeat, target: as for measure
+
+        Parameter progress: a function called as progress(name, result) after
+        every case (result is None if it was skipped), or None
+        Precondition: progress is None or a function as described"""
+    skipped = load()
+    results = {}
+    for name, function, params, unit in BENCHMARKS:
+        if not pattern is None and not pattern in name:
+            continue
+        try:
+            result = measure(function, params, repeat, target)
+        except ImportError, e:
+            skipped[name] = str(e)
+            result = None
+        else:
+            result['unit'] = unit
+            results[name] = result
+        if not progress is None:
+            progress(name, result)
+    return {'machine': {'python': sys.version.split()[0], 'platform': platform.platform(),
+                        'processor': platform.processor() or platform.machine()},
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'results': results, 'skipped': skipped}
+
+
+def compare(results, baseline, tolerance=0.1):
+    """Returns a list of (name, old, new, ratio, regressed) for every case timed
+    in both results and baseline, in name order
+
+    old and new are the best times per call, and ratio is new/old.  A case has
+    regressed if its ratio is more than 1+tolerance.
+
+        Parameters results, baseline: the runs to compare
+        Precondition: results and baseline are dicts as returned by run
+
+        Parameter tolerance: the slowdown allowed, as a fraction
+        Precondition: tolerance is a number >= 0"""
+    rows = []
+    old = baseline['results']
+    new = results['results']
+    for name in sorted(new):
+        if name in old:
+            ratio = new[name]['best']/max(old[name]['best'], 1e-12)
+            rows.append((name, old[name]['best'], new[name]['best'], ratio,
+                         ratio > 1.0+tolerance))
+    return rows
+
+
+def save(results, filename):
+    """Writes the results (a dict as returned by run) to the file filename as JSON"""
+    with open(filename, 'w') as data:
+        json.dump(results, data, indent=1, sort_keys=True)
+        data.write('\n')
+
+
+def read(filename):
+    """Returns the results saved in the file filename by save"""
+    with open(filename) as data:
+        return json.load(data)
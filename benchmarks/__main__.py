@@ -0,0 +1,86 @@
+# benchmarks/__main__.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""__main__ module for the Breakout benchmarks
+
+Run it from the game folder as
+
+    python -m benchmarks [--filter NAME] [--output FILE] [--baseline FILE]
+                         [--save-baseline | --no-compare]
+
+See the package benchmarks for what it does."""
+import argparse
+import os
+import sys
+import benchmarks
+
+
+def main(argv=None):
+    """Runs the benchmarks described by the command line arguments argv
+    (sys.argv[1:] if None), and returns the exit status"""
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Time the hot paths of Breakout, headlessly.')
+    parser.add_argument('--filter', default=None,
+                        help='only run the benchmarks with this in their name')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='the number of repeats per benchmark (default: 5)')
+    parser.add_argument('--target', type=float, default=0.1,
+                        help='the seconds per repeat (default: 0.1)')
+    parser.add_argument('--output', default=None,
+                        help='the file to save the results to, as JSON')
+    parser.add_argument('--baseline', default=None,
+                        help='the results to compare against (default: '+
+                        'benchmarks/baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='save the results as the baseline instead of comparing')
+    parser.add_argument('--no-compare', action='store_true',
+                        help='only time the benchmarks, without a baseline')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='the slowdown allowed before a benchmark fails (default: 0.1)')
+    args = parser.parse_args(argv)
+
+    baseline = args.baseline or benchmarks.BASELINE
+    if args.save_baseline or args.no_compare:
+        pass
+    elif not os.path.exists(baseline):
+        parser.error('there is no baseline at %s; make one with --save-baseline '
+                     '(or use --no-compare to only time the benchmarks)' % baseline)
+
+    def progress(name, result):
+        if result is None:
+            print '%-56s skipped' % name
+        else:
+            print '%-56s %12.2f us per %s' % (name, 1e6*result['best'], result['unit'])
+        sys.stdout.flush()
+
+    results = benchmarks.run(args.filter, args.repeat, args.target, progress)
+    for name in sorted(results['skipped']):
+        if not '[' in name and not '.' in name:
+            print 'skipped module %s: %s' % (name, results['skipped'][name])
+    if not args.output is None:
+        benchmarks.save(results, args.output)
+    if args.save_baseline:
+        benchmarks.save(results, baseline)
+        return 0
+    if args.no_compare:
+        return 0
+
+    regressions = 0
+    print
+    print 'compared to %s:' % baseline
+    rows = benchmarks.compare(results, benchmarks.read(baseline), args.tolerance)
+    for name, old, new, ratio, regressed in rows:
+        if regressed:
+            regressions += 1
+        print '%-56s %12.2f -> %10.2f us  %+6.1f%%%s' % (name, 1e6*old, 1e6*new, 100*(ratio-1),
+                                                          '  SLOWER' if regressed else '')
+    missing = len(results['results'])-len(rows)
+    if missing:
+        print '%d benchmarks are not in the baseline' % missing
+    print '%d regressions' % regressions
+    return 1 if regressions else 0
+
+
+# Application code
+if __name__ == '__main__':
+    sys.exit(main())
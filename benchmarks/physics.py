@@ -0,0 +1,112 @@
+# benchmarks/physics.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""Benchmarks of the Breakout physics
+
+These use only the models and Gameplay, so they run without Kivy.  Each one is
+timed for the wall sizes in WALLS and the ball counts in BALLS; a call of the
+timed function moves every ball once, so the time is per frame."""
+import random
+from constants import *
+from models import *
+from gameplay import *
+from benchmarks import benchmark
+
+
+#: the wall sizes, as (rows, cols); 80 is the most columns that still leave
+#: the bricks a positive width (see BrickWall)
+WALLS = ((10, 10), (50, 50), (200, 80))
+
+#: the numbers of balls in play at once
+BALLS = (1, 10, 100)
+
+#: every wall size with every ball count
+CASES = [{'rows': rows, 'cols': cols, 'balls': balls}
+         for rows, cols in WALLS for balls in BALLS]
+
+
+def _wallBalls(rows, balls, rng):
+    """Returns a list of balls placed at random over a wall of the given rows
+
+    Each ball is given a random velocity, so that it collides the way a ball
+    in play would."""
+    top = GAME_WIDTH - BRICK_Y_OFFSET + BRICK_HEIGHT
+    bottom = top - rows*(BRICK_HEIGHT + BRICK_SEP_V)
+    result = []
+    for k in range(balls):
+        ball = Ball(rng)
+        ball.x = rng.uniform(0, GAME_WIDTH - BALL_DIAMETER)
+        ball.y = rng.uniform(bottom, top - BALL_DIAMETER)
+        ball._vx = rng.uniform(-15.0, 15.0)
+        ball._vy = rng.choice([-1, 1])*rng.uniform(3.0, 6.0)
+        ball.remember()
+        result.append(ball)
+    return result
+
+
+@benchmark('physics', CASES, 'frame')
+def brickCollision(rows, cols, balls):
+    """Checks every ball against the wall with BrickWall.brickCollision
+
+    The balls do not move, so they hit the same bricks on every call.  The
+    bricks take 255 hits, and the wall is filled again after each call, so it
+    stays full for the whole run."""
+    rng = random.Random(0)
+    wall = BrickWall(rows, cols, 255)
+    group = _wallBalls(rows, balls, rng)
+    def timed():
+        for ball in group:
+            wall.brickCollision(ball)
+        wall.fill()
+    return timed
+
+
+@benchmark('physics', [{'balls': balls} for balls in BALLS], 'frame')
+def moveBalls(balls):
+    """Moves every ball with Ball.move and bounces it with detectWallCollision
+
+    The balls are kept on the screen, bouncing off the bottom as well."""
+    rng = random.Random(0)
+    group = _wallBalls(1, balls, rng)
+    def timed():
+        for ball in group:
+            ball.move()
+            ball.detectWallCollision()
+            if ball.bottom <= 0:
+                ball._vy = -ball._vy
+    return timed
+
+
+@benchmark('physics', CASES, 'frame')
+def updateBall(rows, cols, balls):
+    """Plays one frame of as many games as there are balls with Gameplay.updateBall
+
+    The paddle of each game follows its ball, and a lost ball is replaced, so
+    the games keep going however long the benchmark runs."""
+    games = [Gameplay(rows=rows, cols=cols, seed=seed) for seed in range(balls)]
+    def timed():
+        for game in games:
+            ball = game.getBall()
+            game.movePaddle(ball.center_x - game.getPaddle().center_x)
+            game.updateBall()
+            if game.detectFail():
+                game.newBall()
+    return timed
+
+
+@benchmark('physics', [{'rows': rows, 'cols': cols, 'balls': balls}
+                       for rows, cols in WALLS for balls in (100, 500)], 'frame')
+def multiBall(rows, cols, balls):
+    """Plays one frame of a single game with many balls with Gameplay.updateBall
+
+    The paddle follows the first ball, and the balls that are lost are served
+    again from the pool (with Gameplay.addBalls), so the game keeps about the
+    same number of balls in play however long the benchmark runs."""
+    game = Gameplay(rows=rows, cols=cols, seed=0, balls=balls, pool=balls)
+    def timed():
+        game.movePaddle(game.getBall().center_x - game.getPaddle().center_x)
+        game.updateBall()
+        if game.detectFail():
+            game.newBall()
+        game.addBalls(balls - len(game.getBalls()))
+    return timed
@@ -0,0 +1,52 @@
+# benchmarks/render.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""Benchmarks of drawing the brick wall into a GView
+
+These make a GView (a Kivy widget, with no window), so they are skipped if Kivy
+is not installed.  They only time building the canvas instructions; nothing is
+sent to a graphics card.  A call of the timed function is one frame: the view is
+started with _redraw, the wall is drawn, and the frame is finished with _flush."""
+from constants import *
+from models import *
+import game2d
+from benchmarks import benchmark
+from benchmarks.physics import WALLS
+
+
+@benchmark('render', [{'rows': rows, 'cols': cols} for rows, cols in WALLS], 'frame')
+def drawWall(rows, cols):
+    """Draws a full wall every frame, after its views were made by a first draw"""
+    view = game2d.GView()
+    wall = BrickWall(rows, cols)
+    wall.draw(view)
+    def timed():
+        view._redraw()
+        wall.draw(view)
+        view._flush()
+    return timed
+
+
+@benchmark('render', [{'rows': rows, 'cols': cols} for rows, cols in WALLS], 'frame')
+def drawNewWall(rows, cols):
+    """Draws a frame in which the wall is replaced by a new, full one
+
+    This is the cost of the first frame of a game, when the batches of the
+    wall are made."""
+    view = game2d.GView()
+    wall = BrickWall(rows, cols)
+    def timed():
+        view._redraw()
+        wall.newBricks(view)
+        view._flush()
+    return timed
+
+
+@benchmark('render', [{'retained': 1}, {'retained': 0}], 'frame')
+def redraw(retained):
+    """Starts and finishes an empty frame in a retained or an immediate view"""
+    view = game2d.GView(bool(retained))
+    def timed():
+        view._redraw()
+        view._flush()
+    return timed
@@ -0,0 +1,58 @@
+# benchmarks/shapes.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""Benchmarks of the containment tests of the game2d shapes
+
+Making a shape imports Kivy, so these are skipped if Kivy is not installed.
+A call of the timed function tests every point in a fixed set of POINTS points,
+spread over a box a little bigger than the shape (so about half of the points
+are inside)."""
+import math
+import random
+import game2d
+from benchmarks import benchmark
+
+
+#: the number of points tested per call
+POINTS = 1000
+
+
+def _points(left, bottom, width, height):
+    """Returns a list of POINTS random (x, y) points around the given box"""
+    rng = random.Random(0)
+    return [(rng.uniform(left-width/4.0, left+width*1.25),
+             rng.uniform(bottom-height/4.0, bottom+height*1.25)) for k in range(POINTS)]
+
+
+def _timeContains(shape, points):
+    """Returns a function that tests every point in points against shape"""
+    contains = shape.contains
+    def timed():
+        for x, y in points:
+            contains(x, y)
+    return timed
+
+
+@benchmark('shapes', unit='%d points' % POINTS)
+def rectangleContains():
+    """Tests points against a GRectangle"""
+    shape = game2d.GRectangle(x=100, y=100, width=58, height=11)
+    return _timeContains(shape, _points(100, 100, 58, 11))
+
+
+@benchmark('shapes', unit='%d points' % POINTS)
+def ellipseContains():
+    """Tests points against a GEllipse"""
+    shape = game2d.GEllipse(x=100, y=100, width=18, height=18)
+    return _timeContains(shape, _points(100, 100, 18, 18))
+
+
+@benchmark('shapes', [{'sides': 6}, {'sides': 32}], '%d points' % POINTS)
+def polygonContains(sides):
+    """Tests points against a regular GPolygon with the given number of sides"""
+    points = []
+    for k in range(sides):
+        angle = 2*math.pi*k/sides
+        points.extend((150+50*math.cos(angle), 150+50*math.sin(angle)))
+    shape = game2d.GPolygon(points=points)
+    return _timeContains(shape, _points(100, 100, 100, 100))
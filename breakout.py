@@ -8,6 +8,7 @@ There should not be any need for additional classes in this module.
 If you need more classes, 99% of the time they belong in either the gameplay
 module or the models module. If you are ensure about where a new class should go, 
 post a question on Piazza."""
+import random
 from constants import *
 from gameplay import *
 from game2d import *
@@ -15,7 +16,6 @@ from game2d import *
 
 # PRIMARY RULE: Breakout can only access attributes in gameplay.py via getters/setters
 # Breakout is NOT allowed to access anything in models.py
-STATE_COMPLETE = 4
 class Breakout(GameApp):
     """Instance is a Breakout App
     
@@ -34,7 +34,7 @@ class Breakout(GameApp):
     behave normally.
     
     Most of the work handling the game is actually provided in the class Gameplay.
-    Gameplay should have a minimum of two methods: updatePaddle(touch) which moves
+    Gameplay should have a minimum of two methods: updatePaddle(events) which moves
     the paddle, and updateBall() which moves the ball and processes all of the
     game physics. This class should simply call that method in update().
     
@@ -42,13 +42,31 @@ class Breakout(GameApp):
     game started, paused, completed, etc. It keeps track of that in an attribute
     called _state.
     
+    The states form a state machine, given by two tables.  STATES maps each
+    state to its three helper methods: enter (called when the state starts),
+    update (called by every update while in the state) and exit (called when
+    the state ends); any of them may be None.  TRANSITIONS maps a pair (state,
+    event) to the next state.  The events are
+    
+        'click': the player released the mouse button
+        'serve': the countdown ran out
+        'miss':  the ball fell off the bottom, and there are tries left
+        'lose':  the ball fell off the bottom, and there are no tries left
+        'win':   the last brick was broken
+    
+    An event with no entry for the current state is ignored.  Timed events
+    (the countdown) come from a TimerQueue that runs on game time.
+    
+    Nothing moves in the states that wait for a click, so FRAME_RATES lowers
+    the frame rate in those states to IDLE_FPS.  A click still gets through
+    straight away, because GameApp draws at the full rate on any input.
+    
     INSTANCE ATTRIBUTES:
         view    [Immutable instance of GView, it is inherited from GameApp]:
             the game view, used in drawing (see examples from class)
-        _state  [one of STATE_INACTIVE, STATE_COUNTDOWN, STATE_PAUSED, STATE_ACTIVE]:
+        _state  [one of STATE_INACTIVE, STATE_COUNTDOWN, STATE_PAUSED, STATE_ACTIVE,
+                 STATE_COMPLETE]:
             the current state of the game represented a value from constants.py
-        _last   [GPoint, or None if mouse button is not pressed]:
-            the last mouse position (if Button was pressed)
         _game   [GModel, or None if there is no game currently active]: 
             the game controller, which manages the paddle, ball, and bricks
         
@@ -59,14 +77,36 @@ class Breakout(GameApp):
     need to be documented here.
     
     LIST MORE ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
-        _mssg [GLabel or None if gamestate is not STATE_INACTIVE]
-            GLabel message to be displayed on screen
-        _countdown [0<int<180]:
-            counts number of frames elapsed since _state changed to STATE_COUNTDOWN
+        _mssg [tuple (x, y, text), or None if _state is STATE_COUNTDOWN or STATE_ACTIVE]
+            the message to be displayed on screen, and where
+        _label [GLabel, or None if _mssg has not been drawn since it changed]
+            the GLabel showing _mssg; it is only made by draw, so that update
+            never needs Kivy (a replay runs without it)
+        _timers [TimerQueue]:
+            the timers of the game; its clock is the game time, advanced by
+            the dt of every update
+        _countdown [timer handle of _timers, or None if _state is not STATE_COUNTDOWN]:
+            the timer that serves the ball at the end of the countdown
+        _entered [float >= 0]:
+            the game time at which the current state started
+        _seeds [random.Random]:
+            the stream, seeded with the session seed, that seeds every new Gameplay
     """
     
     # DO NOT MAKE A NEW INITIALIZER!
     
+    #: the sounds to load before the game starts (see GameApp.audio)
+    SOUNDS = GAME_SOUNDS
+    
+    # GETTERS
+    def getState(self):
+        """Returns the current state of the game (one of the STATE constants)"""
+        return self._state
+    
+    def getStateTime(self):
+        """Returns the seconds of game time spent in the current state"""
+        return self._timers.now - self._entered
+    
     # GAMEAPP METHODS
     def init(self):
         """Initialize the game state.
@@ -79,17 +119,17 @@ class Breakout(GameApp):
         to statisfy invariants. When done, set the _state to STATE_INACTIVE
         and create a message (in attribute _mssg) saying that the user should 
         press to play a game."""
-        
-        
-        self._last = None
         self._game = None
+        self._mssg = None
+        self._label = None
+        self._timers = TimerQueue()
+        self._countdown = None
+        self._seeds = random.Random(self.seed)
         self._state = STATE_INACTIVE
-        self._mssg = GLabel(x = GAME_WIDTH/2.25, y = GAME_HEIGHT/2, text='Press to Play')
-        self._countdown = 0
-        self.victory = Sound('victory.wav')
-
+        self._entered = self._timers.now
+        self._enterInactive()
+        self.setFrameRate(self.FRAME_RATES.get(self._state))
 
-    
     def update(self,dt):
         """Animate a single frame in the game.
         
@@ -98,51 +138,41 @@ class Breakout(GameApp):
         to read.  Some of the helper methods belong in this class, but most
         of the others belong in class Gameplay.
         
-        The first thing this method should do is to check the state of the
-        game. We recommend that you have a helper method for every single
-        state: STATE_INACTIVE, STATE_COUNTDOWN, STATE_PAUSED, STATE_ACTIVE.
-        The game does different things in each state.
+        The first thing this method does is move the game clock forward by
+        dt, firing any timers that are due.  Then it calls the update helper
+        of the current state (from STATES), and only that one.  The states are
         
-        In STATE_INACTIVE, the method checks to see if the player clicks
-        the mouse (_last is None, but view.touch is not None). If so, it 
-        (re)starts the game and switches to STATE_COUNTDOWN.
+        In STATE_INACTIVE, the game waits for the player to click the mouse
+        (release the button; see view.events).  Then it starts a game
+        and switches to STATE_COUNTDOWN.
         
         STATE_PAUSED is similar to STATE_INACTIVE. However, instead of 
-        restarting the game, it simply switches to STATE_COUNTDOWN.
+        starting a new game, it continues the current one.
         
-        In STATE_COUNTDOWN, the game counts down until the ball is served.
-        The player is allowed to move the paddle, but there is no ball.
-        Paddle movement should be handled by class Gameplay (NOT in this class).
-        This state should delay at least one second.
+        In STATE_COUNTDOWN, the game waits COUNTDOWN_SECONDS of game time
+        until the ball is served.  The player is allowed to move the paddle,
+        but there is no ball.
         
         In STATE_ACTIVE, the game plays normally.  The player can move the
         paddle and the ball moves on its own about the board.  Both of these
-        should be handled by methods inside of class Gameplay (NOT in this class).
-        Gameplay should have methods named updatePaddle and updateBall.
+        are handled by the methods updatePaddle and updateBall in Gameplay.
         
         While in STATE_ACTIVE, if the ball goes off the screen and there
         are tries left, it switches to STATE_PAUSED.  If the ball is lost 
         with no tries left, or there are no bricks left on the screen, the
-        game is over and it switches to STATE_INACTIVE.  All of these checks
-        should be in Gameplay, NOT in this class.
+        game is over and it switches to STATE_COMPLETE.
         
-        You are allowed to add more states if you wish. Should you do so,
-        you should describe them here.
+        STATE_COMPLETE shows whether the game was won or lost.  A click
+        starts a new game with a countdown.
         
-        Precondition: dt is the time since last update (a float).  This
-        parameter can be safely ignored. It is only relevant for debugging
-        if your game is running really slowly. If dt > 0.5, you have a 
-        framerate problem because you are trying to do something too complex."""
-
-        self.inactiveToCountdown()
-        self.startGame()
-        self.startCountdown()
-        self.countdownToActive()
-        self.giveCredits()
-        self.updateGame()
-        self.pauseToCountdown()
-        self.startNewGame()
-        self._last = self.view.touch
+        Precondition: dt is the fixed simulation step (a float), 1/physics
+        seconds.  GameApp calls this method at a fixed rate, independent of
+        the drawing rate, so the ball moves the same distance per call on any
+        machine.  draw() then interpolates between the last two updates."""
+        self._timers.advance(dt)
+        handler = self.STATES[self._state][1]
+        if not handler is None:
+            handler(self)
         
         
     def draw(self):
@@ -157,109 +187,130 @@ class Breakout(GameApp):
         add getters for these attributes or you need to add a draw method
         to class Gameplay.  We suggest the latter.  See the example 
         subcontroller.py from class."""
-        if self._state == STATE_INACTIVE:
-            self._mssg.draw(self.view)
-        elif self._state == STATE_COMPLETE:
-            self._mssg.draw(self.view)
-        elif self._state == STATE_PAUSED:
-            self._mssg.draw(self.view)
+        if self._mssg is None:
+            self._game.draw(self.view, self.alpha)
         else:
-            self._game.draw(self.view)
+            if self._label is None:
+                x, y, text = self._mssg
+                self._label = GLabel(x = x, y = y, text = text)
+            self._label.draw(self.view)
             
 
+    # HELPER METHODS FOR THE STATE MACHINE
+    def fire(self, event):
+        """Changes the state as the event calls for, and returns True if it did
+        
+        The exit helper of the old state is called, and then the enter helper
+        of the new one, and the frame rate is set for the new state (see
+        FRAME_RATES).  If the event means nothing in the current state,
+        nothing happens.
+        
+            Parameter event: the event
+            Precondition: event is a string"""
+        state = self.TRANSITIONS.get((self._state, event))
+        if state is None:
+            return False
+        exit = self.STATES[self._state][2]
+        if not exit is None:
+            exit(self)
+        self._state = state
+        self._entered = self._timers.now
+        enter = self.STATES[state][0]
+        if not enter is None:
+            enter(self)
+        self.setFrameRate(self.FRAME_RATES.get(state))
+        return True
+    
+    def _clicked(self):
+        """Returns True if the mouse button was released since the last update"""
+        for event in self.view.events:
+            if event.kind == TOUCH_UP:
+                return True
+        return False
+    
+    def _show(self, x, y, text):
+        """Sets the message to show at (x, y); its GLabel is made when it is drawn"""
+        self._mssg = (x, y, text)
+        self._label = None
+    
     # HELPER METHODS FOR THE STATES GO HERE
-    def inactiveToCountdown(self):
-        """Changes state from inactive to countdown when screen is clicked"""
-        if self._state == STATE_INACTIVE:
-                if self.view.touch == None and self._last != None:
-                    self._state = STATE_COUNTDOWN
-    
-    def startGame(self):
-        """Checks if state is not inactive and no game created, starts game and paddle if so"""
-        if self._state != STATE_INACTIVE and self._game == None:
-            self._game = Gameplay()
-        if self._state != STATE_INACTIVE:
-            self._game.updatePaddle(self.view.touch, self._last)
-
-    def startCountdown(self):
-        """starts countdown to start of game""" 
-        if self._state == STATE_COUNTDOWN:
-            while self._countdown < 1000:
-                self._countdown += 1
-
-
-
-    def countdownToActive(self):
-        """checks if countdown is over, starts game, changes state to active"""
-        if self._state == STATE_COUNTDOWN and self._countdown == 1000:
-            self._state = STATE_ACTIVE
-            self._countdown = 0
-    
-    
-    def giveCredits(self):
-        """Gives lives if game is starting up"""
-        if self._state == STATE_ACTIVE and self._game.getTries == 0:
-            self._state = STATE_INACTIVE    
-            self._game = None
-            self._game.setTries(NUMBER_TURNS)
-            
-    def checkLives(self):
-        """Checks if any lives are left. If not, changes state to complete and displays Game Over Glabel"""
-        if self._game.getTries() <= 0:
-            self._state = STATE_COMPLETE
-            #make a label that says game over, click to restart
-            self._mssg = GLabel(x = GAME_WIDTH/3, y = GAME_HEIGHT/2.0, text='Lol, noob. Click to Start Again')
-            self.draw()
-    
-    
-    def checkWin(self):
-        """Checks if all bricks are cleared, draws a win Glabel and changes state to Complete if so"""
-        if self._game.checkBricks() == []:
-            self._state = STATE_COMPLETE
-            self.victory.play()
-            self._game.refreshBricks(self.view)
-            self._mssg = GLabel(x = GAME_WIDTH/4.5, y = GAME_HEIGHT/2.0, text='Congrats, you win! Click to Play Again')
-            self.draw()
-            self._last = None
-            self._game = None
-            self._state = STATE_INACTIVE
-            self.update(0.4)
-            self._countdown = 0
-
+    def _enterInactive(self):
+        """Shows the message to start playing"""
+        self._show(GAME_WIDTH/2.25, GAME_HEIGHT/2, 'Press to Play')
     
-    def updateGame(self):
-        """Updates movement of ball, also checks if all bricks are cleared and pauses game when ball hits bottom
-            Changes state to pause and puts lives left on screen"""
-        if self._state == STATE_ACTIVE:
-            if self._game.detectFail():
-                self._game.newBall()
-                self._state = STATE_PAUSED
-                self._game.setTries(self._game.getTries() - 1)
-                self._mssg = GLabel(x = GAME_WIDTH/3.5, y = GAME_HEIGHT/2.0, text= str(self._game.getTries()) + (' Lives Left. Click to Continue'))
-                self.draw()
-                self.checkLives()
-                
-            else:
-                self._game.updateBall()
-                self.checkWin()
-    
-    def pauseToCountdown(self):
-        """Allows the user to click and restart game after losing a life"""
-        if self.view.touch == None and self._last != None:
-            self._state = STATE_COUNTDOWN
-    
-    def startNewGame(self):
-        """Checks if game is complete, then allows a click to restart the game, refreshes bricks, lives, etc."""
-        if self._state == STATE_COMPLETE and self._game.checkBricks() != []:
-            self.lose = Sound('lose.wav')
-            self.lose.play()
-            self._game.refreshBricks(self.view)
-            self._last = None
-            self._game = None
-            self._state = STATE_INACTIVE
-            self.update(0.4)
-            self._mssg = GLabel(x = GAME_WIDTH/5, y = GAME_HEIGHT/2, text='Lol, noob. Tap the Mouse to Play Again.')
-            self._countdown = 0
-
+    def _updateWaiting(self):
+        """Waits for a click (in STATE_INACTIVE or STATE_COMPLETE)"""
+        if self._clicked():
+            self.fire('click')
+    
+    def _enterCountdown(self):
+        """Starts a game if there is none, and the timer to serve the ball"""
+        self._mssg = None
+        self._label = None
+        if self._game is None:
+            self._game = Gameplay(sounds=self.audio, seed=self._seeds.getrandbits(32))
+        self._countdown = self._timers.schedule(COUNTDOWN_SECONDS, self.fire, 'serve')
+    
+    def _updatePaddle(self):
+        """Moves the paddle with the mouse (in STATE_COUNTDOWN)"""
+        self._game.updatePaddle(self.view.events)
+    
+    def _exitCountdown(self):
+        """Stops the countdown timer, if it has not fired"""
+        self._timers.cancel(self._countdown)
+        self._countdown = None
+    
+    def _updateActive(self):
+        """Moves the paddle and the ball, and checks for a lost ball or a win"""
+        self._game.updatePaddle(self.view.events)
+        if self._game.detectFail():
+            self._game.loseLife()
+            self.fire('lose' if self._game.isLost() else 'miss')
+        else:
+            self._game.updateBall()
+            if self._game.isWon():
+                self.fire('win')
+    
+    def _enterPaused(self):
+        """Shows the number of lives left"""
+        self._show(GAME_WIDTH/3.5, GAME_HEIGHT/2.0, str(self._game.getTries()) + (' Lives Left. Click to Continue'))
+    
+    def _updatePaused(self):
+        """Moves the paddle, and waits for a click to continue"""
+        self._game.updatePaddle(self.view.events)
+        if self._clicked():
+            self.fire('click')
+    
+    def _enterComplete(self):
+        """Plays the sound and shows the message for a won or lost game"""
+        if self._game.isWon():
+            self.audio.play('victory')
+            self._show(GAME_WIDTH/4.5, GAME_HEIGHT/2.0, 'Congrats, you win! Click to Play Again')
+        else:
+            self.audio.play('lose')
+            self._show(GAME_WIDTH/5, GAME_HEIGHT/2, 'Lol, noob. Tap the Mouse to Play Again.')
+    
+    def _exitComplete(self):
+        """Throws away the finished game, so that a new one is started"""
+        self._game = None
+    
+    #: the (enter, update, exit) helpers of each state (see the class docstring)
+    STATES = {STATE_INACTIVE:  (_enterInactive,  _updateWaiting, None),
+              STATE_COUNTDOWN: (_enterCountdown, _updatePaddle,  _exitCountdown),
+              STATE_ACTIVE:    (None,            _updateActive,  None),
+              STATE_PAUSED:    (_enterPaused,    _updatePaused,  None),
+              STATE_COMPLETE:  (_enterComplete,  _updateWaiting, _exitComplete)}
+    
+    #: the next state for each (state, event) pair (see the class docstring)
+    TRANSITIONS = {(STATE_INACTIVE,  'click'): STATE_COUNTDOWN,
+                   (STATE_COUNTDOWN, 'serve'): STATE_ACTIVE,
+                   (STATE_ACTIVE,    'miss'):  STATE_PAUSED,
+                   (STATE_ACTIVE,    'lose'):  STATE_COMPLETE,
+                   (STATE_ACTIVE,    'win'):   STATE_COMPLETE,
+                   (STATE_PAUSED,    'click'): STATE_COUNTDOWN,
+                   (STATE_COMPLETE,  'click'): STATE_COUNTDOWN}
     
-    
\ No newline at end of file
+    #: the frame rate of each state that does not draw at the full rate
+    FRAME_RATES = {STATE_INACTIVE: IDLE_FPS,
+                   STATE_PAUSED:   IDLE_FPS,
+                   STATE_COMPLETE: IDLE_FPS}
@@ -51,6 +51,12 @@ ROW_COLORS = (([colormodel.RED]*2)+([colormodel.ORANGE]*2)+
 
 #: the diameter of the ball in pixels
 BALL_DIAMETER = 18
+#: the most collisions the ball resolves in a single frame
+MAX_BOUNCES   = 8
+#: the number of balls a game makes up front (it can have this many in play)
+BALL_POOL     = 16
+#: the range of horizontal speeds of the extra balls served by addBalls
+MULTIBALL_SPEED = (4.0, 12.0)
 
 ### GAME CONSTANTS ###
 
@@ -64,8 +70,21 @@ STATE_COUNTDOWN = 1
 STATE_PAUSED    = 2
 #: state when the ball is in play and being animated
 STATE_ACTIVE    = 3
-#: state when the game is over
-#STATE_COMPLETE = 4
+#: state when the game is over (won or lost)
+STATE_COMPLETE  = 4
+#: the seconds to count down before the ball is served
+COUNTDOWN_SECONDS = 1.0
+#: the frame rate while the game waits for a click (0 draws only on input)
+IDLE_FPS = 0
+
+### SOUND CONSTANTS ###
+
+#: the sounds used by the game, as names mapped to files in Sounds
+GAME_SOUNDS = {'music':     'gamemusic.wav',
+               'bounce':    'bounce.wav',
+               'explosion': 'explosion.wav',
+               'lose':      'lose.wav',
+               'victory':   'victory.wav'}
 
 ### USE COMMAND LINE ARGUMENTS TO CHANGE NUMBER OF BRICKS IN ROW"""
 """sys.argv is a list of the command line arguments when you run
@@ -0,0 +1,318 @@
+# env.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""Training environments for Breakout
+
+This module wraps a headless Gameplay in the reset/step interface used to train
+controllers (the interface of an OpenAI Gym environment).  BreakoutEnv is a single
+game; VectorEnv steps several games per call.  Neither opens a window or plays a
+sound, so they run anywhere that numpy does.
+
+An action is one of the paddle moves in BreakoutEnv.ACTIONS: stay, left or right.
+The reward for a step is the number of bricks broken, minus one if a life was lost.
+An observation comes in one of two forms:
+
+    'state': a float vector with the ball position and velocity, the paddle
+    position and the tries left (see STATE_FIELDS, all scaled to about 0..1),
+    followed by one entry per brick slot that is 1 if the brick is still there.
+
+    'grid':  a 3 x gh x gw occupancy grid of the screen, downsampled to cells of
+    GAME_WIDTH/gw by GAME_HEIGHT/gh pixels.  The channels are the bricks, the
+    paddle and the ball; a cell is 1 if any part of one overlaps it.
+
+Observations are written into an array made when the environment is made, and
+step and reset return that same array.  So stepping allocates nothing, but an
+observation must be copied if it is needed after the next step."""
+import numpy
+from constants import *
+from gameplay import *
+
+
+#: the entries at the start of a 'state' observation, before the brick slots
+STATE_FIELDS = ('ball_x', 'ball_y', 'ball_vx', 'ball_vy', 'paddle_x', 'tries')
+
+#: the speed used to scale the ball velocity in a 'state' observation
+_SPEED_SCALE = 15.0
+
+
+class BreakoutEnv(object):
+    """An instance is a single game of Breakout to train on.
+
+    Call reset to start a game, then step with an action until it returns done.
+    A game is done when it is won or lost, or after max_frames steps.
+
+    INSTANCE ATTRIBUTES:
+        _rows, _cols [int > 0]: the size of the brick wall
+        _mode  [str]: the observation form, 'state' or 'grid'
+        _speed [float > 0]: the pixels the paddle moves for a left or right action
+        _max_frames [int > 0, or None]: the most steps in a game
+        _game  [Gameplay, or None before the first reset]: the current game
+        _frames [int >= 0]: the steps taken in the current game
+        _obs   [float32 array]: the observation buffer returned by step and reset
+        _mask  [float32 array, length _rows*_cols]: 1 for every brick still in
+            the wall, indexed by slot (row*cols+column); part of _obs in 'state' form
+        _count [int >= -1]: the number of bricks in the wall when _mask was built
+            (-1 if it must be rebuilt)
+        _tries [int >= 0]: the tries left after the last step
+        _cells [int array]: with _slots, the pairs (grid cell, brick slot) where
+            a brick overlaps a grid cell ('grid' form only)
+        _slots [int array]: see _cells
+        _bricks [float32 array, gh x gw]: the brick channel of the grid, rebuilt
+            only when a brick is broken ('grid' form only)
+    """
+
+    #: the paddle moves: stay, left and right
+    ACTIONS = (0, -1, 1)
+
+    @property
+    def observation_shape(self):
+        """The shape of the observations.
+
+        **Invariant**: Immutable tuple of ints."""
+        return self._obs.shape
+
+    @property
+    def game(self):
+        """The current game, or None before the first reset.
+
+        **Invariant**: A Gameplay or None."""
+        return self._game
+
+    def __init__(self, rows=BRICK_ROWS, cols=BRICKS_IN_ROW, obs='state', grid=(31, 24),
+                 speed=10.0, max_frames=10000, out=None):
+        """Initializes an environment; call reset to start the first game
+
+            Parameters rows, cols: the size of the brick wall
+            Precondition: rows and cols are ints > 0
+
+            Parameter obs: the observation form
+            Precondition: obs is 'state' or 'grid'
+
+            Parameter grid: the size (gh, gw) of the grid for 'grid' observations
+            Precondition: grid is a tuple of two ints > 0
+
+            Parameter speed: the pixels the paddle moves per left or right action
+            Precondition: speed is a number > 0
+
+            Parameter max_frames: the most steps per game, or None for no limit
+            Precondition: max_frames is None or an int > 0
+
+            Parameter out: the array to write observations to, or None to make one
+            Precondition: out is None or a float32 array of observation_shape"""
+        assert obs in ('state', 'grid'), `obs`+' is not an observation form'
+        self._rows = rows
+        self._cols = cols
+        self._mode = obs
+        self._speed = float(speed)
+        self._max_frames = max_frames
+        self._game = None
+        self._frames = 0
+        self._count = 0
+        self._tries = 0
+
+        if obs == 'state':
+            shape = (len(STATE_FIELDS)+rows*cols,)
+        else:
+            shape = (3,)+tuple(grid)
+        if out is None:
+            out = numpy.zeros(shape, dtype=numpy.float32)
+        assert out.shape == shape and out.dtype == numpy.float32, 'out has the wrong shape or type'
+        self._obs = out
+
+        if obs == 'state':
+            self._mask = self._obs[len(STATE_FIELDS):]
+        else:
+            self._mask = numpy.zeros(rows*cols, dtype=numpy.float32)
+            self._bricks = numpy.zeros(grid, dtype=numpy.float32)
+            self._makeRaster(BrickWall(rows, cols).getBrickList())
+
+    def _makeRaster(self, bricks):
+        """Finds the grid cells under each brick in the list bricks"""
+        cells = []
+        slots = []
+        for brick in bricks:
+            rows, cols = self._cellRange(brick.left, brick.bottom, brick.right, brick.top)
+            for i in rows:
+                for j in cols:
+                    cells.append(i*self._obs.shape[2]+j)
+                    slots.append(brick.slot)
+        self._cells = numpy.array(cells, dtype=int)
+        self._slots = numpy.array(slots, dtype=int)
+
+    def _cellRange(self, left, bottom, right, top):
+        """Returns the ranges of grid rows and columns overlapping the rectangle.
+        Grid row 0 is the top of the screen."""
+        gh, gw = self._obs.shape[1:]
+        ch = float(GAME_HEIGHT)/gh
+        cw = float(GAME_WIDTH)/gw
+        imin = max(int((GAME_HEIGHT - top)/ch), 0)
+        imax = min(int((GAME_HEIGHT - bottom)/ch), gh-1)
+        jmin = max(int(left/cw), 0)
+        jmax = min(int(right/cw), gw-1)
+        return (range(imin, imax+1), range(jmin, jmax+1))
+
+
+    # ENVIRONMENT METHODS
+    def reset(self, seed=None):
+        """Starts a new game and returns its first observation
+
+            Parameter seed: the seed of the game, or None to pick one
+            Precondition: seed is None or an int >= 0"""
+        self._game = Gameplay(rows=self._rows, cols=self._cols, seed=seed)
+        self._frames = 0
+        self._tries = self._game.getTries()
+        self._count = -1
+        self._observe()
+        return self._obs
+
+    def step(self, action):
+        """Moves the paddle by action, plays one frame, and returns the tuple
+        (observation, reward, done, info)
+
+        info is a dict with the frames, tries and bricks left in the game.
+
+            Parameter action: the paddle move
+            Precondition: action is an index into ACTIONS"""
+        game = self._game
+        count = game.getBrickCount()
+        game.movePaddle(self.ACTIONS[action]*self._speed)
+        playing = game.step()
+        self._frames += 1
+
+        tries = game.getTries()
+        reward = float(count - game.getBrickCount())
+        if tries < self._tries:
+            reward -= 1.0
+        self._tries = tries
+        done = not playing or (not self._max_frames is None and self._frames >= self._max_frames)
+        self._observe()
+        return (self._obs, reward, done,
+                {'frames': self._frames, 'tries': tries, 'bricks': game.getBrickCount()})
+
+    def isDone(self):
+        """Returns True if the current game is over (or there is none)"""
+        if self._game is None:
+            return True
+        return (self._game.isWon() or self._game.isLost() or
+                (not self._max_frames is None and self._frames >= self._max_frames))
+
+
+    # HELPER METHODS FOR OBSERVATIONS
+    def _observe(self):
+        """Writes the observation of the current game to _obs"""
+        game = self._game
+        if game.getBrickCount() != self._count:
+            self._count = game.getBrickCount()
+            bits = numpy.frombuffer(game.getWall().getBits(), dtype=numpy.uint8)
+            self._mask[:] = numpy.unpackbits(bits)[:len(self._mask)]
+            if self._mode == 'grid':
+                self._bricks.fill(0)
+                self._bricks.ravel()[self._cells[self._mask[self._slots] > 0]] = 1
+
+        ball = game.getBall()
+        paddle = game.getPaddle()
+        if self._mode == 'state':
+            obs = self._obs
+            obs[0] = ball.x/GAME_WIDTH
+            obs[1] = ball.y/GAME_HEIGHT
+            obs[2] = ball.getXVelocity()/_SPEED_SCALE
+            obs[3] = ball.getYVelocity()/_SPEED_SCALE
+            obs[4] = float(paddle.x)/GAME_WIDTH
+            obs[5] = float(game.getTries())/NUMBER_TURNS
+        else:
+            self._obs[0] = self._bricks
+            self._obs[1:].fill(0)
+            for channel, body in ((1, paddle), (2, ball)):
+                rows, cols = self._cellRange(body.left, body.bottom, body.right, body.top)
+                if len(rows) and len(cols):
+                    self._obs[channel, rows[0]:rows[-1]+1, cols[0]:cols[-1]+1] = 1
+
+
+class VectorEnv(object):
+    """An instance steps several BreakoutEnv games with one call.
+
+    The observations of all of the games are rows of one array, and the rewards
+    and done flags are arrays too.  All three are made once, and every call to
+    step or reset writes into them and returns them.  A game that is done is
+    reset straight away with the next seed, so the row for that game already
+    holds the first observation of the next game (the final observation of the
+    finished game is lost, as in most vectorized environments).
+
+    INSTANCE ATTRIBUTES:
+        _envs    [list of BreakoutEnv]: the games, one per row of _obs
+        _obs     [float32 array]: the observations, one row per game
+        _rewards [float32 array]: the last reward of each game
+        _dones   [bool array]: whether each game ended on the last step
+        _seeds   [int, or None]: the next seed to reset a game with; None picks
+            a new seed every time
+    """
+
+    @property
+    def observation_shape(self):
+        """The shape of the observation of one game.
+
+        **Invariant**: Immutable tuple of ints."""
+        return self._obs.shape[1:]
+
+    @property
+    def envs(self):
+        """The games, in row order.
+
+        **Invariant**: Immutable list of BreakoutEnv."""
+        return self._envs
+
+    def __init__(self, size, **keywords):
+        """Initializes size environments; call reset to start them
+
+            Parameter size: the number of games
+            Precondition: size is an int > 0
+
+        The other keywords are passed to every BreakoutEnv (except out)."""
+        first = BreakoutEnv(**keywords)
+        self._obs = numpy.zeros((size,)+first.observation_shape, dtype=numpy.float32)
+        self._rewards = numpy.zeros(size, dtype=numpy.float32)
+        self._dones = numpy.zeros(size, dtype=bool)
+        self._envs = [BreakoutEnv(out=self._obs[k], **keywords) for k in range(size)]
+        self._seeds = None
+
+    def __len__(self):
+        """Returns the number of games"""
+        return len(self._envs)
+
+    def reset(self, seed=None):
+        """Starts a new game in every environment and returns the observations
+
+        With a seed, the games get the seeds seed, seed+1, ..., and every game
+        reset after that gets the next seed in turn.
+
+            Parameter seed: the first seed, or None to pick every seed at random
+            Precondition: seed is None or an int >= 0"""
+        self._seeds = seed
+        for env in self._envs:
+            env.reset(self._nextSeed())
+        self._rewards.fill(0)
+        self._dones.fill(False)
+        return self._obs
+
+    def step(self, actions):
+        """Applies one action to every game and returns (observations, rewards, dones)
+
+            Parameter actions: the action for each game
+            Precondition: actions is a sequence of len(self) indices into
+            BreakoutEnv.ACTIONS"""
+        for k in range(len(self._envs)):
+            env = self._envs[k]
+            obs, reward, done, info = env.step(actions[k])
+            self._rewards[k] = reward
+            self._dones[k] = done
+            if done:
+                env.reset(self._nextSeed())
+        return (self._obs, self._rewards, self._dones)
+
+    def _nextSeed(self):
+        """Returns the seed for the next game to be reset"""
+        if self._seeds is None:
+            return None
+        seed = self._seeds
+        self._seeds += 1
+        return seed
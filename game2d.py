@@ -6,49 +6,52 @@
 This module provides all of the classes that are to use (or subclass) 
 to create your game. DO NOT MODIFY THE CODE IN THIS FILE.  See the
 online documentation in Assignment 6 for more guidance.  It includes
-information not displayed in this module."""
+information not displayed in this module.
 
-# Basic Kivy Modules
-import kivy
-import kivy.app
-import kivy.uix.label
+Kivy, NumPy and pygame are slow to import, so this module does not import them
+when it is loaded.  Kivy is imported when the first shape or view is made (or the
+game is run), NumPy when a shape first needs it, and the sound mixer is started
+when the first sound is loaded.  Set the environment variable GAME2D_STARTUP to
+have each of these steps, and the time to the first frame, reported on stderr
+as it happens; `startupReport()` returns the same timings.
 
-# Lower-level kivy modules to support animation
-from kivy.config import *
-from kivy.clock import Clock
-from kivy.graphics import *
-from kivy.graphics.instructions import *
-from kivy.config import Config
+A running game can also be profiled frame by frame (see `FrameProfiler`).  Set
+GAME2D_PROFILE to a file name to save the profile there when the game stops, and
+GAME2D_HUD to show it on screen.  Set GAME2D_LATENCY to a file name to measure
+the delay from mouse input to the screen (see `LatencyMonitor`) and save it there."""
 
-# Widgets necessary for some technical workarounds
-from kivy.uix.floatlayout import FloatLayout
-from kivy.uix.label import Label
-
-# Additional miscellaneous modules
+# Standard modules (Kivy, NumPy and pygame are imported on first use)
 import os
 import os.path
-import numpy
+import copy
+import heapq
+import math
 import random
+import struct
 import colormodel
-import pygame.mixer
+import collections
 import sys
+import time
+import assets
+
+#: when this module started loading, for the startup report
+_LOADED = time.time()
 
 # User-defined resources
 FONT_PATH  = str(os.path.join(os.path.dirname(__file__), 'Fonts'))
 SOUND_PATH = str(os.path.join(os.path.dirname(__file__), 'Sounds'))
 IMAGE_PATH = str(os.path.join(os.path.dirname(__file__), 'Images'))
 
-import kivy.resources
-kivy.resources.resource_add_path(FONT_PATH)
-kivy.resources.resource_add_path(SOUND_PATH)
-kivy.resources.resource_add_path(IMAGE_PATH)
+# Archives with the contents of the resource folders, used for any file that is
+# not in the folder itself (see module assets)
+FONT_PACK  = FONT_PATH+'.zip'
+IMAGE_PACK = IMAGE_PATH+'.zip'
 
-# Initialize the sound engine.
+# Settings for the sound engine (started by the first sound).
 FREQUENCY = 44100
 BITSIZE   = -16
 CHANNELS  = 2
 BUFFER    = 1024
-pygame.mixer.init(FREQUENCY,BITSIZE,CHANNELS,BUFFER)
 
 #### CONSTANTS ####
 
@@ -62,11 +65,136 @@ CACHE_SOURCE = 4
 # LINE SIZE
 LINE_SIZE = 1
 
+# Most rectangles in one batch Mesh (Kivy mesh indices are 16 bit)
+BATCH_SIZE = 16383
+
+# The kinds of TouchEvent, and the most events a GView queues between updates
+TOUCH_DOWN  = 'down'
+TOUCH_MOVE  = 'move'
+TOUCH_UP    = 'up'
+TOUCH_KINDS = (TOUCH_DOWN, TOUCH_MOVE, TOUCH_UP)
+EVENT_QUEUE = 256
+
+# Most bytes of rendered text kept by the shared LabelCache
+LABEL_CACHE_BYTES = 8*1024*1024
+
+# The environment variable that turns on the startup report
+STARTUP_REPORT = 'GAME2D_STARTUP'
+
+# Seconds a GameApp keeps drawing at its full rate after the last input, when
+# it has lowered its frame rate (see GameApp.setFrameRate)
+WAKE_SECONDS = 0.5
+
+# Frames kept by a FrameProfiler, and how often (in frames) the HUD is redone
+PROFILE_FRAMES = 600
+HUD_FRAMES     = 30
+
+# The environment variables that turn on the profiler (naming the file to
+# dump it to when the game stops) and the on-screen display
+PROFILE_REPORT = 'GAME2D_PROFILE'
+PROFILE_HUD    = 'GAME2D_HUD'
+
+# The histogram bins of a LatencyMonitor (the last is open-ended), their width in
+# milliseconds, and the environment variable that turns the monitor on (naming
+# the file to dump it to when the game stops)
+LATENCY_BINS   = 201
+LATENCY_WIDTH  = 1.0
+LATENCY_REPORT = 'GAME2D_LATENCY'
+
+
+#### LAZY IMPORTS ####
+
+# The timed startup steps, as (name, seconds) pairs
+_STARTUP = []
+
+def _startupStep(name, start):
+    """Records that the startup step name, begun at time start, is done.
+    
+    If the environment variable STARTUP_REPORT is set, the step is also
+    written to stderr, with the time since this module started loading."""
+    now = time.time()
+    _STARTUP.append((name, now-start))
+    if os.environ.get(STARTUP_REPORT):
+        sys.stderr.write('game2d: %-20s %8.1f ms  (%.1f ms since import)\n' %
+                         (name, 1000*(now-start), 1000*(now-_LOADED)))
+
+
+def startupReport():
+    """**Returns**: the list of the (name, seconds) startup steps so far.
+    
+    The steps are the imports of this module, Kivy, NumPy and pygame, the
+    start of the sound mixer, and the first frame of the game, in the order
+    they happened.  Steps that have not happened yet (e.g. the mixer, if no
+    sound was played) are missing."""
+    return list(_STARTUP)
+
+
+def _require_kivy():
+    """Imports Kivy, the first time it is called.
+    
+    This makes the Kivy names used in this module (Color, Rectangle, Clock,
+    FloatLayout, ...) global, and adds our resource folders to Kivy."""
+    global kivy, Clock, Config, FloatLayout, CoreLabel
+    global Color, Ellipse, InstructionGroup, Line, Mesh, Rectangle
+    if 'Rectangle' in globals():
+        return
+    start = time.time()
+    import kivy
+    import kivy.resources
+    from kivy.config import Config
+    _startupStep('import kivy', start)
+    
+    start = time.time()
+    from kivy.graphics import Color, Ellipse, InstructionGroup, Line, Mesh, Rectangle
+    _startupStep('import kivy.graphics', start)
+    
+    start = time.time()
+    import kivy.app
+    from kivy.clock import Clock
+    from kivy.core.text import Label as CoreLabel
+    from kivy.uix.floatlayout import FloatLayout
+    _startupStep('import kivy widgets', start)
+    
+    kivy.resources.resource_add_path(FONT_PATH)
+    kivy.resources.resource_add_path(SOUND_PATH)
+    kivy.resources.resource_add_path(IMAGE_PATH)
+
+
+def _require_numpy():
+    """Imports NumPy, the first time it is called"""
+    global numpy
+    if 'numpy' in globals():
+        return
+    start = time.time()
+    import numpy
+    _startupStep('import numpy', start)
+
+
+def _require_mixer():
+    """Imports pygame and starts its sound mixer, the first time it is called
+    
+    If pygame is missing this raises ImportError, and if the mixer cannot start
+    (e.g. there is no audio device) it raises pygame.error.  In either case the
+    global pygame is left unset, so the next call tries again."""
+    global pygame
+    if 'pygame' in globals():
+        return
+    start = time.time()
+    import pygame.mixer as mixer
+    _startupStep('import pygame', start)
+    
+    start = time.time()
+    mixer.init(FREQUENCY,BITSIZE,CHANNELS,BUFFER)
+    _startupStep('start mixer', start)
+    import pygame
+
+
 #### HIDDEN HELPER FUNCTIONS ####
 def  _same_side(p1, p2, a, b):
     """Return: True is p1, p2 are on the same side of segment ba.
     
     Precondition: p1, p2, a, b are all 2d tuples of int or float."""
+    _require_numpy()
     ba = numpy.append(numpy.subtract(b,a),[0])
     cp1 = numpy.cross(ba,numpy.subtract(p1,a))
     cp2 = numpy.cross(ba,numpy.subtract(p2,a))
@@ -109,7 +237,7 @@ def _is_image_file(name):
     if type(name) != str:
         return False
     
-    return os.path.exists(IMAGE_PATH+'/'+name)
+    return os.path.exists(IMAGE_PATH+'/'+name) or _in_pack(IMAGE_PACK, name)
 
 
 def _is_font_file(name):
@@ -117,7 +245,65 @@ def _is_font_file(name):
     if type(name) != str:
         return False
     
-    return os.path.exists(FONT_PATH+'/'+name)
+    return os.path.exists(FONT_PATH+'/'+name) or _in_pack(FONT_PACK, name)
+
+
+# The mounted archives, by file name (None if the archive is missing)
+_PACKS = {}
+
+def _pack(filename):
+    """Return: the AssetPack for the archive filename, mounting it on first use.
+    
+    Returns None if there is no such archive."""
+    if not filename in _PACKS:
+        if os.path.exists(filename):
+            start = time.time()
+            _PACKS[filename] = assets.AssetPack(filename)
+            _startupStep('mount '+os.path.basename(filename), start)
+        else:
+            _PACKS[filename] = None
+    return _PACKS[filename]
+
+
+def _in_pack(filename, name):
+    """Return: True if name is an asset in the archive filename"""
+    pack = _pack(filename)
+    return not pack is None and name in pack
+
+
+def _font_file(name):
+    """Return: the font name or path to give Kivy for the font file name
+    
+    A font in the Fonts folder is found by Kivy itself.  Otherwise the font
+    is extracted from the font archive, as Kivy can only load fonts from files.
+    
+    Precondition: name is a font file (see _is_font_file)"""
+    if os.path.exists(FONT_PATH+'/'+name):
+        return name
+    return _pack(FONT_PACK).extract(name)
+
+
+# The textures of the images decoded from the image archive, by name
+_TEXTURES = {}
+
+def _set_image(rect, name):
+    """Makes the Kivy Rectangle rect show the image file name (or nothing if None)
+    
+    An image in the Images folder is loaded by Kivy as the rectangle's source.
+    Otherwise it is decoded from the image archive, in memory, the first time
+    it is used, and the texture is shared by every rectangle that shows it.
+    
+    Precondition: name is None or an image file (see _is_image_file)"""
+    if name is None or os.path.exists(IMAGE_PATH+'/'+name):
+        rect.source = name
+        return
+    if not name in _TEXTURES:
+        import io
+        from kivy.core.image import Image as CoreImage
+        data = io.BytesIO(_pack(IMAGE_PACK).read(name))
+        ext = os.path.splitext(name)[1][1:].lower()
+        _TEXTURES[name] = CoreImage(data, ext=ext).texture
+    rect.texture = _TEXTURES[name]
 
 
 def _is_sound_file(name):
@@ -142,10 +328,39 @@ def Sound(filename):
     
     See the online documentation for more information."""
     assert _is_sound_file(filename), `filename`+' is not a sound file'
+    _require_mixer()
     absname = filename if os.path.isabs(filename) else str(os.path.join(SOUND_PATH, filename))
     return pygame.mixer.Sound(absname)
 
 
+class _SilentSound(object):
+    """A stand-in for a Sound whose file could not be loaded.
+    
+    It supports the parts of the pygame.mixer.Sound interface that games use,
+    but makes no noise.  The library hands these out so a missing file is
+    reported once, when it is loaded, rather than crashing the game later."""
+    
+    def play(self,*args,**keywords):
+        """Does nothing; returns None (no channel)."""
+        return None
+    
+    def stop(self):
+        """Does nothing."""
+        pass
+    
+    def set_volume(self,value):
+        """Does nothing."""
+        pass
+    
+    def get_volume(self):
+        """**Returns**: 0.0, as this sound is silent."""
+        return 0.0
+    
+    def get_length(self):
+        """**Returns**: 0.0, as this sound is empty."""
+        return 0.0
+
+
 class SoundLibrary(object):
     """Instances are a dictionary that maps sounds to Sound objects.
     
@@ -160,20 +375,44 @@ class SoundLibrary(object):
     
         soundlib['soundname'].play()
     
+    Each file is only decoded once per library, however many names refer to it,
+    and the library keeps track of how long the loading took and how much memory
+    the decoded sounds use.  If a file is missing, the library prints one warning
+    and maps its name to a silent sound instead.  If there is no sound at all
+    (pygame is missing, or the mixer cannot start), it prints one warning and
+    every sound it loads is silent.  Use `SharedSoundLibrary` to get a library
+    that is shared by the whole process.
+    
     Instance Attributes (Hidden):
-        data: Dictionary mapping sound names to sound files
+        data: Dictionary mapping sound names to sound objects
+        files: Dictionary mapping file names to sound objects
+        missing: List of the file names that could not be loaded
+        nosound: The reason the mixer could not start, or None if it started
+        loadtime: Total seconds spent loading sounds
+        nbytes: Total bytes of decoded sound data
     """
     
     def __init__(self):
         """**Constructor**: Create a new, empty sound library."""
-        if not _INITIALIZED:
-            init()
         self._data = {}
+        self._files = {}
+        self._missing = []
+        self._nosound = None
+        self._loadtime = 0.0
+        self._nbytes = 0
     
     def __len__(self):
         """**Returns**: The number of sounds in this library."""
         return len(self._data)
     
+    def __contains__(self, key):
+        """**Returns**: True if there is a sound with the given name.
+            
+            :param key: The key identifying a sound object
+            **Precondition**:: key is a string.
+        """
+        return key in self._data
+    
     def __getitem__(self, key):
         """**Returns**: The Sound object for the given sound name.
             
@@ -189,11 +428,10 @@ class SoundLibrary(object):
             **Precondition**:: key is a string.
             
             :param filename: The name of the file containing the sound source
-            **Precondition**:: filename is the name of a valid sound file.
-        
+            **Precondition**:: filename is a string.  If it is not the name of a
+            valid sound file, a warning is printed and the sound is silent.
         """
-        assert is_sound_file(filename), `filename`+' is not a sound file'
-        self._data[key] = Sound(filename)
+        self._data[key] = self._load(filename)
     
     def __delitem__(self, key):
         """Deletes the Sound object for the given sound name.
@@ -210,6 +448,994 @@ class SoundLibrary(object):
     def iterkeys(self):
         """**Returns**: The key iterator for this sound dictionary."""
         return self._data.iterkeys()
+    
+    def _load(self, filename):
+        """**Returns**: the (shared) sound object for filename, loading it if needed."""
+        if filename in self._files:
+            return self._files[filename]
+        
+        start = time.time()
+        if self._nosound is None:
+            try:
+                _require_mixer()
+            except (ImportError, RuntimeError), e: # pygame.error is a RuntimeError
+                sys.stderr.write('game2d: sound is off ('+str(e)+')\n')
+                self._nosound = str(e)
+        if not self._nosound is None:
+            sound = _SilentSound()
+        else:
+            try:
+                sound = Sound(filename)
+            except (AssertionError, pygame.error), e:
+                sys.stderr.write('game2d: could not load sound '+`filename`+' ('+str(e)+')\n')
+                self._missing.append(filename)
+                sound = _SilentSound()
+            else:
+                try:
+                    self._nbytes += len(sound.get_raw())
+                except AttributeError: # Older versions of pygame
+                    self._nbytes += int(sound.get_length()*FREQUENCY*CHANNELS*abs(BITSIZE)/8)
+        self._loadtime += time.time()-start
+        self._files[filename] = sound
+        return sound
+    
+    def play(self, key):
+        """Plays the sound with the given name right away.
+        
+            :param key: The key identifying a sound object
+            **Precondition**:: key is a string.
+        
+        This has the same effect as self[key].play().  It lets a library be used
+        wherever a `SoundScheduler` is expected."""
+        self._data[key].play()
+    
+    def preload(self, sounds):
+        """Loads every sound in the dictionary sounds into this library.
+        
+            :param sounds: Dictionary mapping sound names to file names
+            **Precondition**:: sounds is a dictionary of strings to strings.
+        
+        Names already in the library are left alone, so it is safe (and cheap)
+        to preload the same sounds again."""
+        for key in sounds:
+            if not key in self._data:
+                self[key] = sounds[key]
+    
+    def missing(self):
+        """**Returns**: A new list of the files that could not be loaded."""
+        return list(self._missing)
+    
+    def loadTime(self):
+        """**Returns**: The total seconds spent loading sounds into this library."""
+        return self._loadtime
+    
+    def memoryUsage(self):
+        """**Returns**: The total bytes of decoded sound data in this library."""
+        return self._nbytes
+    
+    def report(self):
+        """**Returns**: A one-line summary of what this library loaded."""
+        text = '%d sounds (%d files) loaded in %.3f s, %.1f KB' % (
+            len(self._data), len([sound for sound in self._files.itervalues()
+                                  if not isinstance(sound, _SilentSound)]),
+            self._loadtime, self._nbytes/1024.0)
+        if self._missing:
+            text += '; missing: '+', '.join(self._missing)
+        if not self._nosound is None:
+            text += '; sound is off: '+self._nosound
+        return text
+
+
+# The library returned by SharedSoundLibrary
+_SHARED_SOUNDS = None
+
+def SharedSoundLibrary():
+    """**Returns**: The SoundLibrary shared by the whole process.
+    
+    The library is created on the first call.  Sounds put in it stay loaded
+    for the life of the program, so a game can preload its sounds once at
+    startup and then hand out the same Sound objects every time it needs them."""
+    global _SHARED_SOUNDS
+    if _SHARED_SOUNDS is None:
+        _SHARED_SOUNDS = SoundLibrary()
+    return _SHARED_SOUNDS
+
+
+# The number of mixer channels reserved by SoundSchedulers so far (in a list, so
+# that it can be changed in place); each scheduler takes the next ones
+_SCHEDULED = [0]
+
+# The number of mixer channels always left free for sounds played directly
+_FREE_CHANNELS = 8
+
+
+class SoundScheduler(object):
+    """Instances play the sounds in a SoundLibrary through a fixed pool of channels.
+    
+    Calling play() on a pygame Sound grabs a new mixer channel every time, so a
+    burst of identical events (say, a ball clipping three bricks at once) stacks
+    up voices and can starve other sounds of channels.  A scheduler instead
+    collects the sounds requested during a frame, and plays them when `flush` 
+    is called at the end of that frame:
+    
+    * A sound requested several times in the same frame is played once.
+    * A sound never has more than its voice limit playing at the same time.
+    * Sounds only ever play on the scheduler's own channels, which are reserved
+      so that nothing else can take them.
+    
+    The method `GameApp._refresh` flushes the scheduler in `GameApp.audio` 
+    once per frame, so games only need to call `play`.
+    
+    Instance Attributes (Hidden):
+        library: The SoundLibrary with the sounds to play
+        channels: List of the pygame Channel objects in the pool
+        voices: Default voice limit for a sound
+        limits: Dictionary mapping sound names to their own voice limits
+        pending: List of the sound names requested since the last flush
+        played: Number of sounds played so far
+        coalesced: Number of requests merged with an earlier one in the same frame
+        dropped: Number of sounds not played because of a voice or channel limit
+    """
+    
+    def __init__(self, library, channels=8, voices=2):
+        """**Constructor**: Create a new scheduler for the sounds in library.
+        
+            :param library: The sounds to play
+            **Precondition**:: library is a SoundLibrary.
+            
+            :param channels: The number of mixer channels to reserve
+            **Precondition**:: channels is an int > 0.
+            
+            The mixer is given channels more channels (keeping at least
+            _FREE_CHANNELS unreserved), so sounds played directly, or through
+            a `SoundLibrary`, still find a channel.
+            
+            :param voices: The most copies of one sound that may play at once
+            **Precondition**:: voices is an int > 0.
+        """
+        assert type(channels) == int and channels > 0, `channels`+' is not a positive int'
+        assert type(voices) == int and voices > 0, `voices`+' is not a positive int'
+        _require_mixer()
+        first = _SCHEDULED[0]
+        if pygame.mixer.get_num_channels() < first+channels+_FREE_CHANNELS:
+            pygame.mixer.set_num_channels(first+channels+_FREE_CHANNELS)
+        _SCHEDULED[0] += channels
+        pygame.mixer.set_reserved(_SCHEDULED[0])
+        self._library = library
+        self._channels = [pygame.mixer.Channel(i) for i in range(first, first+channels)]
+        self._voices = voices
+        self._limits = {}
+        self._pending = []
+        self._played = 0
+        self._coalesced = 0
+        self._dropped = 0
+    
+    def setVoices(self, key, voices):
+        """Sets the voice limit for the sound with the given name.
+        
+            :param key: The key identifying a sound object
+            **Precondition**:: key is a string.
+            
+            :param voices: The most copies of this sound that may play at once
+            **Precondition**:: voices is an int > 0.
+        """
+        assert type(voices) == int and voices > 0, `voices`+' is not a positive int'
+        self._limits[key] = voices
+    
+    def play(self, key):
+        """Requests that the sound with the given name play at the end of this frame.
+        
+            :param key: The key identifying a sound object in the library
+            **Precondition**:: key is a string.
+        """
+        if key in self._pending:
+            self._coalesced += 1
+        else:
+            self._pending.append(key)
+    
+    def flush(self):
+        """Plays every sound requested since the last flush.
+        
+        Each sound is played on a free channel of the pool, unless that would
+        exceed its voice limit or every channel is busy, in which case it is
+        dropped."""
+        for key in self._pending:
+            sound = self._library[key]
+            if isinstance(sound, _SilentSound):
+                continue
+            
+            limit = self._limits.get(key, self._voices)
+            busy = 0
+            free = None
+            for channel in self._channels:
+                if not channel.get_busy():
+                    if free is None:
+                        free = channel
+                elif channel.get_sound() is sound:
+                    busy += 1
+            
+            if busy >= limit or free is None:
+                self._dropped += 1
+            else:
+                free.play(sound)
+                self._played += 1
+        self._pending = []
+    
+    def stats(self):
+        """**Returns**: A dictionary with the played, coalesced and dropped counts."""
+        return {'played': self._played, 'coalesced': self._coalesced,
+                'dropped': self._dropped}
+
+
+class _SilentScheduler(object):
+    """A stand-in for a SoundScheduler that plays nothing.
+    
+    `GameApp.audio` is one of these when the game is made with sound=False,
+    e.g. when replaying a game without a sound device."""
+    
+    def setVoices(self, key, voices):
+        """Does nothing."""
+        pass
+    
+    def play(self, key):
+        """Does nothing."""
+        pass
+    
+    def flush(self):
+        """Does nothing."""
+        pass
+    
+    def stats(self):
+        """**Returns**: A dictionary with the played, coalesced and dropped counts."""
+        return {'played': 0, 'coalesced': 0, 'dropped': 0}
+
+
+#### LABEL TEXTURES ####
+
+class LabelCache(object):
+    """Instances keep the textures of rendered text, so the same text is only
+    rendered once.
+    
+    Rendering a label lays out and rasterizes every glyph of its text, which
+    is slow next to drawing it.  A `GLabel` asks the cache for the texture
+    of its text instead of rendering it itself.  Textures are keyed by what
+    they look like -- the text, font, point size, boldness and color -- so
+    two labels with the same message share one texture, and a message that
+    comes back (like a "Click to Continue") is not rendered again.
+    
+    The cache holds at most `budget` bytes of textures (4 bytes a pixel).
+    When a new texture goes over the budget, the least recently used ones
+    are dropped.  A label still showing a dropped texture keeps it; the
+    texture is only rendered again if it is asked for again.  Use
+    `SharedLabelCache` to get the cache shared by every label.
+    
+    Instance Attributes (Hidden):
+        budget: The most bytes of textures to keep
+        data: OrderedDict mapping keys to (texture, bytes), least recent first
+        nbytes: Total bytes of the textures kept
+        hits: Number of textures found in the cache
+        misses: Number of textures rendered
+        evictions: Number of textures dropped to stay in budget
+    """
+    
+    def __init__(self, budget=LABEL_CACHE_BYTES):
+        """**Constructor**: Create a new, empty label cache.
+        
+            :param budget: The most bytes of textures to keep
+            **Precondition**:: budget is an int >= 0.
+        """
+        self._budget = budget
+        self._data = collections.OrderedDict()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+    
+    def __len__(self):
+        """**Returns**: The number of textures in this cache."""
+        return len(self._data)
+    
+    def texture(self, text, font_name=None, font_size=15, bold=False, color=(1,1,1,1)):
+        """**Returns**: The texture of text, rendering it if it is not cached.
+        
+            :param text: The text to render
+            **Precondition**:: text is a string.
+            
+            :param font_name: The font file, or None for the Kivy default font
+            **Precondition**:: font_name is None or the path of a .ttf file.
+            
+            :param font_size: The size of the text in points
+            **Precondition**:: font_size is an int or float > 0.
+            
+            :param bold: Whether the text is bold
+            **Precondition**:: bold is a bool.
+            
+            :param color: The color of the text
+            **Precondition**:: color is a 4-element tuple of floats between 0 and 1.
+        
+        The texture is None if there is nothing to draw (the text is empty)."""
+        key = (text, font_name, font_size, bold, color)
+        entry = self._data.pop(key, None)
+        if entry is None:
+            entry = self._render(text, font_name, font_size, bold, color)
+            self._misses += 1
+            self._nbytes += entry[1]
+            self._data[key] = entry
+            self._trim()
+        else:
+            self._hits += 1
+            self._data[key] = entry
+        return entry[0]
+    
+    def _render(self, text, font_name, font_size, bold, color):
+        """**Returns**: A new (texture, bytes) pair for the text, as described by texture."""
+        _require_kivy()
+        options = {'text': text, 'font_size': font_size, 'bold': bold, 'color': color}
+        if not font_name is None:
+            options['font_name'] = font_name
+        label = CoreLabel(**options)
+        label.refresh()
+        texture = label.texture
+        if texture is None:
+            return (None, 0)
+        return (texture, 4*int(texture.size[0])*int(texture.size[1]))
+    
+    def _trim(self):
+        """Drops the least recently used textures until this cache is in budget.
+        
+        The newest texture is always kept, even if it is over budget alone."""
+        while self._nbytes > self._budget and len(self._data) > 1:
+            key, entry = self._data.popitem(last=False)
+            self._nbytes -= entry[1]
+            self._evictions += 1
+    
+    def clear(self):
+        """Drops every texture in this cache (the statistics are kept)."""
+        self._evictions += len(self._data)
+        self._data.clear()
+        self._nbytes = 0
+    
+    def memoryUsage(self):
+        """**Returns**: The total bytes of the textures in this cache."""
+        return self._nbytes
+    
+    def stats(self):
+        """**Returns**: A new dictionary of the hits, misses, evictions, entries and bytes."""
+        return {'hits': self._hits, 'misses': self._misses, 'evictions': self._evictions,
+                'entries': len(self._data), 'bytes': self._nbytes}
+    
+    def report(self):
+        """**Returns**: A one-line summary of how well this cache is working."""
+        lookups = self._hits+self._misses
+        rate = 100.0*self._hits/lookups if lookups else 0.0
+        return '%d textures, %.1f of %.1f KB; %d hits, %d misses (%.0f%% hits), %d evictions' % (
+            len(self._data), self._nbytes/1024.0, self._budget/1024.0,
+            self._hits, self._misses, rate, self._evictions)
+
+
+# The cache returned by SharedLabelCache
+_SHARED_LABELS = None
+
+def SharedLabelCache():
+    """**Returns**: The LabelCache shared by every `GLabel`.
+    
+    The cache is created on the first call, with a budget of LABEL_CACHE_BYTES."""
+    global _SHARED_LABELS
+    if _SHARED_LABELS is None:
+        _SHARED_LABELS = LabelCache()
+    return _SHARED_LABELS
+
+
+#### FRAME PROFILING ####
+
+# Running totals of the Kivy instructions added to a view and of the shape
+# caches updated, read by GameApp each frame for the FrameProfiler
+_COUNTS = [0, 0]
+
+
+class FrameProfiler(object):
+    """Instances keep timings and counts for the most recent animation frames.
+    
+    A `GameApp` made with the keyword `profile` (or `hud`) records one sample
+    per frame.  A sample has the fields in `FIELDS`:
+    
+        interval: milliseconds since the previous frame (the dt from Kivy)
+        frame: milliseconds spent in the whole frame
+        redraw, update, draw, flush: milliseconds spent starting the frame,
+            in all of the calls to `update`, in `draw`, and finishing the
+            frame (the view and the sounds)
+        steps: the number of calls to `update`
+        instructions: Kivy instructions added to the view
+        caches: shapes whose drawing data was updated
+        sounds: sounds played
+    
+    The samples go in a ring buffer of `size` frames, so only the last few
+    seconds are kept and recording a frame allocates almost nothing.  Use
+    `summary` or `report` for percentiles over those frames, and `dump`
+    to save them.
+    
+    Instance Attributes (Hidden):
+        size: The most samples kept
+        samples: List of size sample tuples (None until filled), as a ring
+        next: Index in samples of the next sample to write
+        frames: Total samples ever recorded
+    """
+    
+    #: the fields of a sample, in order
+    FIELDS = ('interval', 'frame', 'redraw', 'update', 'draw', 'flush',
+              'steps', 'instructions', 'caches', 'sounds')
+    
+    def __init__(self, size=PROFILE_FRAMES):
+        """**Constructor**: Create a new profiler with no samples.
+        
+            :param size: The most samples to keep
+            **Precondition**:: size is an int > 0.
+        """
+        assert type(size) == int and size > 0, `size`+' is not a positive int'
+        self._size = size
+        self._samples = [None]*size
+        self._next = 0
+        self._frames = 0
+    
+    def __len__(self):
+        """**Returns**: The number of samples kept."""
+        return min(self._frames, self._size)
+    
+    def frames(self):
+        """**Returns**: The total number of frames ever recorded."""
+        return self._frames
+    
+    def record(self, sample):
+        """Adds the sample for one frame, replacing the oldest if the buffer is full.
+        
+            :param sample: The values of the frame, in the order of FIELDS
+            **Precondition**:: sample is a tuple of numbers.
+        """
+        self._samples[self._next] = sample
+        self._next = (self._next+1) % self._size
+        self._frames += 1
+    
+    def values(self, field):
+        """**Returns**: A new list of the values of field, oldest first.
+        
+            :param field: The field of the samples
+            **Precondition**:: field is in FIELDS.
+        """
+        index = self.FIELDS.index(field)
+        if self._frames < self._size:
+            samples = self._samples[:self._frames]
+        else:
+            samples = self._samples[self._next:]+self._samples[:self._next]
+        return [sample[index] for sample in samples]
+    
+    def percentile(self, field, p):
+        """**Returns**: The p-th percentile of the values of field (0 if no samples).
+        
+            :param field: The field of the samples
+            **Precondition**:: field is in FIELDS.
+            
+            :param p: The percentile
+            **Precondition**:: p is a number in 0..100.
+        """
+        return _percentile(sorted(self.values(field)), p)
+    
+    def summary(self):
+        """**Returns**: A new dictionary mapping each field to its statistics.
+        
+        The statistics of a field are a dictionary with the keys 'mean',
+        'p50', 'p95', 'p99' and 'max', over the samples kept."""
+        result = {}
+        for field in self.FIELDS:
+            values = sorted(self.values(field))
+            mean = float(sum(values))/len(values) if values else 0.0
+            result[field] = {'mean': mean, 'p50': _percentile(values, 50),
+                             'p95': _percentile(values, 95), 'p99': _percentile(values, 99),
+                             'max': values[-1] if values else 0.0}
+        return result
+    
+    def report(self):
+        """**Returns**: A short, multi-line summary for the on-screen display."""
+        stats = self.summary()
+        lines = ['%d frames  %.0f fps' % (len(self), 1000.0/stats['interval']['mean']
+                                          if stats['interval']['mean'] else 0.0)]
+        for field in ('frame', 'update', 'draw', 'flush'):
+            data = stats[field]
+            lines.append('%-6s %5.2f  p95 %5.2f  p99 %5.2f ms' %
+                         (field, data['p50'], data['p95'], data['p99']))
+        lines.append('instr %.0f  cache %.0f  sound %.0f  steps %.0f (p95)' %
+                     (stats['instructions']['p95'], stats['caches']['p95'],
+                      stats['sounds']['p95'], stats['steps']['p95']))
+        return '\n'.join(lines)
+    
+    def dump(self, filename):
+        """Writes the summary and the samples kept to the file filename, as JSON.
+        
+            :param filename: The file to write
+            **Precondition**:: filename is a string.
+        """
+        import json
+        data = {'frames': self._frames, 'fields': list(self.FIELDS),
+                'summary': self.summary(),
+                'samples': [list(sample) for sample in
+                            zip(*[self.values(field) for field in self.FIELDS])]}
+        with open(filename, 'w') as file:
+            json.dump(data, file, indent=1, sort_keys=True)
+
+
+def _percentile(values, p):
+    """Returns the p-th percentile (nearest rank) of the sorted list values, or 0 if empty"""
+    if not values:
+        return 0.0
+    rank = int(math.ceil(p/100.0*len(values)))-1
+    return values[min(max(rank, 0), len(values)-1)]
+
+
+class LatencyMonitor(object):
+    """Instances measure how long mouse input takes to reach the screen.
+    
+    A `GameApp` made with the keyword `latency` follows every `TouchEvent`
+    from the moment the view received it (the time of the event) through
+    three stages, and records the delay to each:
+    
+        apply:  the end of the `update` that was given the event (this is when
+            e.g. `Gameplay.updatePaddle` has moved the paddle)
+        submit: the end of that animation frame, when its canvas is handed to
+            Kivy to be drawn
+        flip:   the next time Kivy shows a drawn frame on the window
+    
+    The delays of a session are kept as a histogram per stage, with bins
+    `width` milliseconds wide; the last bin holds every delay past the others.
+    So a monitor uses the same memory however long the session runs, and two
+    builds (or two machines) can be compared by their histograms.  The flip
+    stage is only measured when there is a window.  Kivy only shows a new
+    frame when the canvas has changed, so an event that changes nothing on
+    screen is counted at the next frame that does.
+    
+    Instance Attributes (Hidden):
+        width: The width of a histogram bin, in milliseconds
+        counts: Dictionary mapping each stage to its list of bin counts
+        totals: Dictionary mapping each stage to the sum of its delays, in ms
+        worst: Dictionary mapping each stage to its longest delay, in ms
+        applied: The times of the events applied in the current frame
+        submitted: The times of the events submitted but not yet shown
+    """
+    
+    #: the stages of an event, in order
+    STAGES = ('apply', 'submit', 'flip')
+    
+    def __init__(self, bins=LATENCY_BINS, width=LATENCY_WIDTH):
+        """**Constructor**: Create a new monitor with empty histograms.
+        
+            :param bins: The number of histogram bins (including the last, open one)
+            **Precondition**:: bins is an int > 1.
+            
+            :param width: The width of a bin, in milliseconds
+            **Precondition**:: width is a number > 0.
+        """
+        assert type(bins) == int and bins > 1, `bins`+' is not a valid number of bins'
+        assert type(width) in [int, float] and width > 0, `width`+' is not a valid width'
+        self._width = float(width)
+        self._counts = dict((stage, [0]*bins) for stage in self.STAGES)
+        self._totals = dict.fromkeys(self.STAGES, 0.0)
+        self._worst = dict.fromkeys(self.STAGES, 0.0)
+        self._applied = []
+        self._submitted = []
+    
+    def applied(self, events, now):
+        """Records that the events were applied by an update that ended at time now.
+        
+            :param events: The events given to the update
+            **Precondition**:: events is a sequence of TouchEvent.
+            
+            :param now: The time the update ended (from `time.time`)
+            **Precondition**:: now is a float.
+        """
+        for event in events:
+            self._add('apply', now-event.time)
+            self._applied.append(event.time)
+    
+    def submitted(self, now):
+        """Records that the current frame was handed to Kivy at time now.
+        
+            :param now: The time the frame ended (from `time.time`)
+            **Precondition**:: now is a float.
+        """
+        for start in self._applied:
+            self._add('submit', now-start)
+        self._submitted.extend(self._applied)
+        self._applied = []
+    
+    def flipped(self, now):
+        """Records that Kivy showed a frame on the window at time now.
+        
+            :param now: The time of the flip (from `time.time`)
+            **Precondition**:: now is a float.
+        """
+        for start in self._submitted:
+            self._add('flip', now-start)
+        self._submitted = []
+    
+    def _add(self, stage, seconds):
+        """Adds a delay of the given seconds to the histogram of stage."""
+        ms = 1000.0*seconds
+        counts = self._counts[stage]
+        counts[min(max(int(ms/self._width), 0), len(counts)-1)] += 1
+        self._totals[stage] += ms
+        if ms > self._worst[stage]:
+            self._worst[stage] = ms
+    
+    def count(self, stage):
+        """**Returns**: The number of events measured at the given stage.
+        
+            :param stage: The stage
+            **Precondition**:: stage is in STAGES.
+        """
+        return sum(self._counts[stage])
+    
+    def histogram(self, stage):
+        """**Returns**: A new list of the (low, high, count) bins of stage, in ms.
+        
+            :param stage: The stage
+            **Precondition**:: stage is in STAGES.
+        
+        Each bin counts the delays in low <= delay < high.  The high of the
+        last bin is None, as it has no upper bound."""
+        counts = self._counts[stage]
+        result = []
+        for k in range(len(counts)):
+            high = None if k == len(counts)-1 else (k+1)*self._width
+            result.append((k*self._width, high, counts[k]))
+        return result
+    
+    def percentile(self, stage, p):
+        """**Returns**: The p-th percentile of the delays of stage, in ms (0 if none).
+        
+            :param stage: The stage
+            **Precondition**:: stage is in STAGES.
+            
+            :param p: The percentile
+            **Precondition**:: p is a number in 0..100.
+        
+        The percentile is the top of the histogram bin it falls in (but no
+        more than the longest delay), so it is only as precise as the bin
+        width."""
+        counts = self._counts[stage]
+        total = sum(counts)
+        if total == 0:
+            return 0.0
+        rank = max(int(math.ceil(p/100.0*total)), 1)
+        seen = 0
+        for k in range(len(counts)-1):
+            seen += counts[k]
+            if seen >= rank:
+                return min((k+1)*self._width, self._worst[stage])
+        return self._worst[stage]
+    
+    def summary(self):
+        """**Returns**: A new dictionary mapping each stage to its statistics.
+        
+        The statistics of a stage are a dictionary with the keys 'count',
+        'mean', 'p50', 'p95', 'p99' and 'max', in milliseconds."""
+        result = {}
+        for stage in self.STAGES:
+            count = self.count(stage)
+            result[stage] = {'count': count,
+                             'mean': self._totals[stage]/count if count else 0.0,
+                             'p50': self.percentile(stage, 50), 'p95': self.percentile(stage, 95),
+                             'p99': self.percentile(stage, 99), 'max': self._worst[stage]}
+        return result
+    
+    def report(self):
+        """**Returns**: A summary of the delays, one line per stage."""
+        stats = self.summary()
+        lines = []
+        for stage in self.STAGES:
+            data = stats[stage]
+            lines.append('%-6s %7d events  mean %6.1f  p50 %6.1f  p95 %6.1f  p99 %6.1f  max %6.1f ms' %
+                         (stage, data['count'], data['mean'], data['p50'], data['p95'],
+                          data['p99'], data['max']))
+        return '\n'.join(lines)
+    
+    def dump(self, filename):
+        """Writes the summary and the histograms to the file filename, as JSON.
+        
+            :param filename: The file to write
+            **Precondition**:: filename is a string.
+        """
+        import json
+        data = {'bin_ms': self._width, 'summary': self.summary(),
+                'histograms': dict((stage, self._counts[stage]) for stage in self.STAGES)}
+        with open(filename, 'w') as file:
+            json.dump(data, file, indent=1, sort_keys=True)
+
+
+#### TIMERS ####
+
+class TimerQueue(object):
+    """Instances call functions at set times on a game clock.
+    
+    The clock of a queue only moves when `advance` is called, so a game that
+    advances it by the `dt` of every `update` gets timers that run on game
+    time: they keep step with the simulation however fast frames are drawn,
+    stop while the game is not updated, and fire on the same update when the
+    game is replayed.  The clock never goes backwards.
+    
+    A timer is scheduled with a delay from the current time, and `schedule`
+    returns a handle that can be passed to `cancel`.  Timers due at the same
+    time fire in the order they were scheduled.  The queue is a heap, so
+    scheduling and firing a timer takes time logarithmic in the number of
+    timers, and advancing the clock when no timer is due costs almost nothing.
+    
+    Instance Attributes (Hidden):
+        now: The current time on the clock, in seconds
+        heap: A heap of [time, order, function, args] timers (function is None
+            once the timer is cancelled)
+        order: The number of timers ever scheduled, to order timers due together
+    """
+    
+    # Timers due this close to the current time fire now, so that adding up
+    # fixed steps (which is not exact in floating point) does not delay them
+    _SLACK = 1e-9
+    
+    @property
+    def now(self):
+        """The current time on the clock, in seconds.
+        
+        **Invariant**: Immutable float >= 0."""
+        return self._now
+    
+    def __init__(self):
+        """**Constructor**: Create a new queue with no timers, at time 0."""
+        self._now = 0.0
+        self._heap = []
+        self._order = 0
+    
+    def __len__(self):
+        """**Returns**: The number of timers waiting to fire (not cancelled)."""
+        return sum(1 for timer in self._heap if not timer[2] is None)
+    
+    def schedule(self, delay, function, *args):
+        """Schedules a call function(*args) for delay seconds from now.
+        
+            :param delay: The seconds to wait
+            **Precondition**:: delay is a number >= 0.
+            
+            :param function: The function to call
+            **Precondition**:: function is callable with the arguments args.
+        
+        **Returns**: The handle of the timer, for `cancel`."""
+        assert type(delay) in [int, float] and delay >= 0, `delay`+' is not a valid delay'
+        timer = [self._now+delay, self._order, function, args]
+        self._order += 1
+        heapq.heappush(self._heap, timer)
+        return timer
+    
+    def cancel(self, timer):
+        """Stops a timer from firing.  Cancelling a timer that already fired does nothing.
+        
+            :param timer: The handle of the timer
+            **Precondition**:: timer was returned by schedule on this queue.
+        """
+        timer[2] = None
+        timer[3] = ()
+    
+    def advance(self, dt):
+        """Moves the clock forward by dt seconds, firing every timer that comes due.
+        
+            :param dt: The seconds to move the clock
+            **Precondition**:: dt is a number >= 0.
+        
+        The timers fire in time order.  A timer may schedule or cancel other
+        timers; one that it schedules is fired in this call if it is already due.
+        
+        **Returns**: The number of timers fired."""
+        self._now += dt
+        fired = 0
+        heap = self._heap
+        while heap and heap[0][0] <= self._now+self._SLACK:
+            timer = heapq.heappop(heap)
+            function, args = timer[2], timer[3]
+            if not function is None:
+                self.cancel(timer)
+                function(*args)
+                fired += 1
+        return fired
+    
+    def clear(self):
+        """Cancels every timer (the clock is not changed)."""
+        for timer in self._heap:
+            self.cancel(timer)
+        self._heap = []
+
+
+#### INPUT RECORDING ####
+
+class InputRecorder(object):
+    """Instances write the input of a game session to a binary log file.
+    
+    The log starts with a header (a magic string, the format version, the session
+    seed and the length of a simulation step), followed by one record per call to
+    `GameApp.update`.  A record is the mouse state for that update (a flag saying
+    whether the mouse was pressed, and the mouse position) and the number of
+    `TouchEvent` the update was given, followed by those events (their kind,
+    position and time).  Records are written as they happen, so a long session
+    never builds up in memory.  The file is flushed every `FLUSH` records, so a
+    crash loses at most the last second or so of input, and a log cut short is
+    still readable up to its last complete record.  `GameApp` closes the log
+    when the game stops.  Use `InputLog` to read the file back.
+    
+    Version 1 logs (from before events were queued) have only the mouse state.
+    
+    Instance Attributes (Hidden):
+        file: The open log file
+        frames: The number of records written so far
+    """
+    
+    # The file header: magic, version, seed, step
+    HEADER = struct.Struct('<4sBQd')
+    # One record per update: pressed, x, y, number of events
+    RECORD = struct.Struct('<BffH')
+    # One entry per event in a record: kind (index in TOUCH_KINDS), x, y, time.
+    # Doubles, so that a replay moves the paddle exactly as the game did
+    EVENT = struct.Struct('<Bddd')
+    # The record of a version 1 log: pressed, x, y
+    RECORD_V1 = struct.Struct('<Bff')
+    MAGIC = 'BKIN'
+    VERSION = 2
+    # The number of records between flushes of the file
+    FLUSH = 60
+    
+    def __init__(self, filename, seed, step):
+        """**Constructor**: Creates a new log file and writes its header.
+        
+            :param filename: The file to write (it is replaced if it exists)
+            **Precondition**:: filename is a string.
+            
+            :param seed: The seed of the session
+            **Precondition**:: seed is an int in 0..2**64-1.
+            
+            :param step: The length of a simulation step in seconds
+            **Precondition**:: step is a float > 0.
+        """
+        self._file = open(filename, 'wb')
+        self._file.write(self.HEADER.pack(self.MAGIC, self.VERSION, seed, step))
+        self._frames = 0
+    
+    def record(self, touch, events=()):
+        """Appends the input for one update to the log.
+        
+            :param touch: The mouse position, or None if it is not pressed
+            **Precondition**:: touch is a GPoint or None.
+            
+            :param events: The mouse events for the update
+            **Precondition**:: events is a sequence of at most 65535 TouchEvent.
+        """
+        if touch is None:
+            data = [self.RECORD.pack(0, 0.0, 0.0, len(events))]
+        else:
+            data = [self.RECORD.pack(1, touch.x, touch.y, len(events))]
+        for event in events:
+            data.append(self.EVENT.pack(TOUCH_KINDS.index(event.kind), event.x, event.y, event.time))
+        self._file.write(''.join(data))
+        self._frames += 1
+        if self._frames % self.FLUSH == 0:
+            self._file.flush()
+    
+    def frames(self):
+        """**Returns**: The number of records written so far."""
+        return self._frames
+    
+    def close(self):
+        """Flushes and closes the log file."""
+        self._file.close()
+
+
+class InputLog(object):
+    """Instances read back a log written by `InputRecorder`.
+    
+    The header is read when the log is opened.  Iterating over the log then
+    streams the records from the file one at a time, yielding for each update
+    a pair (touch, events): the mouse position as a GPoint (or None if the mouse
+    was not pressed), and a tuple of the TouchEvent for that update.
+    
+    A version 1 log has no events, so they are made up from the changes in the
+    mouse state between updates: a press, a move or a release (at the last
+    position), timed at the start of the update.
+    
+    Instance Attributes (Hidden):
+        filename: The log file
+        version: The format version of the log
+        seed: The seed of the recorded session
+        step: The length of a simulation step in seconds
+    """
+    
+    def __init__(self, filename):
+        """**Constructor**: Opens a log and reads its header.
+        
+            :param filename: The log file to read
+            **Precondition**:: filename is a string naming a log file.
+        """
+        self._filename = filename
+        with open(filename, 'rb') as data:
+            header = data.read(InputRecorder.HEADER.size)
+        assert len(header) == InputRecorder.HEADER.size, `filename`+' is not an input log'
+        magic, version, seed, step = InputRecorder.HEADER.unpack(header)
+        assert magic == InputRecorder.MAGIC, `filename`+' is not an input log'
+        assert version in (1, InputRecorder.VERSION), 'unsupported input log version '+`version`
+        self._version = version
+        self._seed = seed
+        self._step = step
+    
+    @property
+    def seed(self):
+        """The seed of the recorded session.
+        
+        **Invariant**: Immutable int >= 0."""
+        return self._seed
+    
+    @property
+    def step(self):
+        """The length of a simulation step in seconds.
+        
+        **Invariant**: Immutable float > 0."""
+        return self._step
+    
+    @property
+    def version(self):
+        """The format version of the log.
+        
+        **Invariant**: Immutable int, 1 or 2."""
+        return self._version
+    
+    def __iter__(self):
+        """**Returns**: A generator over the recorded (touch, events) pairs."""
+        if self._version == 1:
+            return self._iterV1()
+        return self._iterV2()
+    
+    def _iterV2(self):
+        """**Returns**: A generator over the records of a version 2 log."""
+        size = InputRecorder.RECORD.size
+        esize = InputRecorder.EVENT.size
+        with open(self._filename, 'rb') as data:
+            data.seek(InputRecorder.HEADER.size)
+            record = data.read(size)
+            while len(record) == size:
+                pressed, x, y, count = InputRecorder.RECORD.unpack(record)
+                block = data.read(count*esize)
+                if len(block) < count*esize:
+                    return
+                events = []
+                for pos in xrange(0, len(block), esize):
+                    kind, ex, ey, when = InputRecorder.EVENT.unpack_from(block, pos)
+                    events.append(TouchEvent(TOUCH_KINDS[kind], ex, ey, when))
+                yield (GPoint._make(x,y) if pressed else None, tuple(events))
+                record = data.read(size)
+    
+    def _iterV1(self):
+        """**Returns**: A generator over the records of a version 1 log, with made up events."""
+        size = InputRecorder.RECORD_V1.size
+        last = None
+        frame = 0
+        with open(self._filename, 'rb') as data:
+            data.seek(InputRecorder.HEADER.size)
+            record = data.read(size)
+            while len(record) == size:
+                pressed, x, y = InputRecorder.RECORD_V1.unpack(record)
+                touch = GPoint._make(x,y) if pressed else None
+                when = frame*self._step
+                if touch is None:
+                    events = () if last is None else (TouchEvent(TOUCH_UP, last.x, last.y, when),)
+                elif last is None:
+                    events = (TouchEvent(TOUCH_DOWN, x, y, when),)
+                elif last.x != x or last.y != y:
+                    events = (TouchEvent(TOUCH_MOVE, x, y, when),)
+                else:
+                    events = ()
+                yield (touch, events)
+                last = touch
+                frame += 1
+                record = data.read(size)
 
 
 #### GEOMETRY CLASSES ####
@@ -217,7 +1443,11 @@ class SoundLibrary(object):
 class GPoint(object):
     """Instances are a Point in 2D space.
     
-    This class is used primarily for recording and handling mouse locations."""
+    This class is used primarily for recording and handling mouse locations.
+    Points are read on every frame, so the class uses `__slots__` (no attribute
+    dictionary), and comparisons do not use numpy."""
+    
+    __slots__ = ('_x', '_y')
     
     # PROPERTIES 
     @property
@@ -259,15 +1489,36 @@ class GPoint(object):
         self.x = x
         self.y = y
     
+    @classmethod
+    def _make(cls, x, y):
+        """**Returns**: A new point (x,y), made without checking x and y.
+        
+        This is the fast path for code in this module that already knows x
+        and y are numbers.
+        
+            :param x: the x value
+            **Precondition**: value is a float.
+        
+            :param y: the y value
+            **Precondition**: value is a float.
+        """
+        point = GPoint.__new__(cls)
+        point._x = x
+        point._y = y
+        return point
+    
     def __eq__(self, other):
         """**Returns**: True if self and other are equivalent GPoint. 
         
-        This method uses numpy to test whether the coordinates are 
-        "close enough".  It does not require exact equality for floats.
+        This method tests whether the coordinates are "close enough", with
+        the same tolerances as `numpy.allclose`.  It does not require exact
+        equality for floats.
         
             :param other: value to compare against
         """        
-        return (type(other) == GPoint and numpy.allclose(self.list(),other.list()))
+        return (isinstance(other, GPoint) and
+                abs(self._x-other._x) <= 1e-8+1e-5*abs(other._x) and
+                abs(self._y-other._y) <= 1e-8+1e-5*abs(other._y))
     
     def __ne__(self, other):
         """**Returns**: True if self and other are not equivalent GPoint. 
@@ -292,13 +1543,14 @@ class GPoint(object):
         """**Returns**: the sum of self and other.
         
         The value returned has the same type as self (so it is either
-        a GPoint or is a subclass of GPoint).  The contents of this object
+        a GPoint or is a subclass of GPoint), except that the sum of a
+        touch snapshot is a plain GPoint.  The contents of this object
         are not altered.
         
             :param other: tuple value to add
-            **Precondition**: value has the same type as self.
+            **Precondition**: value is a GPoint.
         """
-        assert (type(other) == type(self)), "value %(value)s is not a of type %(type)s" % {'value': `other`, 'type':`type(self)`}
+        assert isinstance(other, GPoint), "value %(value)s is not a of type %(type)s" % {'value': `other`, 'type':`type(self)`}
         result = copy.copy(self)
         result.x += other.x
         result.y += other.y
@@ -312,7 +1564,7 @@ class GPoint(object):
             :param other: the tail value for the new Vector
             **Precondition**: value is a Point object.
         """
-        assert (type(other) == type(self)), "value %(value)s is not a of type %(type)s" % {'value': `other`, 'type':`type(self)`}
+        assert isinstance(other, GPoint), "value %(value)s is not a of type %(type)s" % {'value': `other`, 'type':`type(self)`}
         result = copy.copy(self)
         result.x -= other.x
         result.y -= other.y
@@ -331,7 +1583,6 @@ class GPoint(object):
         result = copy.copy(self)
         result.x *= scalar
         result.y *= scalar
-        result.z *= scalar
         return result
     
     def __rmul__(self, scalar):
@@ -372,8 +1623,38 @@ class GPoint(object):
             :param other: value to compare against
             **Precondition**: value is a Tuple3D object.
         """
-        return numpy.sqrt((self.x-other.x)*(self.x-other.x)+
-                          (self.y-other.y)*(self.y-other.y))
+        return math.sqrt((self.x-other.x)*(self.x-other.x)+
+                         (self.y-other.y)*(self.y-other.y))
+
+
+class _TouchPoint(GPoint):
+    """Instances are immutable snapshots of the mouse position.
+    
+    `GView.touch` makes one of these when the mouse moves and returns that same
+    object every time it is read until the mouse moves again, so reading the
+    touch several times in a frame allocates nothing.  As the snapshot is
+    shared, it cannot be changed.  Copying it (which is what the arithmetic
+    methods do) gives an ordinary GPoint."""
+    
+    __slots__ = ()
+    
+    @property
+    def x(self):
+        """The x coordinate of the point.
+        
+        **Invariant**: Immutable float."""
+        return self._x
+    
+    @property
+    def y(self):
+        """The y coordinate of the point.
+        
+        **Invariant**: Immutable float."""
+        return self._y
+    
+    def __copy__(self):
+        """**Returns**: A GPoint with the same coordinates as this snapshot."""
+        return GPoint._make(self._x, self._y)
 
 
 class GObject(object):
@@ -381,7 +1662,13 @@ class GObject(object):
     
     You should never make a GObject directly.  Instead, you should use one 
     of the subclasses: GRectangle, GEllipse, GLine, GTriangle, GPolygon, GImage, 
-    and GLabel."""
+    and GLabel.
+    
+    The geometry and colors every shape has are kept in `__slots__`.  The
+    subclasses add their own attributes as usual."""
+    
+    __slots__ = ('_x', '_y', '_width', '_height', '_fillcolor', '_linecolor',
+                 '_cache_on', '__dict__')
     
     # PROPERTIES 
     @property
@@ -396,7 +1683,7 @@ class GObject(object):
         assert type(value) in [int, float], `value`+' is not a number'
         self._x = float(value)
         if self._cache_on:
-            self._cache(CACHE_POS)
+            self._recache(CACHE_POS)
     
     @property
     def y(self):
@@ -410,7 +1697,7 @@ class GObject(object):
         assert type(value) in [int, float], `value`+' is not a number'
         self._y = float(value)  
         if self._cache_on:
-            self._cache(CACHE_POS)
+            self._recache(CACHE_POS)
     
     @property
     def width(self):
@@ -424,7 +1711,7 @@ class GObject(object):
         assert type(value) in [int, float], `value`+' is not a number'
         self._width = float(value)
         if self._cache_on:
-            self._cache(CACHE_SIZE)
+            self._recache(CACHE_SIZE)
     
     @property
     def height(self):
@@ -438,7 +1725,7 @@ class GObject(object):
         assert type(value) in [int, float], `value`+' is not a number'
         self._height = float(value)
         if self._cache_on:
-            self._cache(CACHE_SIZE)
+            self._recache(CACHE_SIZE)
     
     @property
     def center_x(self):
@@ -530,7 +1817,7 @@ class GObject(object):
         
         self._fillcolor = Color(value[0],value[1],value[2],value[3])
         if self._cache_on:
-            self._cache(CACHE_COLOR)
+            self._recache(CACHE_COLOR)
         
     @property
     def linecolor(self):
@@ -554,7 +1841,7 @@ class GObject(object):
         
         self._linecolor = Color(value[0],value[1],value[2],value[3])
         if self._cache_on:
-            self._cache(CACHE_COLOR)
+            self._recache(CACHE_COLOR)
     
     def __init__(self,**keywords):
         """**Constructor**: creates a new GObject to support drawing.
@@ -575,6 +1862,7 @@ class GObject(object):
         Any attribute of this class may be used as a keyword. The
         argument must satisfy the invariants of that attribute. See
         the list of attributes of this class for more information."""
+        _require_kivy()
         # Set the properties.
         # Set cache check to correct value
         self._cache_on = False
@@ -626,17 +1914,60 @@ class GObject(object):
         overridden for specific drawing instructions."""
         pass
     
+    def _recache(self,style=CACHE_ALL):
+        """Helper to update the cached drawing data after a change.
+        
+        This calls `_cache`, and counts the call for the `FrameProfiler`.
+        
+            :param style: what changed (one of the CACHE constants)
+            **Precondition**: an int"""
+        _COUNTS[1] += 1
+        self._cache(style)
+    
+    def _setPosition(self,x,y):
+        """Helper to move this shape to (x,y) without checking x and y.
+        
+        This is the fast path for models that move a shape every frame.  It
+        sets both coordinates and then updates the cached instructions once,
+        instead of checking and caching for each coordinate.
+        
+            :param x: the new x coordinate
+            **Precondition**: a float
+        
+            :param y: the new y coordinate
+            **Precondition**: a float"""
+        self._x = x
+        self._y = y
+        if self._cache_on:
+            _COUNTS[1] += 1
+            self._cache(CACHE_POS)
+    
+    def _instructions(self):
+        """Returns: the tuple of Kivy instructions that draw this shape, in order.
+        
+        This method should be overridden for specific drawing instructions."""
+        return ()
+    
     def draw(self,view):
         """Draw this shape in the provide view.
         
             :param view: view to draw to
             **Precondition**: an *instance of* `GView`
         
-        Ideally view should be the one provided by `Game`."""
-        # No drawing, but turn on the cache
+        Ideally view should be the one provided by `Game`.  If the view is
+        retained (the default), the shape's instructions are only added to
+        the canvas the first time it is drawn; after that, drawing it just
+        keeps it on screen for this frame.  Moving or resizing the shape
+        updates those instructions in place."""
+        # Turn on the cache
         if not self._cache_on:
-            self._cache()
+            self._recache()
             self._cache_on = True
+        if view.retained:
+            view._keep(self)
+        else:
+            for cmd in self._instructions():
+                view.draw(cmd)
 
 
 class GLine(GObject):
@@ -737,7 +2068,7 @@ class GLine(GObject):
         assert reduce(_and, map(_is_num,value)), `value`+' is not a tuple of numbers'
         self._points = tuple(value)
         if self._cache_on:
-            self._cache(CACHE_ALL)
+            self._recache(CACHE_ALL)
     
     def __init__(self,**keywords):
         """**Constructor**: creates a new sequence of line segments.
@@ -757,6 +2088,7 @@ class GLine(GObject):
         immutable.  Position and size are computed from the list of points.
         Therefore `point` and `linecolor` are the two primary keywords
         used by this constructor."""
+        _require_kivy()
         self._cache_on = False
         self.points = keywords['points'] if 'points' in keywords else ()
         self.fillcolor = keywords['fillcolor'] if 'fillcolor' in keywords else (1,1,1,1)
@@ -802,17 +2134,9 @@ class GLine(GObject):
         This method always returns `False` as a `GLine` has no interior."""
         return False
     
-    def draw(self,view):
-        """Draw this shape in the provide view.
-        
-            :param view: view to draw to
-            **Precondition**: an *instance of* `GView`
-        
-        Ideally view should be the one provided by `Game`."""
-        # Invoke the cache
-        GObject.draw(self,view)
-        view.draw(self._linecolor)
-        view.draw(self._lcache)
+    def _instructions(self):
+        """Returns: the tuple of Kivy instructions that draw this shape, in order."""
+        return (self._linecolor, self._lcache)
 
 
 class GTriangle(GLine):
@@ -840,7 +2164,7 @@ class GTriangle(GLine):
         assert reduce(lambda x, y: x and y, map(_is_num,value)), `value`+' is not a tuple of numbers'
         self._points = tuple(value)
         if self._cache_on:
-            self._cache(CACHE_ALL)
+            self._recache(CACHE_ALL)
     
     def __init__(self,**keywords):
         """**Constructor**: creates a new solid triangle.
@@ -881,18 +2205,9 @@ class GTriangle(GLine):
         This method uses a standard test for triangle inclusion."""
         return _in_triangle((x,y),self._points)
     
-    def draw(self,view):
-        """Draw this shape in the provide view.
-        
-            :param view: view to draw to
-            **Precondition**: an *instance of* `GView`
-        
-        Ideally view should be the one provided by `Game`."""
-        GObject.draw(self,view)
-        view.draw(self._fillcolor)
-        view.draw(self._mcache)
-        view.draw(self._linecolor)
-        view.draw(self._lcache)
+    def _instructions(self):
+        """Returns: the tuple of Kivy instructions that draw this shape, in order."""
+        return (self._fillcolor, self._mcache, self._linecolor, self._lcache)
 
 
 class GPolygon(GLine):
@@ -924,7 +2239,7 @@ class GPolygon(GLine):
         assert len(value) == 2, `value`+' does not have 2 elements'
         assert reduce(lambda x, y: x and y, map(_is_num,value)), `value`+' is not a list of numbers'
         self._centroid = tuple(value)
-        self._cache()
+        self._recache()
         
     def __init__(self,**keywords):
         """**Constructor**: creates a new solid polyon
@@ -986,18 +2301,9 @@ class GPolygon(GLine):
         
         return found
     
-    def draw(self,view):
-        """Draw this shape in the provide view.
-        
-            :param view: view to draw to
-            **Precondition**: an *instance of* `GView`
-        
-        Ideally view should be the one provided by `Game`."""
-        GObject.draw(self,view)
-        view.draw(self._fillcolor)
-        view.draw(self._mcache)
-        view.draw(self._linecolor)
-        view.draw(self._lcache)
+    def _instructions(self):
+        """Returns: the tuple of Kivy instructions that draw this shape, in order."""
+        return (self._fillcolor, self._mcache, self._linecolor, self._lcache)
 
 
 class GRectangle(GObject):
@@ -1057,19 +2363,9 @@ class GRectangle(GObject):
         This method uses a standard test for rectangle inclusion."""
         return (self.left <= x and x <= self.right and self.bottom <= y and y <= self.top)
     
-    def draw(self,view):
-        """Draw this shape in the provide view.
-        
-            :param view: view to draw to
-            **Precondition**: an *instance of* `GView`
-        
-        Ideally view should be the one provided by `Game`."""
-        # Invoke the cache
-        GObject.draw(self,view)
-        view.draw(self._linecolor)
-        view.draw(self._lcache)
-        view.draw(self._fillcolor)
-        view.draw(self._scache)
+    def _instructions(self):
+        """Returns: the tuple of Kivy instructions that draw this shape, in order."""
+        return (self._linecolor, self._lcache, self._fillcolor, self._scache)
 
 
 class GEllipse(GRectangle):
@@ -1140,13 +2436,148 @@ class GEllipse(GRectangle):
         return (dx+dy) <= 1.0
 
 
+class GRectangleBatch(GObject):
+    """Instances represent many solid rectangles drawn as a single shape.
+    
+    The rectangles are given by the attribute `rects`, a sequence of (x, y,
+    width, height) tuples, and all share the same `fillcolor` and `linecolor`.
+    Instead of two Kivy `Rectangle` instructions per rectangle, the batch
+    keeps the corners of every rectangle in a NumPy vertex array and draws
+    them all with one `Mesh` for the borders and one for the interiors, so
+    the number of drawing instructions does not depend on the number of
+    rectangles.  (Very large batches are split into meshes of `BATCH_SIZE`
+    rectangles, as Kivy meshes are limited to 65536 vertices.)
+    
+    Individual rectangles cannot be moved, but they can be removed with
+    `hide`.  The position and size attributes inherited from `GObject` are
+    unused."""
+    
+    @property
+    def count(self):
+        """The number of rectangles in this batch, including hidden ones.
+        
+        **Invariant**: Immutable int >= 0."""
+        return self._count
+    
+    def __init__(self,**keywords):
+        """**Constructor**: creates a new batch of solid rectangles
+        
+            :param keywords: dictionary of keyword arguments 
+            **Precondition**: See below.
+        
+        To use the constructor for this class, you should provide it with a 
+        list of keyword arguments that initialize various attributes. For 
+        example, to create two red squares, use the constructor call
+        
+            GRectangleBatch(rects=[(0,0,10,10),(20,0,10,10)],fillcolor=colormodel.RED)
+        
+        This class supports the color keywords of `GObject`."""
+        rects = keywords['rects'] if 'rects' in keywords else []
+        assert type(rects) in [tuple,list], `rects`+' is not a tuple or list'
+        _require_numpy()
+        self._rects = numpy.array(rects,dtype=float).reshape(-1,4)
+        self._count = len(self._rects)
+        self._visible = numpy.ones(self._count,dtype=bool)
+        self._fverts = self._vertices(0)
+        self._lverts = self._vertices(LINE_SIZE)
+        self._fmeshes = []
+        self._lmeshes = []
+        self._dirty = set()
+        GObject.__init__(self,**keywords)
+    
+    def _vertices(self,grow):
+        """Returns: the vertex array for the corners of every rectangle
+        
+        Each rectangle is grown by grow on every side (for the border).  The
+        array has four (x, y, u, v) rows per rectangle."""
+        verts = numpy.zeros((self._count,4,4),dtype=numpy.float32)
+        left   = self._rects[:,0]-grow
+        bottom = self._rects[:,1]-grow
+        right  = left+self._rects[:,2]+2*grow
+        top    = bottom+self._rects[:,3]+2*grow
+        verts[:,0,0] = left
+        verts[:,0,1] = bottom
+        verts[:,1,0] = right
+        verts[:,1,1] = bottom
+        verts[:,2,0] = right
+        verts[:,2,1] = top
+        verts[:,3,0] = left
+        verts[:,3,1] = top
+        return verts.reshape(-1,4)
+    
+    def _mesh(self,verts,chunk):
+        """Returns: a new Mesh for the given chunk of the vertex array verts"""
+        lo = chunk*BATCH_SIZE
+        hi = min(lo+BATCH_SIZE,self._count)
+        quads = numpy.arange(hi-lo).reshape(-1,1)*4
+        indices = (quads+numpy.array([0,1,2,0,2,3])).ravel().tolist()
+        return Mesh(vertices=verts[4*lo:4*hi].ravel().tolist(),indices=indices,mode='triangles')
+    
+    def _cache(self,style=CACHE_ALL):
+        """Helper method to cache data to speed drawing. This method should be  
+        overridden for specific drawing instructions."""
+        if style == CACHE_ALL:
+            chunks = range((self._count+BATCH_SIZE-1)//BATCH_SIZE)
+            self._fmeshes = [self._mesh(self._fverts,c) for c in chunks]
+            self._lmeshes = [self._mesh(self._lverts,c) for c in chunks]
+            self._dirty.clear()
+    
+    def hide(self,index):
+        """Removes the rectangle at position index in `rects` from the batch.
+        
+            :param index: the rectangle to hide
+            **Precondition**: an int in 0..count-1
+        
+        The rectangle's vertices are collapsed to a point, so the meshes keep
+        their size; the change is sent to Kivy the next time this is drawn."""
+        if self._visible[index]:
+            self._visible[index] = False
+            self._fverts[4*index:4*index+4] = 0
+            self._lverts[4*index:4*index+4] = 0
+            self._dirty.add(index//BATCH_SIZE)
+    
+    def contains(self,x,y):
+        """Return: True if some visible rectangle contains the point (x,y).
+        
+            :param x: x coordinate of point to check
+            **Precondition**: an int or float
+            
+            :param y: y coordinate of point to check
+            **Precondition**: an int or float"""
+        r = self._rects
+        inside = ((r[:,0] <= x) & (x <= r[:,0]+r[:,2]) &
+                  (r[:,1] <= y) & (y <= r[:,1]+r[:,3]) & self._visible)
+        return bool(inside.any())
+    
+    def _instructions(self):
+        """Returns: the tuple of Kivy instructions that draw this shape, in order."""
+        return ((self._linecolor,)+tuple(self._lmeshes)+
+                (self._fillcolor,)+tuple(self._fmeshes))
+    
+    def draw(self,view):
+        """Draw this shape in the provide view.
+        
+            :param view: view to draw to
+            **Precondition**: an *instance of* `GView`
+        
+        Any rectangles hidden since the last draw are sent to the meshes first."""
+        if self._cache_on:
+            for chunk in self._dirty:
+                lo = 4*chunk*BATCH_SIZE
+                hi = min(lo+4*BATCH_SIZE,4*self._count)
+                self._fmeshes[chunk].vertices = self._fverts[lo:hi].ravel().tolist()
+                self._lmeshes[chunk].vertices = self._lverts[lo:hi].ravel().tolist()
+            self._dirty.clear()
+        GObject.draw(self,view)
+
+
 class GImage(GRectangle):
     """Instance represents a rectangular image.
     
     The image is given by a JPEG, PNG, or GIF file whose name is stored
     in the attribute `source`.  Image files should be stored in the
     **Images** directory so that Kivy can find them without the complete
-    path name.
+    path name, or in the archive Images.zip (which is read in place).
     
     In this graphics object, the `linecolor` and `fillcolor` attributes
     are ignored.  The image is displayed as a rectangle whose bottom
@@ -1169,7 +2600,7 @@ class GImage(GRectangle):
     def source(self,value):
         assert value is None or _is_image_file(value), `value`+' is not an image file'
         self._source = value
-        self._cache()
+        self._recache()
         
     def __init__(self,**keywords):
         """**Constructor**: creates a new rectangle image
@@ -1198,27 +2629,21 @@ class GImage(GRectangle):
         """Helper method to cache data to speed drawing. This method should be  
         overridden for specific drawing instructions."""
         if self._scache is None:
-            self._scache = Rectangle(pos=(self.x, self.y), size=(self.width, self.height), source=self._source)        
+            self._scache = Rectangle(pos=(self.x, self.y), size=(self.width, self.height))
+            _set_image(self._scache, self._source)
         elif style == CACHE_POS:
             self._scache.pos=(self.x, self.y)
         elif style == CACHE_SIZE:
             self._scache.size=(self.width, self.height)
         elif style == CACHE_SOURCE:
-            self._scache.source = self._source
+            _set_image(self._scache, self._source)
         else:
-            self._scache = Rectangle(pos=(self.x, self.y), size=(self.width, self.height), source=self._source)        
+            self._scache = Rectangle(pos=(self.x, self.y), size=(self.width, self.height))
+            _set_image(self._scache, self._source)
     
-    def draw(self,view):
-        """Draw this shape in the provide view.
-        
-            :param view: view to draw to
-            **Precondition**: an *instance of* `GView`
-        
-        Ideally view should be the one provided by `Game`."""
-        # Invoke the cache
-        GObject.draw(self,view)
-        view.draw(self._fillcolor)
-        view.draw(self._scache)
+    def _instructions(self):
+        """Returns: the tuple of Kivy instructions that draw this shape, in order."""
+        return (self._fillcolor, self._scache)
 
 
 class GLabel(GRectangle):
@@ -1243,33 +2668,40 @@ class GLabel(GRectangle):
     If you give no name, it will use the default Kivy font.  The
     `bold` attribute only works for the default Kivy font; for other
     fonts you will need the .ttf file for the bold version of that
-    font.  See `ComicSans.ttf` and `ComicSansBold.ttf` for an example."""
-    
+    font.  See `ComicSans.ttf` and `ComicSansBold.ttf` for an example.
+
+    The text is drawn from a texture kept in the `SharedLabelCache`, so
+    labels with the same text, font, size and color share one texture,
+    and changing a label back to text it has shown before is cheap."""
+
     @property
     def font_size(self):
         """Size of the text font in points.
         
         **Invariant**: A positive number (int or float)"""
-        return self._label.font_size
+        return self._font_size
 
     @font_size.setter
     def font_size(self,value):
         assert type(value) in (int,float), `value`+' is not a number'
-        self._label.font_size = value
-        self._label.texture_update()
+        self._font_size = value
+        self._recache()
 
     @property
     def font_name(self):
         """File name for the .ttf file to use as a font
         
-        **Invariant**: string referring to a .ttf file in folder Fonts"""
-        return self._label.font_name
+        **Invariant**: string referring to a .ttf file in folder Fonts
+        (or in the archive Fonts.zip)"""
+        if self._font_name is None:
+            return CoreLabel().options['font_name']
+        return self._font_name
 
     @font_name.setter
     def font_name(self,value):
         assert _is_font_file(value), `value`+' is not a font name'
-        self._label.font_name = value
-        self._label.texture_update()
+        self._font_name = value
+        self._recache()
 
     @property
     def bold(self):
@@ -1281,13 +2713,13 @@ class GLabel(GRectangle):
         an example.
         
         **Invariant**: boolean"""
-        return self._label.bold
+        return self._bold
 
     @bold.setter
     def bold(self,value):
         assert type(value) == bool, `value`+' is not a bool'
-        self._label.bold = value
-        self._label.texture_update()
+        self._bold = value
+        self._recache()
 
     @property
     def text(self):
@@ -1299,13 +2731,13 @@ class GLabel(GRectangle):
         that the entire text fits inside of the rectangle.
         
         **Invariant**: string"""
-        return self._label.text
+        return self._text
     
     @text.setter
     def text(self,value):
         assert type(value) == str, `value`+' is not a string'
-        self._label.text = value
-        self._label.texture_update()
+        self._text = value
+        self._recache()
 
     @property
     def halign(self):
@@ -1323,8 +2755,7 @@ class GLabel(GRectangle):
     def halign(self,value):
         assert value in ('left','right','center'), `value`+' is not a valid horizontal alignment'
         self._halign = value
-        self._label.halign = value
-        self._cache(CACHE_POS)
+        self._recache(CACHE_POS)
 
     @property
     def valign(self):
@@ -1342,8 +2773,7 @@ class GLabel(GRectangle):
     def valign(self,value):
         assert value in ('top','middle','bottom'), `value`+' is not a valid vertical alignment'
         self._valign = value
-        self._label.valign = value
-        self._cache(CACHE_POS)
+        self._recache(CACHE_POS)
 
     def __init__(self,**keywords):
         """**Constructor**: creates a new text label.
@@ -1365,42 +2795,48 @@ class GLabel(GRectangle):
             keywords['fillcolor'] = [0.0,0.0,0.0,0.0]
         
         GRectangle.__init__(self,**keywords)
-        self._label = Label(**keywords)
-        self._label.size_hint = (None,None)
-        
-        if 'halign' in keywords:
-            self._halign = keywords['halign']
-        else:
-            self._halign = 'left'
-            self._label._halign = 'left'
-
-        if 'valign' in keywords:
-            self._valign = keywords['valign']
-        else:
-            self._valign = 'bottom'
-            self._label._valign = 'bottom'
-        
-        self._label.bind(texture_size=self._callback)
-
-    def _callback(self,instance=None,value=None):
-        """Workaround to deal with parameter requirements for callbacks"""
-        self._cache()
+        self._scache = None
+        self._tcache = None
+        self._tcolor = Color(1.0,1.0,1.0,1.0)
+        
+        self._text = keywords['text'] if 'text' in keywords else ''
+        assert type(self._text) == str, `self._text`+' is not a string'
+        self._font_size = keywords['font_size'] if 'font_size' in keywords else 15
+        assert type(self._font_size) in (int,float), `self._font_size`+' is not a number'
+        self._bold = keywords['bold'] if 'bold' in keywords else False
+        assert type(self._bold) == bool, `self._bold`+' is not a bool'
+        self._font_name = None
+        if 'font_name' in keywords:
+            assert _is_font_file(keywords['font_name']), `keywords['font_name']`+' is not a font name'
+            self._font_name = keywords['font_name']
+        
+        self._halign = keywords['halign'] if 'halign' in keywords else 'left'
+        assert self._halign in ('left','right','center'), `self._halign`+' is not a valid horizontal alignment'
+        self._valign = keywords['valign'] if 'valign' in keywords else 'bottom'
+        assert self._valign in ('top','middle','bottom'), `self._valign`+' is not a valid vertical alignment'
+        
+        # Size the label to its text straight away
+        self._recache()
     
     def _cache(self,style=CACHE_ALL):
         """Helper method to cache data to speed drawing. This method should be  
-        overridden for specific drawing instructions."""
+        overridden for specific drawing instructions.
+        
+        The texture of the text comes from the `SharedLabelCache`, so only
+        text that has not been seen before (in this font, size and color)
+        is rendered.  The rectangles are made once and updated after that."""
         if style == CACHE_POS and not self._scache is None:
-            self._label.pos=(self.x, self.y)
-            self._scache.pos = (self.x, self.y)
+            self._place()
             return
-    
-        self._label.size = self._label.texture_size
-        self._label.pos = (self.x, self.y)
-        self._label.color = self._linecolor.rgba
+        
+        font = None if self._font_name is None else _font_file(self._font_name)
+        texture = SharedLabelCache().texture(self._text, font, self._font_size,
+                                             self._bold, tuple(self._linecolor.rgba))
+        tsize = (0, 0) if texture is None else tuple(texture.size)
         
         # Resize the outside if necessary
-        width  = max(self._width,self._label.width)
-        height = max(self._height,self._label.height)
+        width  = max(self._width,tsize[0])
+        height = max(self._height,tsize[1])
    
         # Reset to horizontal anchor position.
         if self._halign == 'left':
@@ -1426,47 +2862,116 @@ class GLabel(GRectangle):
         else:
             self._height = height
         
+        if self._scache is None:
+            self._scache = Rectangle()
+            self._tcache = Rectangle()
+        self._scache.size = (self.width, self.height)
+        self._tcache.texture = texture
+        self._tcache.size = tsize
+        self._place()
+    
+    def _place(self):
+        """Helper to move the background and the text to the position of this label"""
+        self._scache.pos = (self.x, self.y)
+        tw, th = self._tcache.size
+        
         # Internal Horizontal placement
         if self._halign == 'left':
-            self._label.x = self.x
+            tx = self.x
         elif self._halign == 'center':
-            self._label.center_x = self.center_x
-        else: # 'ightr'
-            self._label.right = self.right
+            tx = self.center_x-tw/2.0
+        else: # 'right'
+            tx = self.right-tw
         
         # Internal Vertical placement
         if self._valign == 'top':
-            self._label.top = self.top
+            ty = self.top-th
         elif self._valign == 'middle':
-            self._label.center_y = self.center_y
+            ty = self.center_y-th/2.0
         else: # 'bottom'
-            self._label.y = self.y
-        
-        self._scache = Rectangle(pos=(self.x, self.y), size=(self.width, self.height))
+            ty = self.y
+        self._tcache.pos = (tx, ty)
     
-    def draw(self,view):
-        """Draw this shape in the provide view.
-        
-            :param view: view to draw to
-            **Precondition**: an *instance of* `GView`
-        
-        Ideally view should be the one provided by `Game`."""
-        # Invoke the cache
-        GObject.draw(self,view)
-        view.draw(self._fillcolor)
-        view.draw(self._scache)
-        view.draw(self._label.canvas)
+    def _instructions(self):
+        """Returns: the tuple of Kivy instructions that draw this shape, in order."""
+        return (self._fillcolor, self._scache, self._tcolor, self._tcache)
 
 
 #### APPLICATION CLASSES ####
 
-class GView(FloatLayout):
+class TouchEvent(collections.namedtuple('TouchEvent', ('kind', 'x', 'y', 'time'))):
+    """Instances are a single mouse event, as queued by `GView`.
+    
+    The attribute `kind` is TOUCH_DOWN (the button was pressed), TOUCH_MOVE
+    (the mouse moved with the button pressed) or TOUCH_UP (the button was
+    released).  The attributes `x` and `y` are the mouse position, as floats,
+    and `time` is when the event arrived, in seconds (from `time.time`).
+    
+    Events are immutable tuples, and are made for every mouse move, so they
+    have no attribute dictionary."""
+    __slots__ = ()
+
+
+class GView(object):
     """The view class for a `Game` application.
     
     You may need to access an instance of this class to draw `GObject` 
     instances.  However, you will never need to construct one.
     You should only use the one provided in the `view` attribute of
-    `Game`. See class `Game` for more information."""
+    `Game`. See class `Game` for more information.
+    
+    A view is either immediate or retained.  An immediate view throws away
+    its canvas every frame, and every `GObject` adds its instructions again
+    when drawn.  A retained view (the default) keeps one instruction group per 
+    `GObject` in its canvas across frames.  Drawing an object that is already
+    there costs nothing; an object that is not drawn in a frame is taken out
+    of the canvas at the end of that frame.  Objects are stacked in the order
+    they were drawn in the frame, as in an immediate view (if that order
+    changes, the scene is put back in order at the end of the frame).
+    Instructions added directly with `draw` are immediate in both modes, and
+    are drawn above every retained object.
+    
+    The view draws into a Kivy `FloatLayout`, the attribute `widget`, which
+    is made (importing Kivy if needed) along with the view.
+    
+    Besides the current mouse position `touch`, the view keeps every mouse
+    press, move and release as a timestamped `TouchEvent`, in a ring queue of
+    EVENT_QUEUE events.  Before each call to `update`, `GameApp` moves the
+    queued events to the attribute `events`, so a game sees every event
+    exactly once, in order, even a press and release that both happen
+    between two frames.  If the queue fills up (because no update ran for a
+    long time), the oldest events are dropped and counted in `dropped`."""
+    
+    @property
+    def widget(self):
+        """The Kivy widget this view draws into.
+        
+        **Invariant**: Immutable instance of FloatLayout."""
+        return self._widget
+    
+    @property
+    def retained(self):
+        """Whether this view keeps drawn objects in its canvas across frames
+        
+        **Invariant**: Immutable bool."""
+        return self._retained
+    
+    @property
+    def events(self):
+        """The mouse events for the current update, oldest first.
+        
+        These are the events that arrived since the last update, or since
+        the view was made.
+        
+        **Invariant**: Immutable tuple of TouchEvent."""
+        return self._events
+    
+    @property
+    def dropped(self):
+        """The number of mouse events dropped because the queue was full.
+        
+        **Invariant**: Immutable int >= 0."""
+        return self._dropped
     
     @property
     def touch(self):
@@ -1479,30 +2984,96 @@ class GView(FloatLayout):
         There is currently no way to get the location of the mouse when
         the button is not preseed.  This a limitation of Kivy.
         
+        The point is an immutable snapshot.  It is made when the mouse moves,
+        and reading this attribute again before the next move returns the same
+        object.
+        
         **Invariant**: Either a GPoint or None (if there is no touch)."""
         if self._touch is None:
             return None
-        
-        return GPoint(self._touch.x,self._touch.y)
-    
-    def __init__(self):
-        """**Initializer**: creates a new GView"""
-        FloatLayout.__init__(self)
-        self.bind(on_touch_down=self._capture_touch)
-        self.bind(on_touch_move=self._capture_touch)
-        self.bind(on_touch_up=self._release_touch)
+        if self._point is None:
+            self._point = _TouchPoint._make(float(self._touch.x),float(self._touch.y))
+        return self._point
+    
+    def __init__(self,retained=True):
+        """**Initializer**: creates a new GView
+        
+            :param retained: whether to keep drawn objects across frames
+            **Precondition**: a bool"""
+        _require_kivy()
+        self._widget = FloatLayout()
+        self._widget.bind(on_touch_down=self._capture_touch)
+        self._widget.bind(on_touch_move=self._move_touch)
+        self._widget.bind(on_touch_up=self._release_touch)
+        self._widget.bind(pos=self._resize,size=self._resize)
+        self._retained = retained
+        self._background = Rectangle(pos=self._widget.pos,size=self._widget.size)
+        canvas = self._widget.canvas
+        canvas.add(Color(1,1,1))
+        canvas.add(self._background)
+        self._scene = InstructionGroup()
+        canvas.add(self._scene)
         self._frame = InstructionGroup()
-        self.canvas.add(self._frame)
+        canvas.add(self._frame)
+        self._groups = {}
+        self._order = []
+        self._kept = []
+        self._added = []
+        self._frameno = 0
         self._touch = None
+        self._point = None
+        self._queue = [None]*EVENT_QUEUE
+        self._head = 0
+        self._count = 0
+        self._dropped = 0
+        self._events = ()
     
     def _capture_touch(self,view,touch):
         """Helper method to respond (and grap) a mouse press"""
         self._touch = touch
+        self._point = None
+        self._push(TOUCH_DOWN,touch)
         #self._touch.grab(self)
     
+    def _move_touch(self,view,touch):
+        """Helper method to respond to a mouse move with the button pressed"""
+        self._touch = touch
+        self._point = None
+        self._push(TOUCH_MOVE,touch)
+    
     def _release_touch(self,view,touch):
         """Helper method to respond (and release) a mouse release"""
         self._touch = None
+        self._point = None
+        self._push(TOUCH_UP,touch)
+    
+    def _push(self,kind,touch):
+        """Helper to add an event for touch to the queue, dropping the oldest if full"""
+        size = len(self._queue)
+        if self._count == size:
+            self._head = (self._head+1) % size
+            self._dropped += 1
+        else:
+            self._count += 1
+        self._queue[(self._head+self._count-1) % size] = TouchEvent(kind,float(touch.x),
+                                                                    float(touch.y),time.time())
+    
+    def _next(self):
+        """Helper to move the queued events to `events`, for the next update.
+        
+        Returns: the new value of `events`"""
+        if self._count == 0:
+            self._events = ()
+            return self._events
+        size = len(self._queue)
+        end = self._head+self._count
+        if end <= size:
+            self._events = tuple(self._queue[self._head:end])
+        else:
+            self._events = tuple(self._queue[self._head:]+self._queue[:end-size])
+        self._head = end % size
+        self._count = 0
+        return self._events
     
     def draw(self,cmd):
         """Adds the giving drawing command to this canvas for drawing.
@@ -1511,19 +3082,127 @@ class GView(FloatLayout):
             **Invariant**: cmd is a Kivy drawing instruction.
         """
         self._frame.add(cmd)
+        _COUNTS[0] += 1
+    
+    def _keep(self,obj):
+        """Helper to keep a GObject in the retained scene for this frame.
+        
+        The object's instruction group is created the first time it is kept,
+        and refilled only if the object has replaced any of its instructions
+        (e.g. a new color)."""
+        entry = self._groups.get(id(obj))
+        if entry is None:
+            entry = [obj, InstructionGroup(), (), -1]
+            self._groups[id(obj)] = entry
+        
+        cmds = obj._instructions()
+        old = entry[2]
+        if len(cmds) != len(old) or not all(map(lambda a, b: a is b, cmds, old)):
+            entry[1].clear()
+            for cmd in cmds:
+                entry[1].add(cmd)
+            _COUNTS[0] += len(cmds)
+            entry[2] = cmds
+        
+        if entry[3] == self._frameno:
+            return
+        if entry[3] < 0:
+            self._scene.add(entry[1])
+            self._added.append(entry)
+        entry[3] = self._frameno
+        self._kept.append(entry)
+    
+    def _resize(self,instance=None,value=None):
+        """Helper to keep the background the size of the view"""
+        self._background.pos = self._widget.pos
+        self._background.size = self._widget.size
     
     def _redraw(self):
-        """Helper called to refresh the screen each animation frame"""
-        self.canvas.remove(self._frame)
+        """Helper called to start each animation frame"""
         self._frame.clear()
-        self._frame = InstructionGroup()
-        self.canvas.add(self._frame)
-        self._frame.add(Color(1,1,1))
-        self._frame.add(Rectangle(pos=self.pos,size=self.size))
+        self._frameno += 1
+        del self._kept[:]
+        del self._added[:]
+    
+    def _flush(self):
+        """Helper called to finish each animation frame
+        
+        This takes out of the canvas every retained object that was not
+        drawn this frame.  If the objects left were drawn in a different
+        order than they are stacked in the scene, it restacks the scene."""
+        for key in self._groups.keys():
+            entry = self._groups[key]
+            if entry[3] != self._frameno:
+                self._scene.remove(entry[1])
+                del self._groups[key]
+        
+        if not self._inOrder():
+            self._scene.clear()
+            for entry in self._kept:
+                self._scene.add(entry[1])
+            _COUNTS[0] += len(self._kept)
+        self._order, self._kept = self._kept, self._order
+    
+    def _inOrder(self):
+        """Returns: True if the scene is stacked in the order objects were kept this frame
+        
+        The scene holds the objects of the last frame that were kept again
+        (in their old order), followed by the new objects (in the order they
+        were added), so that is compared to the order they were kept in."""
+        kept = self._kept
+        k = 0
+        for entry in self._order:
+            if entry[3] == self._frameno:
+                if k == len(kept) or not kept[k] is entry:
+                    return False
+                k += 1
+        for entry in self._added:
+            if k == len(kept) or not kept[k] is entry:
+                return False
+            k += 1
+        return k == len(kept)
+
+
+def _kivyApp():
+    """Returns: the Kivy App class that runs a GameApp, defined on first use.
+    
+    The class can only be defined once Kivy is imported."""
+    global _KivyApp
+    if '_KivyApp' in globals():
+        return _KivyApp
+    _require_kivy()
+    
+    class _KivyApp(kivy.app.App):
+        """The Kivy application for a GameApp, which does the real work."""
+        
+        def __init__(self,game,**keywords):
+            kivy.app.App.__init__(self,**keywords)
+            self.title = type(game).__name__
+            self._game = game
+        
+        def build(self):
+            """Special Kivy method to initialize the graphics window"""
+            return self._game.build()
+        
+        def on_stop(self):
+            """Special Kivy method called when the application stops
+            
+            Kivy calls this when the window is closed (and from `stop`), so
+            the game can finish its session however it ends."""
+            self._game._shutdown()
+    
+    return _KivyApp
 
 
-class GameApp(kivy.app.App):
-    """Primary controller class for a simple game application."""
+class GameApp(object):
+    """Primary controller class for a simple game application.
+    
+    A GameApp does not import Kivy until it is run.  It then makes a Kivy `App`
+    to open the window and call back into this object."""
+    
+    #: the sounds of the game, as names mapped to files; they are loaded into
+    #: `SharedSoundLibrary()` when `audio` is made (unless the game is silent)
+    SOUNDS = {}
     
     @property
     def width(self):
@@ -1549,6 +3228,106 @@ class GameApp(kivy.app.App):
         **Invariant**: Immutable float > 0."""
         return self._fps
     
+    @property
+    def audio(self):
+        """The sound scheduler for this game.
+        
+        The scheduler plays the sounds of `SharedSoundLibrary()`.  It is created
+        the first time this attribute is used (or when the game starts), after
+        loading the sounds in SOUNDS, and flushed at the end of every animation
+        frame.  If the game was made with sound=False, it is a scheduler that
+        plays nothing, and no sounds are loaded (nor is pygame imported).
+        
+        **Invariant**: Immutable instance of SoundScheduler."""
+        if self._audio is None:
+            if self._sound:
+                library = SharedSoundLibrary()
+                library.preload(self.SOUNDS)
+                self._audio = SoundScheduler(library)
+            else:
+                self._audio = _SilentScheduler()
+        return self._audio
+    
+    @property
+    def seed(self):
+        """The random seed for this session.
+        
+        Games should derive all of their randomness from this seed, so that
+        a session can be replayed from its recorded input.
+        
+        **Invariant**: Immutable int >= 0."""
+        return self._seed
+    
+    @property
+    def physics(self):
+        """Fixed simulation rate, in updates per second
+        
+        The method `update` is always called with the same `dt`, namely
+        1/physics, no matter how fast frames are actually drawn.  If a frame
+        takes longer than that, `update` is called several times to catch
+        up (but never more than `catchup` times in one frame).
+        
+        **Invariant**: Immutable float > 0."""
+        return self._physics
+    
+    @property
+    def catchup(self):
+        """The most calls to `update` made in a single animation frame
+        
+        When the game falls further behind than this, the missing time is
+        dropped rather than simulated, so a slow machine runs the game in
+        slow motion instead of stalling.
+        
+        **Invariant**: Immutable int > 0."""
+        return self._catchup
+    
+    @property
+    def alpha(self):
+        """How far the current frame is between the last two updates
+        
+        This is the unsimulated time left over after the last `update`, as
+        a fraction of a step.  Use it in `draw` to interpolate moving objects
+        between their last two positions so motion stays smooth when the
+        drawing rate differs from the physics rate.
+        
+        **Invariant**: Immutable float in 0..1."""
+        return self._alpha
+    
+    @property
+    def frameRate(self):
+        """The rate at which frames are being drawn right now
+        
+        This is `fps`, unless the game has lowered its frame rate with
+        `setFrameRate` and there has been no input for WAKE_SECONDS.  It is
+        0 if frames are only drawn when there is input.
+        
+        **Invariant**: Immutable float >= 0."""
+        return self._rate
+    
+    @property
+    def skipped(self):
+        """The number of frames not drawn because the frame rate was lowered
+        
+        This counts the frames that would have been drawn at `fps` in the
+        time the game was drawn at a lower rate.
+        
+        **Invariant**: Immutable int >= 0."""
+        return self._skipped
+    
+    @property
+    def profiler(self):
+        """The frame profiler for this game, or None if it is not profiled.
+        
+        **Invariant**: Immutable instance of FrameProfiler, or None."""
+        return self._profiler
+    
+    @property
+    def latency(self):
+        """The input latency monitor for this game, or None if it is not measured.
+        
+        **Invariant**: Immutable instance of LatencyMonitor, or None."""
+        return self._latency
+    
     @property
     def view(self):
         """The Game view.
@@ -1573,38 +3352,143 @@ class GameApp(kivy.app.App):
         
             Game(width=400,height=400)
         
+        The keywords `fps` (drawing rate), `physics` (update rate) and
+        `catchup` (most updates per frame) are optional and default to
+        60, 60 and 5.  The keyword `retained` (default True) chooses a
+        retained or immediate `GView`; see that class.
+        
+        The keyword `seed` sets the session seed (a random one is chosen if it is
+        missing).  The keyword `record` names a file to record the session's input
+        to (see `InputRecorder`), and `sound` (default True) may be set to False
+        to make `audio` silent.
+        
+        The keyword `profile` turns on the `profiler`: True to profile, or a file
+        name to also dump the profile to when the game stops.  The keyword `hud`
+        (default False) profiles the game and shows the profile on screen.  They
+        default to the environment variables GAME2D_PROFILE and GAME2D_HUD.
+        The keyword `latency` turns on the `latency` monitor in the same way
+        (True, or a file name to dump it to), and defaults to GAME2D_LATENCY.
+        
         The game window will not show until you start the game.
         To start the game, use the method `run()`."""
         w = keywords['width']  if  'width' in keywords else 0.0
         h = keywords['height'] if 'height' in keywords else 0.0
         f = keywords['fps']    if 'fps'    in keywords else 60.0
+        p = keywords['physics'] if 'physics' in keywords else 60.0
+        c = keywords['catchup'] if 'catchup' in keywords else 5
+        r = keywords['retained'] if 'retained' in keywords else True
+        d = keywords['seed']     if 'seed'     in keywords else None
+        if d is None:
+            d = random.SystemRandom().getrandbits(32)
 
         assert type(w) in [int, float], `w`+' is not a number'
         assert type(h) in [int, float], `h`+' is not a number'
         assert type(f) in [int, float], `f`+' is not a number'
         assert f > 0.0, `f`+' is not positive'
+        assert type(p) in [int, float], `p`+' is not a number'
+        assert p > 0.0, `p`+' is not positive'
+        assert type(c) == int and c > 0, `c`+' is not a positive int'
+        assert type(r) == bool, `r`+' is not a bool'
+        assert type(d) in [int, long] and d >= 0, `d`+' is not a valid seed'
         self._wwidth = w
         self._wheight = h
         self._fps = f
-        Config.set('graphics', 'width', str(self.width))
-        Config.set('graphics', 'height', str(self.height))
-        
-        # Tell Kivy to build the application
-        kivy.app.App.__init__(self,**keywords)
+        self._physics = float(p)
+        self._catchup = c
+        self._retained = r
+        self._seed = d
+        self._record = keywords['record'] if 'record' in keywords else None
+        self._sound = keywords['sound'] if 'sound' in keywords else True
+        self._recorder = None
+        self._accumulator = 0.0
+        self._alpha = 0.0
+        self._audio = None
+        self._keywords = keywords
+        self._app = None
+        self._view = None
+        self._frames = 0
+        
+        profile = keywords['profile'] if 'profile' in keywords else os.environ.get(PROFILE_REPORT)
+        self._hud = keywords['hud'] if 'hud' in keywords else bool(os.environ.get(PROFILE_HUD))
+        assert type(self._hud) == bool, `self._hud`+' is not a bool'
+        self._dump = profile if type(profile) == str else None
+        self._profiler = FrameProfiler() if profile or self._hud else None
+        self._overlay = None
+        
+        latency = keywords['latency'] if 'latency' in keywords else os.environ.get(LATENCY_REPORT)
+        self._latencyDump = latency if type(latency) == str else None
+        self._latency = LatencyMonitor() if latency else None
+        
+        self._running = False
+        self._target = self._fps
+        self._rate = 0.0
+        self._wake = 0.0
+        self._drawn = 0.0
+        self._throttled = False
+        self._skipped = 0
     
     def build(self):
-        """Special Kivy method to initialize the graphics window"""
-        self._view = GView()
-        self._view.size_hint = (1,1)
-        return self.view
+        """Creates the view, and returns its widget to be the Kivy window"""
+        self._view = GView(self._retained)
+        self._view.widget.size_hint = (1,1)
+        self._view.widget.bind(on_touch_down=self._input, on_touch_move=self._input,
+                               on_touch_up=self._input)
+        return self._view.widget
     
     def _startup(self,dt):
         """Called to initialize.
         
         This is a callback-proxy for method init().  It handles
         important issues behind the scenes."""
-        Clock.schedule_interval(self._refresh,1.0/self._fps)
+        self._running = True
+        self._wake = time.time()+WAKE_SECONDS
+        if not self._latency is None:
+            from kivy.core.window import Window
+            Window.bind(on_flip=self._flipped)
+        if self.SOUNDS:
+            self.audio # Load the sounds now, not at the first one played
         self.init()
+        self._schedule()
+    
+    def setFrameRate(self, fps=None):
+        """Sets the rate at which to draw frames while there is no input.
+        
+            :param fps: the frames per second, 0 to only draw when there is
+            input, or None for the full rate `fps`
+            **Precondition**: None or a number (int or float) in 0..fps
+        
+        A game that has nothing moving on screen (e.g. one waiting for a
+        click) can lower its frame rate to save power.  Any input (a touch,
+        a move or a release) puts the rate back up to `fps` at once, and it
+        stays there until there has been no input for WAKE_SECONDS.  Since
+        `update` is only called when a frame is drawn, a game should only
+        lower its rate while it does not need to be updated without input."""
+        if fps is None:
+            fps = self._fps
+        assert type(fps) in [int, float] and 0 <= fps <= self._fps, `fps`+' is not a valid frame rate'
+        self._target = float(fps)
+        self._schedule()
+    
+    def _schedule(self):
+        """Helper to schedule _refresh at the frame rate that is right for now.
+        
+        Nothing is done until the game is running, or if the rate is the same."""
+        if not self._running:
+            return
+        rate = self._fps if time.time() < self._wake else self._target
+        if rate == self._rate:
+            return
+        if self._rate > 0:
+            Clock.unschedule(self._refresh)
+        if rate > 0:
+            Clock.schedule_interval(self._refresh,1.0/rate)
+        self._rate = rate
+    
+    def _input(self,view,touch):
+        """Helper called on every touch event, to draw at the full rate for a while"""
+        self._wake = time.time()+WAKE_SECONDS
+        if self._rate < self._fps:
+            self._schedule()
     
     def _refresh(self,dt):
         """Called every animation frame.
@@ -1613,23 +3497,123 @@ class GameApp(kivy.app.App):
             **Precondition**: a number (int or float)
         
         This is a callback-proxy for method update().  It handles
-        important issues behind the scenes."""
+        important issues behind the scenes.  The real time dt is added to an
+        accumulator, which is spent in fixed steps of 1/physics seconds,
+        calling update once per step (after moving the mouse events queued
+        by the view to `view.events`).  At most catchup steps are taken; any
+        time beyond that is dropped.  Whatever is left (less than one step)
+        becomes alpha for draw().  Finally, the sounds requested during the
+        frame are played.  If the game is profiled, the time spent in each of
+        these parts is recorded."""
+        profiler = self._profiler
+        if not profiler is None:
+            counts = (_COUNTS[0], _COUNTS[1], self._played())
+        start = time.time()
         self.view._redraw()
-        self.update(dt)
+        redrawn = time.time()
+        step = 1.0/self._physics
+        self._accumulator += dt
+        steps = 0
+        while self._accumulator >= step and steps < self._catchup:
+            events = self.view._next()
+            if not self._recorder is None:
+                self._recorder.record(self.view.touch,events)
+            self.update(step)
+            if events and not self._latency is None:
+                self._latency.applied(events,time.time())
+            self._accumulator -= step
+            steps += 1
+        if self._accumulator >= step:
+            self._accumulator = math.fmod(self._accumulator, step)
+        self._alpha = self._accumulator/step
+        updated = time.time()
         self.draw()
+        if self._hud:
+            self._drawOverlay()
+        drawn = time.time()
+        self.view._flush()
+        if not self._audio is None:
+            self._audio.flush()
+        if not self._latency is None:
+            self._latency.submitted(time.time())
+        if not profiler is None:
+            done = time.time()
+            profiler.record((1000*dt, 1000*(done-start), 1000*(redrawn-start),
+                             1000*(updated-redrawn), 1000*(drawn-updated), 1000*(done-drawn),
+                             steps, _COUNTS[0]-counts[0], _COUNTS[1]-counts[1],
+                             self._played()-counts[2]))
+        if self._frames == 0:
+            _startupStep('first frame', _LOADED)
+        self._frames += 1
+        
+        # Count the frames a lowered rate skipped, and lower it again after input
+        now = time.time()
+        if self._throttled:
+            self._skipped += max(int((now-self._drawn)*self._fps+0.5)-1, 0)
+        self._drawn = now
+        if self._rate != self._target and now >= self._wake:
+            self._schedule()
+        self._throttled = self._rate < self._fps
+    
+    def _flipped(self,window):
+        """Helper called when Kivy shows a frame, to time the input in it"""
+        self._latency.flipped(time.time())
+    
+    def _played(self):
+        """Returns the number of sounds played so far by `audio` (0 if it is unused)"""
+        if self._audio is None:
+            return 0
+        return self._audio.stats()['played']
+    
+    def _drawOverlay(self):
+        """Draws the profiler report in the top left corner of the view.
+        
+        The text is only changed every HUD_FRAMES frames, so that it can be
+        read (and is not rendered every frame)."""
+        if self._overlay is None:
+            self._overlay = GLabel(left=0, top=self.height, valign='top', font_size=12,
+                                   linecolor=[1.0,1.0,0.0,1.0], fillcolor=[0.0,0.0,0.0,0.6])
+        if self._frames % HUD_FRAMES == 0 and len(self._profiler):
+            self._overlay.text = self._profiler.report()
+        self._overlay.draw(self.view)
     
     def run(self):
         """Display the game window and start the game"""
+        _require_kivy()
+        Config.set('graphics', 'width', str(self.width))
+        Config.set('graphics', 'height', str(self.height))
+        if not self._record is None:
+            self._recorder = InputRecorder(self._record,self._seed,1.0/self._physics)
+        
+        # Tell Kivy to build the application
+        self._app = _kivyApp()(self,**self._keywords)
         Clock.schedule_once(self._startup,-1)
-        kivy.app.App.run(self)
+        self._app.run()
     
     def stop(self):
         """Close the game window and exit Python.
         
         You should never need to call this"""
-        kivy.app.App.stop(self)
+        self._shutdown()
+        if not self._app is None:
+            self._app.stop()
         sys.exit(0)
     
+    def _shutdown(self):
+        """Called when the game stops, by `stop` or by closing the window.
+        
+        This closes the input recorder, so the log is complete, and dumps
+        the profile and the latency histograms if they were given file
+        names.  It never exits Python (Kivy is still stopping), and it is
+        safe to call more than once."""
+        if not self._recorder is None:
+            self._recorder.close()
+            self._recorder = None
+        if not self._dump is None:
+            self._profiler.dump(self._dump)
+        if not self._latencyDump is None:
+            self._latency.dump(self._latencyDump)
+    
     def init(self):
         """Initialize the game state.
         
@@ -1639,12 +3623,13 @@ class GameApp(kivy.app.App):
         pass
     
     def update(self,dt):
-        """Called every animation frame.
+        """Called every simulation step.
         
-            :param dt: time in seconds since last update
+            :param dt: the fixed step length, 1/physics seconds
             **Precondition**: a number (int or float)
         
-        This method is called 60x a second to provide on-screen animation.
+        This method is called `physics` times a second (60 by default), 
+        independent of the drawing rate, to provide on-screen animation.
         Think of it as the body of the loop.  It is best to have fields
         that represent the current animation state so that you know where
         you are in the animation."""
@@ -1652,3 +3637,6 @@ class GameApp(kivy.app.App):
     
     def draw(self):
         pass
+
+
+_startupStep('import game2d', _LOADED)
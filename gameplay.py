@@ -8,18 +8,24 @@ Instances of Gameplay represent a single game.  If you want to restart a new gam
 you are expected to make a new instance of Gameplay.
 
 The subcontroller Gameplay manages the paddle, ball, and bricks.  These are model
-objects.  The ball and the bricks are represented by classes stored in models.py.
-The paddle does not need a new class (unless you want one), as it is an instance
-of GRectangle provided by game2d.py.
+objects, and they are all represented by classes stored in models.py.  Neither this
+module nor models.py imports game2d, so a Gameplay can be created and stepped
+headlessly (no Kivy window, no sound device).  The views are only created when the
+game is drawn, and sounds are only played if a sound library is provided.
 
 Most of your work on this assignment will be in either this module or models.py.
 Whether a helper method belongs in this module or models.py is often a complicated
 issue.  If you do not know, ask on Piazza and we will answer."""
+import logging
+import random
 from constants import *
-from game2d import *
 from models import *
 
 
+#: the log that records the seed of every game
+_LOG = logging.getLogger('breakout')
+
+
 # PRIMARY RULE: Gameplay can only access attributes in models.py via getters/setters
 # Gameplay is NOT allowed to access anything in breakout.py (Subcontrollers are not
 # permitted to access anything in their parent. To see why, take CS 3152)
@@ -38,11 +44,12 @@ class Gameplay(object):
     
     INSTANCE ATTRIBUTES:
         _wall   [BrickWall]:  the bricks still remaining 
-        _paddle [GRectangle]: the paddle to play with 
-        _ball [Ball]: 
-            the ball to animate
-        _last [GPoint, or None if mouse button is not pressed]:  
-            last mouse position (if Button pressed)
+        _paddle [Paddle]:     the paddle to play with 
+        _balls [BallPool]:
+            the balls to animate; at least one is in play (unless the game
+            was made with no balls), and a lost ball goes back to the pool
+        _last [float, or None if mouse button is not pressed]:  
+            the x coordinate of the last mouse event (if Button pressed)
         _tries  [int >= 0]:   the number of tries left 
     
     As you can see, all of these attributes are hidden.  You may find that you
@@ -57,6 +64,13 @@ class Gameplay(object):
     put them and their invariants below.
                   
     LIST MORE ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
+        _sounds [SoundScheduler or SoundLibrary, or None if headless]:
+            plays the sounds named 'music' (new ball), 'bounce' (paddle)
+            and 'explosion' (brick) through its play(name) method
+        _seed [int >= 0]: the seed of _rng
+        _rng [random.Random]:
+            the random stream used by every model in this game.  Two games
+            with the same seed and the same paddle moves play out identically.
     """
 
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
@@ -66,39 +80,106 @@ class Gameplay(object):
     def setTries(self, tries):
         """sets attribute _tries"""
         self._tries = tries
+    def getSeed(self):
+        """returns attribute _seed"""
+        return self._seed
+    def getBall(self):
+        """returns the first ball in play (the one served first), or None if
+        there is no ball in play"""
+        balls = self._balls.getBalls()
+        return balls[0] if balls else None
+    def getBalls(self):
+        """returns the list of balls in play.  It is the pool's own list, so
+        do not change it"""
+        return self._balls.getBalls()
+    def getPaddle(self):
+        """returns attribute _paddle"""
+        return self._paddle
+    def getBrickCount(self):
+        """returns the number of bricks left in _wall"""
+        return self._wall.getBrickCount()
+    def getWall(self):
+        """returns attribute _wall"""
+        return self._wall
     
     
     # INITIALIZER (standard form) TO CREATE PADDLES AND BRICKS
-    def __init__(self):
+    def __init__(self, sounds=None, rows=BRICK_ROWS, cols=BRICKS_IN_ROW, seed=None, hp=1,
+                 balls=1, pool=BALL_POOL):
         """initializes an instance of Gameplay.
         
-            sets wall, paddle, tries, and ball to their initial states"""
-        self._wall = BrickWall()
-        self._paddle = GRectangle(x = GAME_WIDTH/2,
-                                  y = PADDLE_OFFSET,
-                                  width = PADDLE_WIDTH,
-                                  height = PADDLE_HEIGHT)
+            sets wall, paddle, tries, and balls to their initial states
+            
+            Parameter sounds: the sounds to play, or None to play no sounds
+            Precondition: sounds is None or has a method play(name) for the
+            names 'music', 'bounce' and 'explosion'
+            
+            Parameters rows, cols: the size of the brick wall
+            Precondition: rows and cols are ints > 0
+            
+            Parameter seed: the seed for the random stream, or None to pick one
+            Precondition: seed is None or an int >= 0
+            
+            Parameter hp: the number of hits it takes to break a brick
+            Precondition: hp is an int in 1..255
+            
+            Parameter balls: the number of balls to serve at the start
+            Precondition: balls is an int >= 0
+            
+            Parameter pool: the number of balls to make up front, which is the
+            most that can be in play at once (at least balls are made)
+            Precondition: pool is an int > 0"""
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)
+        self._seed = seed
+        self._rng = random.Random(seed)
+        _LOG.info('new game: seed=%d, wall=%dx%d', seed, rows, cols)
+        self._sounds = sounds
+        self._wall = BrickWall(rows, cols, hp)
+        self._paddle = Paddle()
         self._last = None
+        self._balls = BallPool(max(pool, balls), self._rng)
         self.setTries(NUMBER_TURNS)
-        self._ball = Ball()
+        if balls > 0:
+            self.newBall()
+            self.addBalls(balls-1)
 
 
     # DRAW METHOD TO DRAW THE PADDLES, BALL, AND BRICKS
-    def draw(self, view):
-        """draws bricks, ball, paddle
+    def draw(self, view, alpha=1.0):
+        """draws bricks, balls, paddle
         
-            Parameters: view"""
+            The paddle and balls are drawn alpha of the way between their
+            positions before and after the last update.
+            
+            Parameters: view, and alpha (a float in 0..1)"""
         self._wall.draw(view)
-        self._paddle.draw(view)
-        self._ball.draw(view)
+        self._paddle.draw(view, alpha)
+        self._balls.draw(view, alpha)
         
 
     # UPDATE METHODS TO MOVE PADDLE, SERVE AND MOVE THE BALL
-    def updatePaddle(self, touch, last):
-        """updates _paddles position to follow that of the change in mouse position
-        Parameters: touch, last"""
-        if not last is None and not touch is None:
-            self._paddle.x += touch.x - last.x
+    def updatePaddle(self, events):
+        """updates _paddles position to follow every change in mouse position
+        since the last update
+        
+        The paddle moves by the horizontal distance between each event and
+        the one before it, as long as the mouse button stays pressed.  So a
+        drag is followed exactly, however many events arrive in one update.
+        
+        Parameter events: the mouse events, oldest first
+        Precondition: events is a sequence of objects with attributes kind
+        ('down', 'move' or 'up') and x, such as the TouchEvents of a GView"""
+        self._paddle.remember()
+        for event in events:
+            if event.kind != 'down' and not self._last is None:
+                self.movePaddle(event.x - self._last)
+            self._last = None if event.kind == 'up' else event.x
+    
+    def movePaddle(self, dx):
+        """moves the paddle dx pixels horizontally, keeping it on the screen
+        Parameter dx: the distance to move (negative is left)"""
+        self._paddle.x += dx
         if min(self._paddle.x, 0) < 0:
             self._paddle.x = 0
         if max(self._paddle.x + PADDLE_WIDTH, GAME_WIDTH) > GAME_WIDTH:
@@ -106,43 +187,85 @@ class Gameplay(object):
 
     
     def updateBall(self):
-        """makes use of move and detectWallCollision methods of _ball, and
-        _getCollidingObject method to check for any collisions and move the ball
+        """moves every ball in play for one frame with BrickWall.sweepBalls,
+        which bounces them off the walls, the paddle and the bricks (removing
+        any they hit), and plays a sound for each paddle and brick collision
+        
+        Balls that fall off the bottom go back to the pool, unless they were
+        the last ones in play (see detectFail).
         """
-   
-        self._ball.move()
-        self._ball.detectWallCollision()
-        self._getCollidingObject()   
-    
-    
-    def _getCollidingObject(self):
-        """Returns: GObject that has collided with the ball
-    
-        This method checks the four corners of the ball, one at a 
-        time. If one of these points collides with either the paddle 
-        or a brick, it stops the checking immediately and returns the 
-        object involved in the collision. It returns None if no 
-        collision occurred."""
-        self._wall.brickCollision(self._ball)
-        self._ball.detectPaddleCollision(self._paddle)
+        for ball, obj, side in self._wall.sweepBalls(self._balls.getBalls(), self._paddle):
+            if obj is self._paddle:
+                self._playSound('bounce')
+            elif not obj is None:
+                self._playSound('explosion')
+        self._balls.recycle()
 
 
     # HELPER METHODS FOR PHYSICS AND COLLISION DETECTION
     
+    def _playSound(self, name):
+        """Plays the sound for name, unless this game has no sounds"""
+        if not self._sounds is None:
+            self._sounds.play(name)
+    
     # ADD ANY ADDITIONAL METHODS (FULLY SPECIFIED) HERE
     
     def detectFail(self):
-        """This function detects whether or not the ball is above the bottom of the screen
-        Returns True if ball below bottom, False otherwise"""
+        """This function detects whether or not the balls are above the bottom of the screen
+        Returns True if every ball is below bottom, False otherwise"""
         
-        if self._ball.bottom <= 0:
+        if self._balls.allFallen():
             return True
         else:
             return False
         
     def newBall(self):
-        """Creates a new ball"""
-        self._ball = Ball()
+        """Takes the balls out of play and serves a new one from the pool"""
+        self._balls.clear()
+        self._balls.serve()
+        self._playSound('music')
+    
+    def addBalls(self, count):
+        """Serves count more balls from the pool (as many as it has left),
+        each going left or right at a random speed in MULTIBALL_SPEED, and
+        returns the number served
+        
+        Parameter count: the number of balls to add
+        Precondition: count is an int >= 0"""
+        served = 0
+        while served < count and len(self._balls) < self._balls.getSize():
+            self._balls.serve(self._rng.uniform(*MULTIBALL_SPEED))
+            served += 1
+        return served
+    
+    def loseLife(self):
+        """Takes away a try and replaces the lost balls with a new one"""
+        self.newBall()
+        self.setTries(self.getTries() - 1)
+    
+    def isWon(self):
+        """Returns True if every brick has been cleared"""
+        return self._wall.getBrickCount() == 0
+    
+    def isLost(self):
+        """Returns True if there are no tries left"""
+        return self._tries <= 0
+    
+    def step(self):
+        """Simulates one frame of play without any drawing.
+        
+        Moves the balls (as updateBall does) and takes away a life if the
+        last ball has fallen off the bottom.  It does nothing once the game is won
+        or lost, so a headless driver can simply call it in a loop.
+        Returns True if the game is still in progress"""
+        if self.isWon() or self.isLost():
+            return False
+        if self.detectFail():
+            self.loseLife()
+        else:
+            self.updateBall()
+        return not (self.isWon() or self.isLost())
     
     def checkBricks(self):
         """Returns list of Bricks"""
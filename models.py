@@ -6,38 +6,235 @@
 This module contains the model classes for the Breakout game. Anything that you
 interact with on the screen is model: the paddle, the ball, and any of the bricks.
 
-Just because something is a model does not mean there has to be a special class for
-it.  Unless you need something special for your extra gameplay features, both paddle
-and individual bricks can just be instances of GRectangle.  There is no need for a
-new class in the case of these objects.
+The models are pure Python.  They keep their own geometry (x, y, width and height,
+exactly as a GObject would) and do all of the physics themselves, so this module
+never imports game2d at load time.  That means the whole game can be simulated
+without Kivy or pygame, e.g. on a machine without a window or a sound device.
+Each model only builds its GObject view (a GRectangle or GEllipse) the first time
+it is drawn, and from then on just copies its position into that view.
 
 We only need a new class when we have to add extra features to our objects.  That
-is why we have classes for Ball and BrickWall.  Ball is usually a subclass of GEllipse,
-but it needs extra methods for movement and bouncing.  Similarly, BrickWall needs
-methods for accessing and removing individual bricks.
+is why we have classes for Ball and BrickWall.  Ball needs extra methods for
+movement and bouncing.  Similarly, BrickWall needs methods for accessing and
+removing individual bricks.  Paddle and Brick are plain rectangles.
 
 You are free to add new models to this module.  You may wish to do this when you add
-new features to your game.  If you are unsure about whether to make a new class or 
+new features to your game.  If you are unsure about whether to make a new class or
 not, please ask on Piazza."""
+import math
 import random # To randomly generate the ball velocity
 from constants import *
-from game2d import *
-
-def create_brick_row(i):
-        """A helper function that creates a row of bricks i rows from the top"""
-        brick_row = []
-        for j in range(BRICKS_IN_ROW):
-            brick_row.append(GRectangle(x = BRICK_SEP_H/2 + j*BRICK_SEP_H + j*BRICK_WIDTH,
-                       y = GAME_WIDTH - BRICK_Y_OFFSET - i*BRICK_SEP_V - i*BRICK_HEIGHT,
-                       width = BRICK_WIDTH,
-                       height = BRICK_HEIGHT,
-                       linecolor = ROW_COLORS[i%10],
-                       fillcolor = ROW_COLORS[i%10]))
-        return brick_row
+
+_INFINITY = float('inf')
+
+#: the most a ball's vertical speed can grow in one frame (verticalBounce
+#: scales it by up to 1.1 at each of at most MAX_BOUNCES collisions)
+_REACH = 1.1**MAX_BOUNCES
+
+
+def _game2d():
+    """Returns: the game2d module, imported on first use.
+
+    game2d pulls in Kivy and pygame, so the models only import it when
+    they are actually drawn."""
+    import game2d
+    return game2d
+
+
+def _sweep(body, dx, dy, rect):
+    """Returns: (t, side) for the first contact of body with rect, or None.
+
+    body is moved by (dx,dy) while rect stays still; t in [0,1] is the
+    fraction of that motion completed at contact, and side is the side of
+    body that touches rect ('left', 'right', 'bottom' or 'top').  This is a
+    ray test against rect grown by the size of body, so no contact is missed
+    however far body moves.  If the two already overlap, the contact is at
+    t = 0, unless body is moving apart from rect along the axis they last
+    came together on, in which case there is no contact."""
+    if dx > 0:
+        xin  = (rect.x - body.x - body.width)/dx
+        xout = (rect.x + rect.width - body.x)/dx
+    elif dx < 0:
+        xin  = (rect.x + rect.width - body.x)/dx
+        xout = (rect.x - body.x - body.width)/dx
+    elif body.x + body.width < rect.x or rect.x + rect.width < body.x:
+        return None
+    else:
+        xin, xout = -_INFINITY, _INFINITY
+    
+    if dy > 0:
+        yin  = (rect.y - body.y - body.height)/dy
+        yout = (rect.y + rect.height - body.y)/dy
+    elif dy < 0:
+        yin  = (rect.y + rect.height - body.y)/dy
+        yout = (rect.y - body.y - body.height)/dy
+    elif body.y + body.height < rect.y or rect.y + rect.height < body.y:
+        return None
+    else:
+        yin, yout = -_INFINITY, _INFINITY
+    
+    tin  = max(xin, yin)
+    tout = min(xout, yout)
+    if tin > tout or tin > 1 or tout <= 0:
+        return None
+    if xin > yin:
+        side = 'right' if dx > 0 else 'left'
+        apart = (body.x + body.width/2.0 - rect.x - rect.width/2.0)*dx > 0
+    else:
+        side = 'top' if dy > 0 else 'bottom'
+        apart = (body.y + body.height/2.0 - rect.y - rect.height/2.0)*dy > 0
+    if tin <= 0 and apart:
+        return None
+    return (max(tin, 0.0), side)
+
+
 # PRIMARY RULE: Models are not allowed to access anything in any module other than
 # constants.py.  If you need extra information from Gameplay, then it should be
 # a parameter in your method, and Gameplay should pass it as a argument when it
-# calls the method.
+# calls the method.  (game2d is only used to build the views in draw.)
+
+
+class Body(object):
+    """An instance is an axis-aligned rectangle in the game world.
+
+    This is the headless stand-in for GObject.  It has the same geometry
+    attributes (x, y, width, height, plus left/right/bottom/top and
+    center_x/center_y), but they are plain numbers with no drawing attached.
+
+    INSTANCE ATTRIBUTES:
+        x      [int or float]: the horizontal coordinate of the left hand side
+        y      [int or float]: the vertical coordinate of the bottom
+        width  [int or float >= 0]: the horizontal width
+        height [int or float >= 0]: the vertical height
+        _view  [GObject, or None if never drawn]:
+            the view drawn for this body; created by _makeView on first draw
+        _px    [int or float]: the value of x when remember was last called
+        _py    [int or float]: the value of y when remember was last called
+
+    Bodies are made and moved in every frame, so the models use __slots__.
+    """
+
+    __slots__ = ('x', 'y', 'width', 'height', '_view', '_px', '_py')
+
+    @property
+    def left(self):
+        """The horizontal coordinate of the left hand side."""
+        return self.x
+
+    @property
+    def right(self):
+        """The horizontal coordinate of the right hand side."""
+        return self.x + self.width
+
+    @property
+    def bottom(self):
+        """The vertical coordinate of the bottom."""
+        return self.y
+
+    @property
+    def top(self):
+        """The vertical coordinate of the top."""
+        return self.y + self.height
+
+    @property
+    def center_x(self):
+        """The horizontal center of this body."""
+        return self.x + self.width/2.0
+
+    @center_x.setter
+    def center_x(self, value):
+        self.x = value - self.width/2.0
+
+    @property
+    def center_y(self):
+        """The vertical center of this body."""
+        return self.y + self.height/2.0
+
+    @center_y.setter
+    def center_y(self, value):
+        self.y = value - self.height/2.0
+
+    def __init__(self, x=0, y=0, width=0, height=0):
+        """Initializes a body with bottom left corner (x,y) and the given size"""
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self._view = None
+        self._px = x
+        self._py = y
+    
+    def remember(self):
+        """Records the current position as the start of a simulation step.
+        
+        draw interpolates from this position to the current one."""
+        self._px = self.x
+        self._py = self.y
+
+    def contains(self, x, y):
+        """Returns: True if this body contains the point (x,y), False otherwise.
+
+        This is the same rectangle test as GRectangle.contains."""
+        return (self.x <= x and x <= self.x + self.width and
+                self.y <= y and y <= self.y + self.height)
+
+    def _makeView(self):
+        """Returns: a new GObject to draw this body.  Subclasses override this."""
+        return _game2d().GRectangle(x=self.x, y=self.y,
+                                    width=self.width, height=self.height)
+
+    def draw(self, view, alpha=1.0):
+        """Draws this body, creating its view on the first call
+
+        The body is drawn at the fraction alpha of the way from its remembered
+        position to its current one.
+
+        Parameters: view, the GView to draw to, and alpha, a float in 0..1"""
+        if self._view is None:
+            self._view = self._makeView()
+        x = float(self._px + (self.x - self._px)*alpha)
+        y = float(self._py + (self.y - self._py)*alpha)
+        if self._view.x != x or self._view.y != y:
+            self._view._setPosition(x, y)
+        self._view.draw(view)
+
+
+class Paddle(Body):
+    """An instance is the paddle at the bottom of the screen.
+
+    The paddle is just a rectangle, so it adds nothing to Body beyond
+    its starting position and size."""
+
+    __slots__ = ()
+
+    def __init__(self):
+        """Initializes the paddle at its starting position"""
+        Body.__init__(self, x = GAME_WIDTH/2, y = PADDLE_OFFSET,
+                      width = PADDLE_WIDTH, height = PADDLE_HEIGHT)
+
+
+class Brick(Body):
+    """An instance is a single brick in the wall.
+
+    INSTANCE ATTRIBUTES:
+        color [colormodel color]: the line and fill color of this brick
+        slot  [int >= 0, or None if not in a wall]:
+            the index of this brick in its BrickWall grid
+    """
+
+    __slots__ = ('color', 'slot')
+
+    def __init__(self, x=0, y=0, width=0, height=0, color=None):
+        """Initializes a brick with the given geometry and color"""
+        Body.__init__(self, x, y, width, height)
+        self.color = color
+        self.slot = None
+
+    def _makeView(self):
+        """Returns: a new GRectangle to draw this brick"""
+        return _game2d().GRectangle(x=self.x, y=self.y,
+                                    width=self.width, height=self.height,
+                                    linecolor=self.color, fillcolor=self.color)
 
 
 class BrickWall(object):
@@ -45,108 +242,325 @@ class BrickWall(object):
     empty, the game is over and the player has won. This model class keeps track of
     all of the bricks in the game, allowing them to be added or removed.
     
+    The bricks sit on a fixed lattice, laid out as the original wall of
+    GRectangles was: a brick is GAME_WIDTH/cols-BRICK_SEP_H wide (BRICK_WIDTH,
+    for BRICKS_IN_ROW columns, with the same integer division), column j starts
+    at BRICK_SEP_H/2 plus j brick pitches (a brick and a gap), and row i has its
+    bottom at GAME_WIDTH-BRICK_Y_OFFSET minus i row pitches, with the color
+    ROW_COLORS[i%10].  So the wall does not
+    keep any brick objects at all.  It keeps one bit per lattice slot (the slot
+    of the brick in row i, column j is i*cols+j), set while the brick is still
+    standing, and works out the geometry of a brick from its slot when needed.
+    A wall of a million bricks takes 125 KB.
+    
+    Finding the bricks under a point or a rectangle is a little arithmetic to
+    get the row and column range.  The bricks found are returned as new Brick
+    objects, made on the spot; they are only descriptions of the slots, and
+    removing one just clears its bit.  Views are only made when the wall is
+    drawn, as one GRectangleBatch per row color.
+    
+    Bricks may take more than one hit to break.  In that case the wall also
+    keeps one byte of hit points per slot.
+    
     INSTANCE ATTRIBUTES:
-        _bricks [list of GRectangle, can be empty]:
-            This is the list of currently active bricks in the game.  When a brick
-            is destroyed, it is removed from the list.
+        _rows  [int > 0]: the number of rows of bricks
+        _cols  [int > 0]: the number of bricks in each row
+        _bits  [bytearray, length ceil(_rows*_cols/8)]:
+            the live bricks; slot s is bit 0x80>>(s%8) of byte s//8.  The
+            bits past the last slot are 0.
+        _hp    [bytearray of length _rows*_cols, or None if every brick breaks
+                in one hit]: the hits left for the brick in each slot
+        _count [int >= 0]: the number of slots that still hold a brick
+        _hits  [int in 1..255]: the hit points of each brick in a new wall
+        _pitch_x [float > 0]: the horizontal distance between brick columns
+        _pitch_y [float > 0]: the vertical distance between brick rows
+        _width   [int > 0]: the width of a brick
+        _batches [list of GRectangleBatch, or None if never drawn]:
+            the views for the wall, one batch per brick color
+        _slots   [dict, or None if never drawn]:
+            maps the slot of each brick that was drawn to its batch and the
+            index of the brick in that batch
+        _hidden  [list of int]:
+            the slots of bricks removed since the wall was last drawn
     
     As you can see, this attribute is hidden.  You may find that you want to access 
     a brick from class Gameplay. It is okay if you do that,  but you MAY NOT 
     ACCESS THE ATTRIBUTE DIRECTLY. You must use a getter and/or setter for any 
     attribute that you need to access in GameController.  Only add the getters and 
     setters that you need.
+    """
     
-    We highly recommend a getter called getBrickAt(x,y).  This method returns the first
-    brick it finds for which the point (x,y) is INSIDE the brick.  This is useful for
-    collision detection (e.g. it is a helper for _getCollidingObject).
+    def __init__(self, rows=BRICK_ROWS, cols=BRICKS_IN_ROW, hp=1):
+        """Initializes a full wall of bricks
+        
+            Parameter rows: the number of rows of bricks
+            Precondition: rows is an int > 0
+            
+            Parameter cols: the number of bricks in each row
+            Precondition: cols is an int > 0, with GAME_WIDTH/cols > BRICK_SEP_H
+            (so that a brick is at least a pixel wide; at most 80 columns)
+            
+            Parameter hp: the number of hits it takes to break a brick
+            Precondition: hp is an int in 1..255"""
+        assert GAME_WIDTH/cols > BRICK_SEP_H, `cols`+' columns leave no room for the bricks'
+        self._rows = rows
+        self._cols = cols
+        self._width = GAME_WIDTH/cols - BRICK_SEP_H
+        self._pitch_x = float(self._width + BRICK_SEP_H)
+        self._pitch_y = float(BRICK_SEP_V + BRICK_HEIGHT)
+        size = rows*cols
+        self._bits = bytearray('\xff')*(size//8)
+        if size % 8:
+            self._bits.append((0xff << (8 - size % 8)) & 0xff)
+        self._hits = hp
+        self._hp = None if hp == 1 else bytearray([hp])*size
+        self._count = size
+        self._batches = None
+        self._slots = None
+        self._hidden = []
+        
+    def draw(self, view):
+        """Draws the wall as one GRectangleBatch per brick color
+        
+        The batches are made on the first draw.  After that, drawing only
+        hides the bricks removed since the last draw, so it costs the same
+        however many bricks there are."""
+        if self._batches is None:
+            self._makeBatches()
+        else:
+            for slot in self._hidden:
+                batch, index = self._slots[slot]
+                batch.hide(index)
+        self._hidden = []
+        for batch in self._batches:
+            batch.draw(view)
     
-    You will probably want a draw method too.  Otherwise, you need getters in Gameplay
-    to draw the individual bricks.
+    def _makeBatches(self):
+        """Creates the batches that draw the bricks still in the wall"""
+        colors = []
+        groups = {}
+        for i in range(self._rows):
+            color = ROW_COLORS[i%10]
+            if not id(color) in groups:
+                colors.append(color)
+                groups[id(color)] = ([], [])
+            rects, slots = groups[id(color)]
+            y = self._bottom(i)
+            for slot in range(i*self._cols, (i+1)*self._cols):
+                if self.isAlive(slot):
+                    x = self._left(slot % self._cols)
+                    rects.append((x, y, self._width, BRICK_HEIGHT))
+                    slots.append(slot)
+        
+        self._batches = []
+        self._slots = {}
+        for color in colors:
+            rects, slots = groups[id(color)]
+            batch = _game2d().GRectangleBatch(rects=rects, linecolor=color, fillcolor=color)
+            for index in range(len(slots)):
+                self._slots[slots[index]] = (batch, index)
+            self._batches.append(batch)
     
-    LIST MORE ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
-    """
+    def _left(self, j):
+        """Returns: the left side of the bricks in column j"""
+        return BRICK_SEP_H/2 + j*self._pitch_x
     
-    def __init__(self):
-        self._bricks = []
-        self.breaking = Sound('explosion.wav')
-        for i in range(BRICK_ROWS):
-            self._bricks.extend(create_brick_row(i))
+    def _bottom(self, i):
+        """Returns: the bottom of the bricks in row i"""
+        return GAME_WIDTH - BRICK_Y_OFFSET - i*self._pitch_y
+    
+    def _column(self, x):
+        """Returns: the lattice column containing x (may be out of range)"""
+        return int(math.floor((x - BRICK_SEP_H/2)/self._pitch_x))
+    
+    def _row(self, y):
+        """Returns: the lattice row containing y (may be out of range)
         
-    def draw(self, view):
-        for brick in self._bricks:
-            brick.draw(view)
+        Row i covers the brick itself and the gap beneath it."""
+        top = GAME_WIDTH - BRICK_Y_OFFSET + BRICK_HEIGHT
+        return int(math.floor((top - y)/self._pitch_y))
+    
+    def isAlive(self, slot):
+        """Returns: True if the brick in the given slot is still standing"""
+        return self._bits[slot >> 3] & (0x80 >> (slot & 7)) != 0
+    
+    def getBits(self):
+        """Returns the bytearray of live bricks (see the class invariant for the
+        bit order).  It is the wall's own array, so do not change it."""
+        return self._bits
+    
+    def getHitPoints(self, slot):
+        """Returns the number of hits the brick in the given slot can still take
+        (0 if it is gone)"""
+        if self._hp is None:
+            return 1 if self.isAlive(slot) else 0
+        return self._hp[slot]
+    
+    def getBrick(self, slot):
+        """Returns: a new Brick for the brick in the given slot, or None if it is gone"""
+        if not self.isAlive(slot):
+            return None
+        i, j = divmod(slot, self._cols)
+        brick = Brick(x = self._left(j), y = self._bottom(i), width = self._width,
+                      height = BRICK_HEIGHT, color = ROW_COLORS[i%10])
+        brick.slot = slot
+        return brick
+    
+    def getBrickAt(self, x, y):
+        """Returns: the brick containing the point (x,y), or None if there
+        is no brick there"""
+        i = self._row(y)
+        j = self._column(x)
+        if 0 <= i < self._rows and 0 <= j < self._cols:
+            left = self._left(j)
+            bottom = self._bottom(i)
+            if (left <= x <= left + self._width and bottom <= y <= bottom + BRICK_HEIGHT):
+                return self.getBrick(i*self._cols+j)
+        return None
+    
+    def getBricksIn(self, left, bottom, right, top):
+        """Returns: the list of bricks overlapping the given rectangle
+        
+        Only the lattice cells under the rectangle are examined, so the cost
+        does not depend on the size of the wall."""
+        imin = max(self._row(top), 0)
+        imax = min(self._row(bottom), self._rows-1)
+        jmin = max(self._column(left), 0)
+        jmax = min(self._column(right), self._cols-1)
+        result = []
+        for i in range(imin, imax+1):
+            y = self._bottom(i)
+            if y <= top and bottom <= y + BRICK_HEIGHT:
+                for j in range(jmin, jmax+1):
+                    x = self._left(j)
+                    if (x <= right and left <= x + self._width and
+                        self.isAlive(i*self._cols+j)):
+                        result.append(self.getBrick(i*self._cols+j))
+        return result
+    
+    def removeBrick(self, brick):
+        """Removes brick from the wall, if it is still there"""
+        slot = brick.slot
+        if self.isAlive(slot):
+            self._bits[slot >> 3] &= ~(0x80 >> (slot & 7)) & 0xff
+            if not self._hp is None:
+                self._hp[slot] = 0
+            self._count -= 1
+            if not self._batches is None:
+                self._hidden.append(slot)
+    
+    def hitBrick(self, brick):
+        """Takes a hit point from brick, removing it from the wall if it has none
+        left.  Returns True if the brick was removed."""
+        if not self.isAlive(brick.slot):
+            return False
+        if not self._hp is None and self._hp[brick.slot] > 1:
+            self._hp[brick.slot] -= 1
+            return False
+        self.removeBrick(brick)
+        return True
     
     def brickCollision(self, ball):
-        """loops through _bricks and checks each corner of the GEllipse ball
-            for a collision. if there is a collision, pops brick from _bricks"""
-        for brick in self._bricks:
-            if brick.contains(ball.right,ball.bottom) and brick in self._bricks:
-                self.breaking.play()
-                self._bricks.remove(brick)
-                #print 'bottom right'
-                ball.verticalBounce()
-            if brick.contains(ball.left,ball.bottom) and brick in self._bricks:
-                self.breaking.play()
-                self._bricks.remove(brick)
-                #print 'bottom left'
-                ball.verticalBounce()
-            if brick.contains(ball.right,ball.top) and brick in self._bricks:
-                self.breaking.play()
-                self._bricks.remove(brick)
-                #print 'top right'
-                ball.verticalBounce()
-            if brick.contains(ball.left,ball.top) and brick in self._bricks:
-                self.breaking.play()
-                self._bricks.remove(brick)
-                #print 'top left'
-                ball.verticalBounce()
+        """checks the bricks overlapping the ball's bounding box for a
+            collision. if there is a collision, hits the brick (removing it
+            from the wall if it has no hit points left)
+            
+            Returns the number of bricks destroyed"""
+        hits = 0
+        for brick in self.getBricksIn(ball.left, ball.bottom, ball.right, ball.top):
+            if self.hitBrick(brick):
+                hits += 1
+            ball.verticalBounce()
+        return hits
     
+    def sweepBalls(self, balls, paddle):
+        """moves every ball in balls one frame with Ball.sweep, in one pass,
+            bouncing them off the walls, the paddle and the bricks (removing
+            any bricks with no hit points left)
+            
+            The lowest row of bricks is found once for the whole pass.  A ball
+            that cannot climb that high this frame is swept without looking
+            at the bricks at all, so balls down by the paddle cost no more
+            than their wall and paddle tests, however many there are.
+            
+            Returns the list of (ball, obj, side) collisions, in the order of
+            balls and then in the order each ball made them (see Ball.sweep)
+            
+            Parameter balls: the balls to move
+            Precondition: balls is a sequence of Ball
+            
+            Parameter paddle: the paddle to bounce off
+            Precondition: paddle is a Paddle"""
+        floor = self._bottom(self._rows-1)
+        hits = []
+        for ball in balls:
+            wall = self if ball.top + abs(ball.getYVelocity())*_REACH >= floor else None
+            for obj, side in ball.sweep(paddle, wall):
+                hits.append((ball, obj, side))
+        return hits
     
-    def getBrickList(self):
-        """getter for _bricks attribute"""
-        return self._bricks
+    def getBrickCount(self):
+        """Returns the number of bricks still in the wall"""
+        return self._count
     
+    def getBrickList(self):
+        """Returns a new list of the bricks still in the wall"""
+        return [self.getBrick(slot) for slot in range(self._rows*self._cols)
+                if self.isAlive(slot)]
     
     def newBricks(self, view):
         """re-initializes and re-draws the bricks"""
-        self.__init__()
-        for i in range(BRICK_ROWS):
-            self._bricks.extend(create_brick_row(i))
-        for brick in self._bricks:
-            brick.draw(view)
-        self.draw(view)    
-
-class Ball(GEllipse):
-    """Instance is a game ball.
-    
-    We extend GEllipse because a ball must have additional attributes for velocity.
-    This class adds this attributes and manages them.
+        self.__init__(self._rows, self._cols, self._hits)
+        self.draw(view)
     
+    def fill(self):
+        """puts every brick back in the wall, with all of its hit points
+        
+        Unlike newBricks, this keeps the same bit array (so getBits stays
+        valid) and does not draw.  The views are only made again on the next
+        draw if a brick was removed since they were made."""
+        size = self._rows*self._cols
+        if self._count < size:
+            self._bits[:] = bytearray('\xff')*(size//8)
+            if size % 8:
+                self._bits.append((0xff << (8 - size % 8)) & 0xff)
+            self._count = size
+            self._batches = None
+            self._slots = None
+            self._hidden = []
+        if not self._hp is None:
+            self._hp[:] = bytearray([self._hits])*size
+
+
+class Ball(Body):
+    """Instance is a game ball.
+
+    We extend Body because a ball must have additional attributes for velocity.
+    This class adds this attributes and manages them.  The ball is drawn as
+    a GEllipse, but it collides as the rectangle that bounds it.
+
     INSTANCE ATTRIBUTES:
-        _vx [int or float]: Velocity in x direction 
+        _vx [int or float]: Velocity in x direction
         _vy [int or float]: Velocity in y direction
-        bouncsound [wavefile sound object]: 
-    
+        _rng [random.Random]: the random stream for every random choice the
+            ball makes (Gameplay passes its own, so games can be replayed)
+
     The class Gameplay will need to look at these attributes, so you will need
     getters for them.  However, it is possible to write this assignment with no
     setters for the velocities.
-    
+
     How? The only time the ball can change velocities is if it hits an obstacle
     (paddle or brick) or if it hits a wall.  Why not just write methods for these
     instead of using setters?  This cuts down on the amount of code in Gameplay.
-    
-    In addition you must add the following methods in this class: an __init__
-    method to set the starting velocity and a method to "move" the ball.  The
-    __init__ method will need to use the __init__ from GEllipse as a helper.
-    The move method should adjust the ball position according to  the velocity.
-    
-    NOTE: The ball does not have to be a GEllipse. It could be an instance
-    of GImage (why?). This change is allowed, but you must modify the class
-    header up above.
-    
+
+    The collision methods do not play any sounds.  They report what they hit,
+    and Gameplay decides what that should sound like (if anything).
+
     LIST MORE ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
     """
-    
+
+    __slots__ = ('_vx', '_vy', '_rng')
+
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
     def getXVelocity(self):
         """gets _vx attribute of Ball"""
@@ -158,29 +572,155 @@ class Ball(GEllipse):
         """getter for y pos of ball"""
         return self.y
     # INITIALIZER TO SET RANDOM VELOCITY
-    def __init__(self):
-        GEllipse.__init__(self)
-        #used general idea from CS1110 documentation for assignment 7
-        self.gamemusic = Sound('gamemusic.wav')
-        self.gamemusic.play()
+    def __init__(self, rng=None, serve=True):
+        """Initializes a ball in the middle of the screen, falling
+        
+            Parameter rng: the random stream to use, or None for a new one
+            Precondition: rng is None or a random.Random
+            
+            Parameter serve: whether to serve the ball now (see reset).  If
+            False, the ball is still and takes nothing from rng until reset.
+            Precondition: serve is a bool"""
+        Body.__init__(self, width = BALL_DIAMETER, height = BALL_DIAMETER)
+        self._rng = random.Random() if rng is None else rng
         self._vx = 0
-        self._vx = self._vx * random.choice([-1, 1])
+        self._vy = 0
+        if serve:
+            self.reset()
+    
+    def reset(self, speed=0):
+        """Serves this ball again from the middle of the screen, falling
+        
+        This puts a ball back as new, so a lost ball can be played again
+        instead of making another (its view is kept as well).
+        
+            Parameter speed: the horizontal speed; the direction is random
+            Precondition: speed is an int or float >= 0"""
+        #used general idea from CS1110 documentation for assignment 7
+        self._vx = speed
+        self._vx = self._vx * self._rng.choice([-1, 1])
         self._vy = -3.0
-        self._width = BALL_DIAMETER
-        self._height = BALL_DIAMETER
         self.center_x = (GAME_WIDTH)/2
         self.center_y = GAME_HEIGHT/3
-        self.fillcolor = colormodel.BLACK
-        self.bouncesound = Sound('bounce.wav')
+        self.remember()
+
+    def _makeView(self):
+        """Returns: a new GEllipse to draw this ball"""
+        return _game2d().GEllipse(x=self.x, y=self.y,
+                                  width=self.width, height=self.height,
+                                  fillcolor=colormodel.BLACK)
+
+    def move(self):
+        """moves ball by _vx and _vy with each call"""
+        self.x += self._vx
+        self.y += self._vy
+    
+    def sweep(self, paddle, wall):
+        """moves ball by _vx and _vy, bouncing off anything in its path
         
+        Unlike move, this never skips over an obstacle.  It finds the first
+        thing the ball touches on its way (a side or top wall, the paddle, or
+        a brick), moves the ball exactly to it, bounces and carries on with
+        the rest of the frame.  Bricks that are hit lose a hit point, and are
+        removed from wall when they have none left.
+        At most MAX_BOUNCES collisions are resolved in one frame.
         
+        Bounces depend on the side of the ball that made contact: a left or
+        right contact negates _vx, a top or bottom one bounces vertically.
+        The paddle only counts when the ball is falling (as in
+        detectPaddleCollision).
         
-    def move(self):
-        """moves ball by _vx and _vy with each call"""
-        self.center_x += self._vx
-        self.center_y += self._vy
+        Returns the list of (obj, side) collisions in the order they happened,
+        where obj is the Paddle or Brick hit (None for a wall) and side is
+        the side of the ball that touched it.
+        
+        Parameter paddle: the paddle to bounce off
+        Precondition: paddle is a Paddle
+        
+        Parameter wall: the bricks to break, or None to ignore the bricks
+        Precondition: wall is a BrickWall or None"""
+        self.remember()
+        hits = []
+        remaining = 1.0
+        while len(hits) < MAX_BOUNCES:
+            dx = self._vx*remaining
+            dy = self._vy*remaining
+            first = self._firstHit(dx, dy, paddle, wall)
+            if first is None:
+                break
+            t, obj, side = first
+            self.x += dx*t
+            self.y += dy*t
+            remaining *= 1.0-t
+            
+            if obj is paddle:
+                self._paddleBounce(paddle)
+            elif side == 'left' or side == 'right':
+                self._vx = -1.0 * self._vx
+            elif obj is None:
+                self._vy = -1.0 * self._vy
+            else:
+                self.verticalBounce()
+            if isinstance(obj, Brick):
+                wall.hitBrick(obj)
+            hits.append((obj, side))
+        
+        self.x += self._vx*remaining
+        self.y += self._vy*remaining
+        return hits
+    
+    def _firstHit(self, dx, dy, paddle, wall):
+        """Returns: (t, obj, side) for the first collision if the ball moves by
+        (dx,dy), or None if it hits nothing.  See sweep for the meaning of t,
+        obj and side."""
+        first = None
+        if dx > 0 and self.right + dx >= GAME_WIDTH:
+            first = (max((GAME_WIDTH - self.right)/dx, 0.0), None, 'right')
+        elif dx < 0 and self.left + dx <= 0:
+            first = (max(-self.left/dx, 0.0), None, 'left')
+        if dy > 0 and self.top + dy >= GAME_HEIGHT:
+            t = max((GAME_HEIGHT - self.top)/dy, 0.0)
+            if first is None or t < first[0]:
+                first = (t, None, 'top')
         
+        if self._vy < 0:
+            contact = _sweep(self, dx, dy, paddle)
+            if not contact is None and (first is None or contact[0] < first[0]):
+                first = (contact[0], paddle, contact[1])
+        
+        if wall is None:
+            return first
+        for brick in wall.getBricksIn(min(self.left, self.left+dx),
+                                      min(self.bottom, self.bottom+dy),
+                                      max(self.right, self.right+dx),
+                                      max(self.top, self.top+dy)):
+            contact = _sweep(self, dx, dy, brick)
+            if not contact is None and (first is None or contact[0] < first[0]):
+                first = (contact[0], brick, contact[1])
+        return first
     
+    def _paddleBounce(self, paddle):
+        """bounces the ball up off paddle, picking a new random _vx
+        
+        The new _vx is picked as in detectPaddleCollision, from the first
+        corner of the ball (in its order) that is on the paddle: 5..15 for the
+        left top, 5..13 for the left bottom or right top, and -15..-5 for the
+        right bottom.  If no corner is on it (the contact point is rounded a
+        little off the paddle's edge), the ball goes right if its left edge is
+        over the paddle, and left if it only caught the paddle's left end."""
+        self.verticalBounce()
+        if paddle.contains(self.left,self.top):
+            self._vx = self._rng.uniform(5.0, 15.0)
+        elif paddle.contains(self.left,self.bottom) or paddle.contains(self.right,self.top):
+            self._vx = self._rng.uniform(5.0, 13.0)
+        elif paddle.contains(self.right,self.bottom):
+            self._vx = self._rng.uniform(-15.0,-5.0)
+        elif paddle.left <= self.left <= paddle.right:
+            self._vx = self._rng.uniform(5.0, 13.0)
+        else:
+            self._vx = self._rng.uniform(-15.0,-5.0)
+
+
     def detectWallCollision(self):
         """detects when ball collides with a game wall. Negates _vx when side
         wall is hit, negates _vy when top wall is hit"""
@@ -188,32 +728,124 @@ class Ball(GEllipse):
             self._vx = -1.0 * self._vx
         if self.top >= GAME_HEIGHT:
             self._vy = -1.0 * self._vy
-    
+
     def detectPaddleCollision(self, paddle):
         """loops through 4 corners of ball and checks if paddle contains any corners.
-        if paddle contains a corner, verticalBounce method called"""
+        if paddle contains a corner, verticalBounce method called
+
+        Returns True if the ball bounced off the paddle"""
         if paddle.contains(self.left,self.top) and self._vy < 0:
-            self.bouncesound.play()
             self.verticalBounce()
-            self._vx = random.uniform(5.0, 15.0)
-            #print 'topright paddle collision'
+            self._vx = self._rng.uniform(5.0, 15.0)
+            return True
         if paddle.contains(self.left,self.bottom) and self._vy < 0:
-            self.bouncesound.play()
             self.verticalBounce()
-            self._vx = random.uniform(5.0, 13.0)
-            #print 'bottomright paddle collision'
+            self._vx = self._rng.uniform(5.0, 13.0)
+            return True
         if paddle.contains(self.right,self.top) and self._vy < 0:
-            self.bouncesound.play()
             self.verticalBounce()
-            self._vx = random.uniform(5.0, 13.0)
-            #print 'topleft paddle collision'
+            self._vx = self._rng.uniform(5.0, 13.0)
+            return True
         if paddle.contains(self.right,self.bottom) and self._vy < 0:
-            self.bouncesound.play()
             self.verticalBounce()
-            self._vx = random.uniform(-15.0,-5.0)
-            #print 'bottomleft paddle collision'
+            self._vx = self._rng.uniform(-15.0,-5.0)
+            return True
+        return False
 
     def verticalBounce(self):
         """helper method to minimize repetition. Negates Y velocity with a .2 range of randomization"""
-        self._vy = random.uniform(-1.1,-.9) * self._vy
+        self._vy = self._rng.uniform(-1.1,-.9) * self._vy
+
+
+class BallPool(object):
+    """An instance is a fixed set of balls, some of them in play.
+
+    Every ball a game will ever use is made when the pool is made.  Serving a
+    ball takes one that is not in play and resets it, and a lost ball goes
+    back to the pool, so a game can serve and lose any number of balls
+    without making new objects (or new views: a ball keeps its GEllipse while
+    it waits in the pool).  All of the balls share the random stream of the
+    pool, so the order they are served in is part of the game's replay.
+
+    INSTANCE ATTRIBUTES:
+        _balls [list of Ball]: every ball in the pool
+        _live  [list of Ball]: the balls in play, in the order they were served
+        _free  [list of Ball]: the balls not in play; the last is served next
+    """
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def getSize(self):
+        """Returns the number of balls in the pool, in play or not"""
+        return len(self._balls)
+
+    def getBalls(self):
+        """Returns the list of balls in play, in the order they were served.
+        It is the pool's own list, so do not change it."""
+        return self._live
+
+    def __init__(self, size, rng):
+        """Initializes a pool of size balls, none of them in play
+
+            Parameter size: the number of balls
+            Precondition: size is an int > 0
+
+            Parameter rng: the random stream for the balls
+            Precondition: rng is a random.Random"""
+        self._balls = [Ball(rng, serve=False) for k in range(size)]
+        self._live = []
+        self._free = list(reversed(self._balls))
+
+    def __len__(self):
+        """Returns the number of balls in play"""
+        return len(self._live)
+
+    def serve(self, speed=0):
+        """Puts a ball from the pool in play, served as by Ball.reset, and
+        returns it (or None if every ball is already in play)
+
+            Parameter speed: the horizontal speed of the ball
+            Precondition: speed is an int or float >= 0"""
+        if not self._free:
+            return None
+        ball = self._free.pop()
+        ball.reset(speed)
+        self._live.append(ball)
+        return ball
+
+    def allFallen(self):
+        """Returns True if every ball in play is off the bottom of the screen
+        (or no ball is in play)"""
+        for ball in self._live:
+            if ball.bottom > 0:
+                return False
+        return True
+
+    def recycle(self):
+        """Returns the balls that have fallen off the bottom of the screen to
+        the pool, unless every ball in play has fallen, and returns the number
+        of balls returned
+
+        The last ball is never taken out of play this way, so a game can see
+        it fall (see allFallen).  The balls left in play keep their order."""
+        if self.allFallen():
+            return 0
+        kept = 0
+        for ball in self._live:
+            if ball.bottom > 0:
+                self._live[kept] = ball
+                kept += 1
+            else:
+                self._free.append(ball)
+        fallen = len(self._live)-kept
+        del self._live[kept:]
+        return fallen
+
+    def clear(self):
+        """Returns every ball in play to the pool"""
+        while self._live:
+            self._free.append(self._live.pop())
 
+    def draw(self, view, alpha=1.0):
+        """Draws the balls in play (see Body.draw)"""
+        for ball in self._live:
+            ball.draw(view, alpha)
@@ -0,0 +1,84 @@
+# replay.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""Replay module for Breakout
+
+This module replays a session recorded with InputRecorder (run __main__.py with
+the environment variable BREAKOUT_RECORD set to record one).  The recorded mouse
+input (the mouse position and the mouse events of each update) is fed back
+through Breakout.update, one recorded update at a time, with the
+recorded session seed.  Since every random choice in the game comes from that
+seed, the replay makes exactly the same moves as the original session.
+
+No window is opened and no sounds are played, and the updates are run back to
+back rather than 60 times a second.  This makes it possible to reproduce a bug
+from a player's log, or to time the game on a real session, without anyone at
+the mouse.  Run it as
+
+    python replay.py session.log"""
+import sys
+import time
+from constants import *
+from breakout import *
+
+
+class ReplayView(object):
+    """An instance stands in for the GView of a Breakout being replayed.
+    
+    It has the same touch and events attributes as GView, but the replay driver
+    sets them from the log.  It is an immediate view, and drawing to it does
+    nothing.
+    
+    INSTANCE ATTRIBUTES:
+        touch [GPoint, or None if mouse button is not pressed]:
+            the recorded mouse position for the current update
+        events [tuple of TouchEvent]:
+            the recorded mouse events for the current update
+    """
+    
+    def __init__(self):
+        """Initializes a view with no touch and no events"""
+        self.touch = None
+        self.events = ()
+    
+    @property
+    def retained(self):
+        """Always False; objects are drawn (to nothing) every time"""
+        return False
+    
+    def draw(self, cmd):
+        """Ignores the drawing command cmd"""
+        pass
+
+
+def replay(filename):
+    """Replays the session in the given log file and returns the game.
+    
+    The game is a Breakout that was never run.  Its view is a ReplayView, and
+    it is silent.  After the replay, its state is the state of the recorded
+    game after its last recorded update.
+    
+    Parameter filename: the log file to replay
+    Precondition: filename is a string naming a log written by InputRecorder"""
+    log = InputLog(filename)
+    game = Breakout(width=GAME_WIDTH, height=GAME_HEIGHT, physics=1.0/log.step,
+                    seed=log.seed, sound=False)
+    game._view = ReplayView()
+    game.init()
+    for touch, events in log:
+        game.view.touch = touch
+        game.view.events = events
+        game.update(log.step)
+    return game
+
+
+# Application code
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print 'usage: python replay.py session.log'
+        sys.exit(1)
+    start = time.time()
+    frames = sum(1 for touch in InputLog(sys.argv[1]))
+    replay(sys.argv[1])
+    elapsed = time.time()-start
+    print 'replayed %d updates in %.3f s (%.0f updates/s)' % (frames, elapsed, frames/max(elapsed, 1e-9))
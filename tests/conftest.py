@@ -0,0 +1,13 @@
+# tests/conftest.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""Shared setup for the Breakout tests
+
+The game modules sit in the folder above this one, and are imported as top
+level modules (as the game itself does), so that folder is put on the path.
+None of the tests open a window or play a sound, so they run without Kivy or
+pygame."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
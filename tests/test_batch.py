@@ -0,0 +1,86 @@
+# tests/test_batch.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""Tests that GameBatch plays by the discrete rules of the models
+
+A batch draws its random numbers from numpy, so a batch game does not play out
+like the models with the same seed.  These tests step one frame from the same
+positions instead, and compare everything the random numbers do not change:
+where the balls are, which way they go, and which bricks break."""
+import random
+import pytest
+numpy = pytest.importorskip('numpy')
+from constants import *
+from models import *
+from batch import GameBatch
+
+
+def _sign(x):
+    """Returns -1, 0 or 1, the sign of x"""
+    return cmp(float(x), 0.0)
+
+
+def _states(count, rows, rng):
+    """Returns a list of count random (x, y, vx, vy, paddle) starting states,
+    over the whole screen but mostly near the wall and the paddle"""
+    top = GAME_WIDTH - BRICK_Y_OFFSET + BRICK_HEIGHT
+    bottom = top - rows*(BRICK_HEIGHT + BRICK_SEP_V)
+    states = []
+    for k in range(count):
+        band = rng.choice([(bottom-20, top), (PADDLE_OFFSET-5, PADDLE_OFFSET+30),
+                           (1, GAME_HEIGHT-BALL_DIAMETER)])
+        states.append((rng.uniform(-2, GAME_WIDTH-BALL_DIAMETER+2), rng.uniform(*band),
+                       rng.uniform(-15, 15), rng.choice([-1, 1])*rng.uniform(3, 8),
+                       rng.uniform(0, GAME_WIDTH-PADDLE_WIDTH)))
+    return states
+
+
+def _modelFrame(state, rows, cols):
+    """Returns the ball, and the set of broken slots, after one frame of the
+    model rules from the given state"""
+    x, y, vx, vy, left = state
+    wall = BrickWall(rows, cols)
+    paddle = Paddle()
+    paddle.x = left
+    ball = Ball(random.Random(0))
+    ball.x, ball.y, ball._vx, ball._vy = x, y, vx, vy
+    ball.move()
+    ball.detectWallCollision()
+    ball.detectPaddleCollision(paddle)
+    wall.brickCollision(ball)
+    broken = set(slot for slot in range(rows*cols) if not wall.isAlive(slot))
+    return ball, broken
+
+
+@pytest.mark.parametrize('rows,cols', [(10, 10), (5, 8), (12, 7)])
+def test_batch_matches_models(rows, cols):
+    """One frame of a batch moves, bounces and breaks bricks as the models do"""
+    rng = random.Random(rows*cols)
+    states = _states(400, rows, rng)
+    batch = GameBatch(len(states), rows, cols, seed=1)
+    x, y, vx, vy = batch.getBalls()
+    for k in range(len(states)):
+        x[k], y[k], vx[k], vy[k], batch.getPaddles()[k] = states[k]
+    batch.step()
+    
+    bricks = batch.getBricks()
+    for k in range(len(states)):
+        ball, broken = _modelFrame(states[k], rows, cols)
+        assert x[k] == pytest.approx(ball.x)
+        assert y[k] == pytest.approx(ball.y)
+        assert _sign(vx[k]) == _sign(ball.getXVelocity())
+        assert _sign(vy[k]) == _sign(ball.getYVelocity())
+        assert set(numpy.flatnonzero(~bricks[k])) == broken
+        assert batch.getBrickCounts()[k] == rows*cols-len(broken)
+
+
+def test_batch_new_balls():
+    """A batch ball that falls off the bottom is replaced as Ball() would be,
+    at the cost of a try"""
+    batch = GameBatch(2, seed=2)
+    x, y, vx, vy = batch.getBalls()
+    y[0] = -1.0
+    batch.step()
+    ball = Ball(random.Random(0))
+    assert (x[0], y[0], vx[0], vy[0]) == (ball.x, ball.y, ball.getXVelocity(), ball.getYVelocity())
+    assert list(batch.getTries()) == [NUMBER_TURNS-1, NUMBER_TURNS]
@@ -0,0 +1,221 @@
+# tests/test_game2d.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""Tests for the parts of game2d that do not need Kivy: the timer queue, the
+mouse event queue of a view and the sound scheduler"""
+import collections
+import game2d
+from game2d import *
+
+
+def test_timers_fire_in_order():
+    """Timers fire in time order, and timers due together in the order they
+    were scheduled"""
+    timers = TimerQueue()
+    fired = []
+    timers.schedule(0.5, fired.append, 'c')
+    timers.schedule(0.2, fired.append, 'a')
+    timers.schedule(0.2, fired.append, 'b')
+    timers.schedule(1.0, fired.append, 'd')
+    assert len(timers) == 4
+    assert timers.advance(0.1) == 0
+    assert timers.advance(0.4) == 3
+    assert fired == ['a', 'b', 'c']
+    assert timers.now == 0.5
+    assert timers.advance(0.5) == 1
+    assert fired == ['a', 'b', 'c', 'd']
+    assert len(timers) == 0
+
+
+def test_timers_on_fixed_steps():
+    """A timer due after 60 steps of 1/60 fires on the 60th step, even though
+    the steps do not add up to exactly 1.0"""
+    timers = TimerQueue()
+    fired = []
+    timers.schedule(1.0, fired.append, True)
+    steps = 0
+    while not fired:
+        timers.advance(1/60.0)
+        steps += 1
+    assert steps == 60
+
+
+def test_cancel():
+    """A cancelled timer never fires, and cancelling a fired timer does nothing"""
+    timers = TimerQueue()
+    fired = []
+    first = timers.schedule(0.1, fired.append, 1)
+    second = timers.schedule(0.2, fired.append, 2)
+    timers.cancel(second)
+    assert len(timers) == 1
+    timers.advance(1.0)
+    assert fired == [1]
+    timers.cancel(first)
+    timers.cancel(second)
+    assert timers.advance(1.0) == 0
+
+
+def test_timer_schedules_timer():
+    """A timer may schedule another, which fires in the same advance if it is due,
+    and may cancel one that is due"""
+    timers = TimerQueue()
+    fired = []
+    late = timers.schedule(0.3, fired.append, 'late')
+    def chain():
+        fired.append('chain')
+        timers.schedule(0.0, fired.append, 'next')
+        timers.cancel(late)
+    timers.schedule(0.1, chain)
+    assert timers.advance(0.5) == 2
+    assert fired == ['chain', 'next']
+
+
+#: a stand-in for a Kivy touch
+_Touch = collections.namedtuple('_Touch', ('x', 'y'))
+
+
+def _queueView(size):
+    """Returns a GView with only its event queue set up (so no Kivy is needed),
+    holding at most size events"""
+    view = GView.__new__(GView)
+    view._queue = [None]*size
+    view._head = 0
+    view._count = 0
+    view._dropped = 0
+    view._events = ()
+    return view
+
+
+def test_event_queue_wraps():
+    """Events come out in order, however many times the ring wraps around"""
+    view = _queueView(4)
+    sent = 0
+    for burst in [1, 3, 2, 4, 3, 4, 1]:
+        for k in range(burst):
+            view._push(TOUCH_MOVE, _Touch(float(sent), 0.0))
+            sent += 1
+        events = view._next()
+        assert [event.x for event in events] == range(sent-burst, sent)
+        assert events is view.events
+        assert view._next() == ()
+    assert view.dropped == 0
+
+
+def test_event_queue_overflow():
+    """A full queue drops its oldest events, and counts them"""
+    view = _queueView(4)
+    view._push(TOUCH_DOWN, _Touch(0.0, 0.0))
+    view._next()
+    for k in range(1, 11):
+        view._push(TOUCH_MOVE, _Touch(float(k), 0.0))
+    events = view._next()
+    assert [event.x for event in events] == [7.0, 8.0, 9.0, 10.0]
+    assert [event.kind for event in events] == [TOUCH_MOVE]*4
+    assert view.dropped == 6
+    assert events[-1].time >= events[0].time
+
+
+class _Channel(object):
+    """A stand-in for a pygame mixer Channel, busy from play until stop"""
+    def __init__(self, index):
+        self.index = index
+        self.sound = None
+    
+    def get_busy(self):
+        return not self.sound is None
+    
+    def get_sound(self):
+        return self.sound
+    
+    def play(self, sound):
+        self.sound = sound
+    
+    def stop(self):
+        self.sound = None
+
+
+class _Mixer(object):
+    """A stand-in for pygame.mixer, with the given number of channels"""
+    def __init__(self, channels):
+        self.channels = [_Channel(i) for i in range(channels)]
+        self.reserved = 0
+    
+    def get_num_channels(self):
+        return len(self.channels)
+    
+    def set_num_channels(self, count):
+        self.channels = [self.Channel(i) for i in range(count)]
+    
+    def set_reserved(self, count):
+        self.reserved = count
+    
+    def Channel(self, index):
+        if index < len(self.channels):
+            return self.channels[index]
+        return _Channel(index)
+
+
+class _Pygame(object):
+    """A stand-in for the pygame module, with only a mixer"""
+    def __init__(self, channels):
+        self.mixer = _Mixer(channels)
+
+
+def _fakeMixer(monkeypatch, channels=8):
+    """Swaps pygame in game2d for a fake one whose mixer has the given number
+    of channels, with no channels reserved yet, and returns that mixer"""
+    fake = _Pygame(channels)
+    monkeypatch.setattr(game2d, 'pygame', fake, raising=False)
+    monkeypatch.setattr(game2d, '_SCHEDULED', [0])
+    return fake.mixer
+
+
+def test_scheduler_reserves_channels(monkeypatch):
+    """Each scheduler reserves channels after those of the last one, and the
+    mixer keeps channels free for everything else"""
+    mixer = _fakeMixer(monkeypatch)
+    first = SoundScheduler({}, channels=4)
+    assert [channel.index for channel in first._channels] == [0, 1, 2, 3]
+    assert mixer.reserved == 4
+    assert mixer.get_num_channels() == 4+game2d._FREE_CHANNELS
+    
+    second = SoundScheduler({}, channels=2)
+    assert [channel.index for channel in second._channels] == [4, 5]
+    assert mixer.reserved == 6
+    assert mixer.get_num_channels() == 6+game2d._FREE_CHANNELS
+
+
+def test_scheduler_limits_voices(monkeypatch):
+    """A sound requested many times in a frame plays once, and never on more
+    channels than its voice limit, or than the scheduler has"""
+    mixer = _fakeMixer(monkeypatch)
+    bounce = object()
+    crash = object()
+    scheduler = SoundScheduler({'bounce': bounce, 'crash': crash}, channels=3, voices=2)
+    for k in range(3):
+        scheduler.play('bounce')
+    scheduler.flush()
+    assert scheduler.stats() == {'played': 1, 'coalesced': 2, 'dropped': 0}
+    
+    scheduler.play('bounce')
+    scheduler.flush()
+    scheduler.play('bounce')
+    scheduler.flush()
+    assert [channel.sound for channel in scheduler._channels] == [bounce, bounce, None]
+    assert scheduler.stats() == {'played': 2, 'coalesced': 2, 'dropped': 1}
+    
+    scheduler.setVoices('crash', 1)
+    scheduler.play('crash')
+    scheduler.play('bounce')
+    scheduler.flush()
+    assert [channel.sound for channel in scheduler._channels] == [bounce, bounce, crash]
+    assert scheduler.stats() == {'played': 3, 'coalesced': 2, 'dropped': 2}
+    
+    scheduler._channels[0].stop()
+    scheduler.play('crash')
+    scheduler.flush()
+    assert scheduler.stats() == {'played': 3, 'coalesced': 2, 'dropped': 3}
+    scheduler.play('bounce')
+    scheduler.flush()
+    assert scheduler._channels[0].sound is bounce
+    assert mixer.channels[3].sound is None
@@ -0,0 +1,77 @@
+# tests/test_gameplay.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""Tests for Gameplay, played headlessly"""
+import random
+from constants import *
+from gameplay import *
+
+
+def _trace(seed, frames=3000, balls=1, rows=5, cols=8):
+    """Plays a game with a paddle that follows the ball, and returns the list
+    of the paddle, ball, brick count and tries after every frame"""
+    game = Gameplay(rows=rows, cols=cols, seed=seed, balls=balls)
+    rng = random.Random(seed)
+    trace = []
+    for frame in range(frames):
+        ball = game.getBall()
+        game.movePaddle(ball.center_x - game.getPaddle().center_x + rng.uniform(-30, 30))
+        running = game.step()
+        trace.append((game.getPaddle().x, [(b.x, b.y) for b in game.getBalls()],
+                      game.getBrickCount(), game.getTries()))
+        if not running:
+            break
+    return trace
+
+
+def test_same_seed_same_game():
+    """Two games with the same seed and the same paddle moves play out identically"""
+    assert _trace(11) == _trace(11)
+    assert _trace(11, balls=5) == _trace(11, balls=5)
+
+
+def test_different_seed_different_game():
+    """Games with different seeds do not play out the same"""
+    assert _trace(11) != _trace(12)
+
+
+def test_lose_life():
+    """A life is only lost when the last ball falls"""
+    game = Gameplay(rows=2, cols=2, seed=4, balls=3)
+    balls = list(game.getBalls())
+    balls[0].y = -10.0
+    balls[1].y = -10.0
+    assert not game.detectFail()
+    game.updateBall()
+    assert game.getBalls() == [balls[2]]
+    assert game.getTries() == NUMBER_TURNS
+    
+    balls[2].y = -10.0
+    assert game.detectFail()
+    game.step()
+    assert game.getTries() == NUMBER_TURNS-1
+    assert len(game.getBalls()) == 1
+    assert game.getBall().bottom > 0
+
+
+def test_add_balls():
+    """addBalls serves no more balls than the pool holds"""
+    game = Gameplay(seed=5, balls=2, pool=4)
+    assert game.addBalls(5) == 2
+    assert len(game.getBalls()) == 4
+    assert game.addBalls(1) == 0
+
+
+def test_update_paddle():
+    """The paddle follows a drag, event by event, up to the release, and
+    then stops"""
+    class Event(object):
+        def __init__(self, kind, x):
+            self.kind = kind
+            self.x = x
+    game = Gameplay(seed=6)
+    start = game.getPaddle().x
+    game.updatePaddle([Event('down', 100), Event('move', 110), Event('move', 105)])
+    assert game.getPaddle().x == start+5
+    game.updatePaddle([Event('up', 150), Event('move', 200)])
+    assert game.getPaddle().x == start+50
@@ -0,0 +1,209 @@
+# tests/test_models.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""Tests for the Breakout models: the brick wall, the ball and the ball pool"""
+import random
+import pytest
+from constants import *
+from models import *
+
+
+def _overlaps(brick, left, bottom, right, top):
+    """Returns True if brick overlaps the rectangle (edges touching count)"""
+    return (brick.left <= right and left <= brick.right and
+            brick.bottom <= top and bottom <= brick.top)
+
+
+def _bruteBricks(wall, rows, cols, left, bottom, right, top):
+    """Returns the set of slots of the standing bricks overlapping the
+    rectangle, found by checking every slot of the wall"""
+    return set(slot for slot in range(rows*cols)
+               if wall.isAlive(slot) and
+               _overlaps(wall.getBrick(slot), left, bottom, right, top))
+
+
+@pytest.mark.parametrize('rows,cols', [(10, 10), (7, 13), (3, 50), (1, 1)])
+def test_bricks_in_matches_brute_force(rows, cols):
+    """getBricksIn finds exactly the bricks a scan of every slot finds, as
+    bricks are hit and removed"""
+    rng = random.Random(rows*100+cols)
+    wall = BrickWall(rows, cols, 2)
+    standing = set(range(rows*cols))
+    top = GAME_WIDTH - BRICK_Y_OFFSET + BRICK_HEIGHT
+    bottom = top - rows*(BRICK_HEIGHT + BRICK_SEP_V) - 20
+    for trial in range(300):
+        x = rng.uniform(-20, GAME_WIDTH)
+        y = rng.uniform(bottom, top+10)
+        rect = (x, y, x + rng.uniform(0, 60), y + rng.uniform(0, 40))
+        found = wall.getBricksIn(*rect)
+        assert set(brick.slot for brick in found) == _bruteBricks(wall, rows, cols, *rect)
+        assert len(found) == len(set(brick.slot for brick in found))
+        
+        if found:
+            brick = rng.choice(found)
+            before = wall.getHitPoints(brick.slot)
+            removed = wall.hitBrick(brick)
+            assert removed == (before == 1)
+            assert wall.getHitPoints(brick.slot) == before-1
+            if removed:
+                standing.discard(brick.slot)
+        assert wall.getBrickCount() == len(standing)
+        assert set(brick.slot for brick in wall.getBrickList()) == standing
+
+
+def test_remove_brick():
+    """removeBrick takes a brick out at once, whatever its hit points, and only once"""
+    wall = BrickWall(4, 5, 3)
+    brick = wall.getBrick(7)
+    wall.removeBrick(brick)
+    assert not wall.isAlive(7)
+    assert wall.getBrick(7) is None
+    assert wall.getHitPoints(7) == 0
+    assert wall.getBrickCount() == 19
+    wall.removeBrick(brick)
+    assert wall.getBrickCount() == 19
+    assert not wall.hitBrick(brick)
+    assert wall.getBrickAt(brick.center_x, brick.center_y) is None
+
+
+@pytest.mark.parametrize('hp', [1, 3])
+def test_fill(hp):
+    """fill puts back every brick with its hit points, in the same bit array"""
+    wall = BrickWall(3, 5, hp)
+    bits = wall.getBits()
+    wall.removeBrick(wall.getBrick(9))
+    wall.hitBrick(wall.getBrick(2))
+    wall.fill()
+    assert wall.getBits() is bits
+    assert list(bits) == [0xff, 0xfe]
+    assert wall.getBrickCount() == 15
+    assert [wall.getHitPoints(slot) for slot in range(15)] == [hp]*15
+
+
+def test_bits_layout():
+    """The bit of slot s is 0x80>>(s%8) of byte s//8, and the bits past the
+    last slot are 0"""
+    wall = BrickWall(3, 5)
+    bits = wall.getBits()
+    assert len(bits) == 2
+    assert bits[1] == 0xfe
+    wall.removeBrick(wall.getBrick(9))
+    assert bits[1] == 0xbe
+
+
+def test_brick_width():
+    """A wall has bricks at least a pixel wide, or cannot be made"""
+    wall = BrickWall(1, 80)
+    assert wall.getBrick(79).width >= 1
+    assert wall.getBrick(79).right <= GAME_WIDTH
+    with pytest.raises(AssertionError):
+        BrickWall(1, 81)
+    with pytest.raises(AssertionError):
+        BrickWall(1, 200)
+
+
+@pytest.mark.parametrize('speed', [13.0, 25.0, 60.0, 150.0])
+def test_fast_ball_does_not_tunnel(speed):
+    """A ball rising faster than a brick is tall hits the lowest brick in its
+    column, and stops short of the bricks above it"""
+    wall = BrickWall(10, 10)
+    paddle = Paddle()
+    lowest = wall.getBrick(9*10 + 4)
+    ball = Ball(random.Random(0))
+    ball.center_x = lowest.center_x
+    ball.y = lowest.bottom - BALL_DIAMETER - 1.0
+    ball._vx = 0.0
+    ball._vy = speed
+    
+    hits = ball.sweep(paddle, wall)
+    assert hits[0][0].slot == lowest.slot
+    assert hits[0][1] == 'top'
+    assert not wall.isAlive(lowest.slot)
+    assert wall.getBrickCount() == 99
+    assert ball.getYVelocity() < 0
+    assert ball.top <= lowest.top
+
+
+def test_fast_ball_bounces_off_paddle():
+    """A ball falling faster than the paddle is tall bounces off it"""
+    paddle = Paddle()
+    ball = Ball(random.Random(0))
+    ball.center_x = paddle.center_x
+    ball.y = paddle.top + 5.0
+    ball._vx = 0.0
+    ball._vy = -40.0
+    hits = ball.sweep(paddle, BrickWall(1, 1))
+    assert hits[0] == (paddle, 'bottom')
+    assert ball.getYVelocity() > 0
+    assert ball.bottom >= paddle.top
+
+
+def test_overlapping_ball_moving_apart():
+    """A ball already overlapping a brick is not bounced if it is moving away
+    from it, but is (at once) if it is moving into it"""
+    wall = BrickWall(10, 10)
+    paddle = Paddle()
+    lowest = wall.getBrick(9*10 + 4)
+    ball = Ball(random.Random(0))
+    ball.center_x = lowest.center_x
+    ball.y = lowest.bottom - BALL_DIAMETER + 3.0
+    ball._vx = 0.0
+    ball._vy = -5.0
+    
+    assert ball.sweep(paddle, wall) == []
+    assert wall.isAlive(lowest.slot)
+    assert ball.getYVelocity() == -5.0
+    assert ball.y == lowest.bottom - BALL_DIAMETER - 2.0
+    
+    ball.y = lowest.bottom - BALL_DIAMETER + 3.0
+    ball._vy = 5.0
+    hits = ball.sweep(paddle, wall)
+    assert hits[0][0].slot == lowest.slot
+    assert hits[0][1] == 'top'
+    assert ball.getYVelocity() < 0
+
+
+def test_pool_serve():
+    """A pool serves each of its balls once, then nothing"""
+    pool = BallPool(3, random.Random(1))
+    served = [pool.serve() for k in range(3)]
+    assert pool.serve() is None
+    assert len(pool) == 3
+    assert pool.getBalls() == served
+    assert len(set(id(ball) for ball in served)) == 3
+    for ball in served:
+        assert ball.getYVelocity() == -3.0
+        assert ball.center_x == GAME_WIDTH/2
+
+
+def test_pool_recycle():
+    """recycle returns the fallen balls to the pool, keeping the order of the
+    others, but never the last balls in play"""
+    pool = BallPool(4, random.Random(2))
+    balls = [pool.serve() for k in range(4)]
+    balls[1].y = -1.0
+    balls[3].y = 0.0
+    assert pool.recycle() == 2
+    assert pool.getBalls() == [balls[0], balls[2]]
+    assert not pool.allFallen()
+    
+    again = pool.serve()
+    assert again is balls[3] or again is balls[1]
+    assert pool.getBalls()[-1] is again
+    
+    for ball in pool.getBalls():
+        ball.y = -5.0
+    assert pool.allFallen()
+    assert pool.recycle() == 0
+    assert len(pool) == 3
+
+
+def test_pool_clear():
+    """clear returns every ball, and the pool then serves the same balls again"""
+    pool = BallPool(3, random.Random(3))
+    first = set(id(pool.serve()) for k in range(3))
+    pool.clear()
+    assert len(pool) == 0
+    assert pool.allFallen()
+    assert set(id(pool.serve()) for k in range(3)) == first
+    assert pool.getSize() == 3
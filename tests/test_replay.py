@@ -0,0 +1,87 @@
+# tests/test_replay.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""Tests for recording a session and replaying it headlessly"""
+import sys
+import pytest
+from constants import *
+from game2d import InputRecorder, InputLog, GPoint, TouchEvent, TOUCH_DOWN, TOUCH_MOVE, TOUCH_UP
+
+
+#: the modules a replay must never need
+GRAPHICS = ('kivy', 'pygame', 'pygame.mixer')
+
+
+def _session(filename, seed=7, frames=400):
+    """Writes a log of a session that clicks to start and then drags the paddle
+    back and forth, and returns the list of (touch, events) it recorded"""
+    step = 1/60.0
+    recorder = InputRecorder(filename, seed, step)
+    records = []
+    for frame in range(frames):
+        now = frame*step
+        x = 100.0 + 150.0*((frame // 40) % 2) + (frame % 40)
+        if frame == 1:
+            events = (TouchEvent(TOUCH_DOWN, 200.0, 50.0, now),
+                      TouchEvent(TOUCH_UP, 200.0, 50.0, now+0.001))
+        elif frame == 90:
+            events = (TouchEvent(TOUCH_DOWN, x, 50.0, now),)
+        elif frame > 90:
+            events = (TouchEvent(TOUCH_MOVE, x, 50.0, now),)
+        else:
+            events = ()
+        touch = GPoint(x, 50.0) if frame >= 90 else None
+        recorder.record(touch, events)
+        records.append((touch, events))
+    recorder.close()
+    return records
+
+
+def _trace(game):
+    """Returns the state, paddle, balls, bricks and tries of a replayed Breakout"""
+    play = game._game
+    if play is None:
+        return (game.getState(),)
+    return (game.getState(), play.getPaddle().x,
+            [(ball.x, ball.y) for ball in play.getBalls()],
+            play.getBrickCount(), play.getTries())
+
+
+def test_log_round_trip(tmpdir):
+    """A log reads back the records it was written with"""
+    filename = str(tmpdir.join('session.log'))
+    records = _session(filename, frames=120)
+    log = InputLog(filename)
+    assert log.seed == 7
+    assert log.version == InputRecorder.VERSION
+    read = list(log)
+    assert len(read) == len(records)
+    for (touch, events), (rtouch, revents) in zip(records, read):
+        assert (touch is None) == (rtouch is None)
+        assert tuple(events) == tuple(revents)
+
+
+def test_truncated_log(tmpdir):
+    """A log cut off in the middle of a record reads up to the last whole one"""
+    filename = str(tmpdir.join('session.log'))
+    _session(filename, frames=50)
+    with open(filename, 'rb') as data:
+        contents = data.read()
+    with open(filename, 'wb') as data:
+        data.write(contents[:-5])
+    assert len(list(InputLog(filename))) == 49
+
+
+def test_replay_headless(tmpdir, monkeypatch):
+    """A replay runs with neither Kivy nor pygame, and always plays out the same"""
+    for name in GRAPHICS:
+        if name in sys.modules and not sys.modules[name] is None:
+            pytest.skip(name+' is already imported')
+        monkeypatch.setitem(sys.modules, name, None)   # Makes the import fail
+    import replay
+    
+    filename = str(tmpdir.join('session.log'))
+    _session(filename)
+    first = replay.replay(filename)
+    assert first.getState() in (STATE_ACTIVE, STATE_PAUSED)
+    assert _trace(first) == _trace(replay.replay(filename))
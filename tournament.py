@@ -0,0 +1,379 @@
+# tournament.py
+# Michael Wang (mgw55)
+# 10/18/2026
+"""Tournament runner for Breakout paddle controllers
+
+This module plays scripted paddle controllers against each other over many seeds
+and wall sizes, with no window and no sound.  Every game is a headless Gameplay,
+stepped until it is won, lost or runs out of frames, and the result of each game
+is written to a CSV or JSONL file as soon as it is known.
+
+The games are spread over a multiprocessing pool with one worker per core.  At
+most one game per worker is in flight at a time, so the pool stays busy without
+queueing work behind a stuck worker.  If a worker dies or hangs, its game is
+written out as an error once the timeout passes (counted from when the worker
+started that game), the hung worker is stopped, the pool replaces it, and the
+games already written are untouched.  With --resume, the games already
+in the output file are skipped, so an interrupted tournament carries on where it
+stopped.  Run it as
+
+    python tournament.py --seeds 100 --walls 10x10,5x8 --output results.csv
+
+A controller is a function that takes the Gameplay and a random.Random (seeded
+from the game seed) and returns how far to move the paddle this frame.  To add a
+controller, write such a function and add it to CONTROLLERS."""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import Queue
+import random
+import signal
+import sys
+import time
+import traceback
+from constants import *
+from gameplay import *
+
+
+# SCRIPTED CONTROLLERS
+def still(game, rng):
+    """Never moves the paddle"""
+    return 0
+
+def track(game, rng):
+    """Moves the center of the paddle to the center of the ball"""
+    return game.getBall().center_x - game.getPaddle().center_x
+
+def lazy(game, rng):
+    """Follows the ball at no more than 6 pixels a frame"""
+    return max(-6.0, min(6.0, track(game, rng)))
+
+def jitter(game, rng):
+    """Follows the ball, but aims anywhere along the paddle"""
+    return track(game, rng) + rng.uniform(-PADDLE_WIDTH/2.0, PADDLE_WIDTH/2.0)
+
+def wander(game, rng):
+    """Moves the paddle at random"""
+    return rng.uniform(-15.0, 15.0)
+
+
+#: the controllers in the tournament, by name
+CONTROLLERS = {'still': still, 'track': track, 'lazy': lazy,
+               'jitter': jitter, 'wander': wander}
+
+#: the columns of a result, in output order
+FIELDS = ('controller', 'seed', 'rows', 'cols', 'frames', 'bricks_cleared',
+          'lives_used', 'won', 'seconds', 'us_per_frame', 'error')
+
+
+def play(controller, seed, rows, cols, frames):
+    """Returns the result (a dict with the keys in FIELDS) of one game
+
+    The game ends when it is won or lost, or after the given number of frames.
+
+        Parameter controller: the name of the controller to play
+        Precondition: controller is a key of CONTROLLERS
+
+        Parameter seed: the seed of the game
+        Precondition: seed is an int >= 0
+
+        Parameters rows, cols: the size of the brick wall
+        Precondition: rows and cols are ints > 0
+
+        Parameter frames: the most frames to play
+        Precondition: frames is an int > 0"""
+    move = CONTROLLERS[controller]
+    rng = random.Random(seed)
+    start = time.time()
+    game = Gameplay(rows=rows, cols=cols, seed=seed)
+    played = 0
+    while played < frames:
+        game.movePaddle(move(game, rng))
+        played += 1
+        if not game.step():
+            break
+    seconds = time.time()-start
+    return {'controller': controller, 'seed': seed, 'rows': rows, 'cols': cols,
+            'frames': played, 'bricks_cleared': rows*cols-game.getBrickCount(),
+            'lives_used': NUMBER_TURNS-game.getTries(), 'won': game.isWon(),
+            'seconds': round(seconds, 6),
+            'us_per_frame': round(1e6*seconds/max(played, 1), 3), 'error': ''}
+
+
+#: in a worker, the queue to report each game to as it starts (see _startWorker)
+_STARTED = None
+
+
+def _startWorker(started):
+    """Sets up a worker process, so that _playTask reports the games it starts
+    to the queue started"""
+    global _STARTED
+    _STARTED = started
+
+
+def _playTask(task, number):
+    """Returns the result of the game task, as play does, or a failed result
+    with the traceback if the game raised an error
+
+    This is the function run by the workers.  Before playing, it puts
+    (number, process id, start time) on the queue given to _startWorker, so
+    that run only times a game once a worker has actually started it.
+
+        Parameter task: the arguments to play
+        Precondition: task is a tuple (controller, seed, rows, cols, frames)
+
+        Parameter number: the number of this game in the tournament
+        Precondition: number is an int"""
+    if not _STARTED is None:
+        _STARTED.put((number, os.getpid(), time.time()))
+    try:
+        return play(*task)
+    except Exception:
+        return _failed(task, traceback.format_exc().strip())
+
+
+def _failed(task, error):
+    """Returns a result for the game task that did not finish, with the message error"""
+    controller, seed, rows, cols, frames = task
+    result = dict.fromkeys(FIELDS, '')
+    result.update({'controller': controller, 'seed': seed, 'rows': rows,
+                   'cols': cols, 'error': error})
+    return result
+
+
+def _stopWorker(pid):
+    """Stops the worker process pid (a hung one), so the pool replaces it"""
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except OSError:
+        pass
+
+
+def _key(result):
+    """Returns the (controller, seed, rows, cols) of a result"""
+    return (result['controller'], int(result['seed']),
+            int(result['rows']), int(result['cols']))
+
+
+class ResultWriter(object):
+    """An instance appends tournament results to a CSV or JSONL file.
+
+    Every result is flushed to the file as soon as it is written, so a crash
+    of the runner loses at most the games that were still being played.
+
+    INSTANCE ATTRIBUTES:
+        _file   [file]: the open output file
+        _format [str]: either 'csv' or 'jsonl'
+        _writer [csv.DictWriter, or None for jsonl]: writes the CSV rows
+    """
+
+    def __init__(self, filename, format, append=False):
+        """Opens the output file, writing the CSV header if the file is new
+
+            Parameter filename: the file to write
+            Precondition: filename is a string
+
+            Parameter format: the format of the file
+            Precondition: format is 'csv' or 'jsonl'
+
+            Parameter append: whether to keep the results already in the file
+            Precondition: append is a bool"""
+        fresh = not append or not os.path.exists(filename) or os.path.getsize(filename) == 0
+        self._file = open(filename, 'ab' if append else 'wb')
+        self._format = format
+        self._writer = None
+        if format == 'csv':
+            self._writer = csv.DictWriter(self._file, FIELDS)
+            if fresh:
+                self._writer.writeheader()
+
+    def write(self, result):
+        """Writes one result to the file and flushes it"""
+        if self._writer is None:
+            self._file.write(json.dumps(result, sort_keys=True)+'\n')
+        else:
+            self._writer.writerow(result)
+        self._file.flush()
+
+    def close(self):
+        """Closes the output file"""
+        self._file.close()
+
+
+def finished(filename, format):
+    """Returns the set of the (controller, seed, rows, cols) games already in the
+    results file, or the empty set if there is no such file
+
+    Games that ended in an error are not counted, so they are played again.
+    A partly written last line (from a crash) is ignored."""
+    done = set()
+    if not os.path.exists(filename):
+        return done
+    with open(filename, 'rb') as data:
+        if format == 'csv':
+            results = csv.DictReader(data)
+        else:
+            results = []
+            for line in data:
+                try:
+                    results.append(json.loads(line))
+                except ValueError:
+                    pass
+        for result in results:
+            try:
+                if result.get('error') == '':
+                    done.add(_key(result))
+            except (KeyError, TypeError, ValueError):
+                pass
+    return done
+
+
+def run(tasks, writer, processes=None, timeout=60.0, progress=None):
+    """Plays every game task on a pool of processes, writing each result to writer
+    as it arrives, and returns the number of games that failed
+
+    A game still running timeout seconds after a worker started it is written
+    as failed (its worker crashed or hung), and that worker is stopped.  Games
+    waiting for a free worker are not timed.  The pool replaces crashed and
+    stopped workers, and it is terminated at the end.
+
+        Parameter tasks: the games to play
+        Precondition: tasks is a list of tuples (controller, seed, rows, cols, frames)
+
+        Parameter writer: where to write the results
+        Precondition: writer is a ResultWriter
+
+        Parameter processes: the number of workers, or None for one per core
+        Precondition: processes is None or an int > 0
+
+        Parameter timeout: the most seconds a single game may take
+        Precondition: timeout is a number > 0
+
+        Parameter progress: a function called as progress(done, total) after
+        every game, or None
+        Precondition: progress is None or a function as described"""
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    started = multiprocessing.Queue()
+    pool = multiprocessing.Pool(processes, _startWorker, (started,))
+    pending = []
+    clocks = {}
+    failures = 0
+    done = 0
+    queue = list(reversed(list(enumerate(tasks))))
+    try:
+        while queue or pending:
+            while queue and len(pending) < processes:
+                number, task = queue.pop()
+                pending.append((number, task, pool.apply_async(_playTask, (task, number))))
+
+            while True:
+                try:
+                    number, pid, start = started.get_nowait()
+                except Queue.Empty:
+                    break
+                clocks[number] = (pid, start)
+
+            waiting = []
+            now = time.time()
+            for number, task, job in pending:
+                if job.ready():
+                    try:
+                        result = job.get()
+                    except Exception, e:
+                        result = _failed(task, 'worker error: '+repr(e))
+                elif number in clocks and now-clocks[number][1] > timeout:
+                    _stopWorker(clocks[number][0])
+                    result = _failed(task, 'timed out after %g s (worker crashed or hung)' % timeout)
+                else:
+                    waiting.append((number, task, job))
+                    continue
+                clocks.pop(number, None)
+                writer.write(result)
+                if result['error']:
+                    failures += 1
+                done += 1
+                if not progress is None:
+                    progress(done, len(tasks))
+            if len(waiting) == len(pending):
+                time.sleep(0.005)
+            pending = waiting
+    finally:
+        pool.terminate()
+        pool.join()
+    return failures
+
+
+def _walls(text):
+    """Returns the list of (rows, cols) for a string like '10x10,5x8'"""
+    walls = []
+    for size in text.split(','):
+        rows, cols = size.lower().split('x')
+        walls.append((int(rows), int(cols)))
+    return walls
+
+
+def main(argv=None):
+    """Runs the tournament described by the command line arguments argv
+    (sys.argv[1:] if None), and returns the exit status"""
+    parser = argparse.ArgumentParser(description='Play Breakout paddle controllers '+
+                                     'against each other, headlessly.')
+    parser.add_argument('--controllers', default=','.join(sorted(CONTROLLERS)),
+                        help='comma separated controller names (default: all)')
+    parser.add_argument('--seeds', type=int, default=20,
+                        help='the number of seeds per controller and wall')
+    parser.add_argument('--first-seed', type=int, default=0,
+                        help='the first seed (default: 0)')
+    parser.add_argument('--walls', default='%dx%d' % (BRICK_ROWS, BRICKS_IN_ROW),
+                        help='comma separated wall sizes, as ROWSxCOLS')
+    parser.add_argument('--frames', type=int, default=100000,
+                        help='the most frames per game')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='the number of workers (default: one per core)')
+    parser.add_argument('--timeout', type=float, default=60.0,
+                        help='the most seconds per game')
+    parser.add_argument('--output', default='tournament.csv',
+                        help='the results file (.csv or .jsonl)')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default=None,
+                        help='the results format (default: from --output)')
+    parser.add_argument('--resume', action='store_true',
+                        help='skip the games already in the results file')
+    args = parser.parse_args(argv)
+
+    format = args.format
+    if format is None:
+        format = 'jsonl' if args.output.endswith('.jsonl') else 'csv'
+    names = args.controllers.split(',')
+    for name in names:
+        if not name in CONTROLLERS:
+            parser.error('unknown controller '+`name`)
+
+    skip = finished(args.output, format) if args.resume else set()
+    tasks = []
+    for rows, cols in _walls(args.walls):
+        for seed in range(args.first_seed, args.first_seed+args.seeds):
+            for name in names:
+                if not (name, seed, rows, cols) in skip:
+                    tasks.append((name, seed, rows, cols, args.frames))
+
+    def progress(done, total):
+        sys.stderr.write('\r%d/%d games' % (done, total))
+        if done == total:
+            sys.stderr.write('\n')
+
+    writer = ResultWriter(args.output, format, append=args.resume)
+    start = time.time()
+    try:
+        failures = run(tasks, writer, args.processes, args.timeout, progress)
+    finally:
+        writer.close()
+    print '%d games (%d skipped, %d failed) in %.1f s' % (len(tasks), len(skip),
+                                                        failures, time.time()-start)
+    return 1 if failures else 0
+
+
+# Application code
+if __name__ == '__main__':
+    sys.exit(main())